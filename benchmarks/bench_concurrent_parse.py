@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+import argparse
+import concurrent.futures
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.schema_parser as schema_parser
+from schema_generator import SchemaGenerator
+
+
+# Everything a parsed table is made of, so that the results of two parses can be compared.
+def get_table_summary(table_definition):
+    return (
+        table_definition.name,
+        table_definition.columns,
+        table_definition.partition_key,
+        table_definition.clustering_key,
+        table_definition.properties,
+        table_definition.statement
+    )
+
+
+def iter_parsed_tables(cql_parser, schema_file, parse_args):
+    for table_definition in cql_parser.iter_schema(
+            schema_file,
+            diagnostics_collector=diagnostics.DiagnosticsCollector(verbosity=diagnostics.DiagnosticsCollector.QUIET),
+            **parse_args):
+        yield get_table_summary(table_definition)
+
+
+def parse_serial(schema_files, parse_args):
+    return [
+        list(iter_parsed_tables(schema_parser.SchemaParser(), schema_file, parse_args)) for schema_file in schema_files
+    ]
+
+
+# Parses every file with the same parser from a pool of threads.
+def parse_threaded(cql_parser, schema_files, parse_args, threads):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(
+            lambda schema_file: list(iter_parsed_tables(cql_parser, schema_file, parse_args)),
+            schema_files
+        ))
+
+
+# Parses every file with the same parser in a single thread, taking one table from each parse in turn, so that every
+# parse is suspended part way through while the others carry on.
+def parse_interleaved(cql_parser, schema_files, parse_args):
+    parse_results = [[] for _ in schema_files]
+    parse_iters = [
+        (file_results, iter_parsed_tables(cql_parser, schema_file, parse_args))
+        for file_results, schema_file in zip(parse_results, schema_files)
+    ]
+    while parse_iters:
+        next_iters = []
+        for file_results, parse_iter in parse_iters:
+            table_summary = next(parse_iter, None)
+            if table_summary is not None:
+                file_results.append(table_summary)
+                next_iters.append((file_results, parse_iter))
+        parse_iters = next_iters
+
+    return parse_results
+
+
+def check_results(name, expected_results, parse_results, elapsed):
+    mismatched_files = sum(
+        1 for expected_tables, parsed_tables in zip(expected_results, parse_results) if expected_tables != parsed_tables
+    )
+    print('{:<24} {:>8} tables  {:>8.3f}s  {}'.format(
+        name,
+        sum(len(parsed_tables) for parsed_tables in parse_results),
+        elapsed,
+        'OK' if mismatched_files == 0 else '{} files differ from serial parsing'.format(mismatched_files)
+    ))
+    return mismatched_files == 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description='Check that a single SchemaParser gives the same results when it parses many schemas at once as '
+                    'when each schema is parsed on its own.'
+    )
+    arg_parser.add_argument('schema_files', nargs='*', help='CQL schema files to parse. Defaults to generated schemas.')
+    arg_parser.add_argument('-f', '--files', type=int, default=8, help='Number of schemas to generate.')
+    arg_parser.add_argument('-t', '--tables', type=int, default=2000, help='Number of tables in each generated schema.')
+    arg_parser.add_argument('-T', '--threads', type=int, default=8, help='Number of threads in the pool.')
+    arg_parser.add_argument('-s', '--select-keyspace', nargs='+', default=[], help='Keyspaces to select.')
+    bench_args = arg_parser.parse_args()
+
+    schema_files = bench_args.schema_files
+    generated_files = []
+    if not schema_files:
+        for seed in range(bench_args.files):
+            with tempfile.NamedTemporaryFile('w', suffix='.cql', delete=False) as out_cql:
+                SchemaGenerator(keyspaces=10, tables=bench_args.tables, seed=seed).write(out_cql)
+                generated_files.append(out_cql.name)
+        schema_files = generated_files
+
+    # Each file is parsed twice in the concurrent runs so that the same statements are parsed at the same time.
+    schema_files = list(itertools.chain(schema_files, schema_files))
+    parse_args = {'select_keyspace': bench_args.select_keyspace}
+    try:
+        start_time = time.perf_counter()
+        expected_results = parse_serial(schema_files, parse_args)
+        serial_time = time.perf_counter() - start_time
+        check_results('serial', expected_results, expected_results, serial_time)
+
+        results_ok = True
+        cql_parser = schema_parser.SchemaParser()
+        start_time = time.perf_counter()
+        parse_results = parse_threaded(cql_parser, schema_files, parse_args, bench_args.threads)
+        results_ok &= check_results(
+            'threads ({})'.format(bench_args.threads),
+            expected_results,
+            parse_results,
+            time.perf_counter() - start_time
+        )
+
+        start_time = time.perf_counter()
+        parse_results = parse_interleaved(cql_parser, schema_files, parse_args)
+        results_ok &= check_results('interleaved', expected_results, parse_results, time.perf_counter() - start_time)
+    finally:
+        for schema_file in generated_files:
+            os.remove(schema_file)
+
+    return 0 if results_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
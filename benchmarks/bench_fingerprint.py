@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.fingerprint as fingerprint
+import cql_schema_analyser.schema_parser as schema_parser
+import cql_schema_analyser.table_template_analyser as table_template_analyser
+from schema_generator import SchemaGenerator
+
+
+# The hashing previously done by TableTemplateAnalyser, an MD5 digest of the JSON encoding of the sorted column types
+# and keys, and of the properties.
+class LegacyFingerprinter:
+    @staticmethod
+    def get_table_fingerprints(table_definition):
+        columns_hash = hashlib.md5()
+        columns_hash.update(json.dumps(sorted(table_definition.columns)).encode())
+        columns_hash.update(json.dumps({
+            'partition': sorted(table_definition.partition_key),
+            'clustering': sorted(table_definition.clustering_key)
+        }, sort_keys=True).encode())
+
+        options_hash = hashlib.md5()
+        options_hash.update(json.dumps(table_definition.properties, sort_keys=True).encode())
+
+        return columns_hash.hexdigest(), options_hash.hexdigest()
+
+
+def hash_tables(fingerprinter, table_definitions):
+    for table_definition in table_definitions:
+        fingerprinter.get_table_fingerprints(table_definition)
+
+
+def catalog_tables(fingerprinter, table_definitions):
+    cql_table_template_analyser = table_template_analyser.TableTemplateAnalyser()
+    cql_table_template_analyser.fingerprinter = fingerprinter
+    for table_definition in table_definitions:
+        cql_table_template_analyser.catalog_table_definition(table_definition)
+
+
+def run_benchmark(name, benchmark_fn, fingerprinter_factory, table_definitions, rounds):
+    best_time = None
+    for _ in range(rounds):
+        fingerprinter = fingerprinter_factory()
+        start_time = time.perf_counter()
+        benchmark_fn(fingerprinter, table_definitions)
+        elapsed = time.perf_counter() - start_time
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    print('{:<20} {:>8} tables  {:>8.3f}s  {:>12,.0f} tables/s'.format(
+        name,
+        len(table_definitions),
+        best_time,
+        len(table_definitions) / best_time
+    ))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare template fingerprinting and catalogue throughput.')
+    arg_parser.add_argument(
+        'schema_file', nargs='?', help='CQL schema file to catalogue. Defaults to a generated schema.'
+    )
+    arg_parser.add_argument('-t', '--tables', type=int, default=100000, help='Number of tables to generate.')
+    arg_parser.add_argument('-r', '--rounds', type=int, default=3, help='Number of timed rounds; the best is reported.')
+    bench_args = arg_parser.parse_args()
+
+    schema_file = bench_args.schema_file
+    if not schema_file:
+        with tempfile.NamedTemporaryFile('w', suffix='.cql', delete=False) as out_cql:
+            SchemaGenerator(keyspaces=100, tables=bench_args.tables, seed=0).write(out_cql)
+            schema_file = out_cql.name
+
+    try:
+        table_definitions = schema_parser.SchemaParser().parse_schema(
+            schema_file,
+            diagnostics_collector=diagnostics.DiagnosticsCollector(verbosity=diagnostics.DiagnosticsCollector.QUIET)
+        )
+    finally:
+        if not bench_args.schema_file:
+            os.remove(schema_file)
+
+    run_benchmark('hash md5-json', hash_tables, LegacyFingerprinter, table_definitions, bench_args.rounds)
+    run_benchmark('hash fingerprint', hash_tables, fingerprint.TemplateFingerprinter, table_definitions,
+                  bench_args.rounds)
+    run_benchmark('catalog md5-json', catalog_tables, LegacyFingerprinter, table_definitions, bench_args.rounds)
+    run_benchmark('catalog fingerprint', catalog_tables, fingerprint.TemplateFingerprinter, table_definitions,
+                  bench_args.rounds)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.cql_lexer as cql_lexer
+from schema_generator import SchemaGenerator
+
+
+# The tokenisation previously done by SchemaParser.parse_schema, one line at a time.
+def legacy_tokenize(cql_buffer):
+    token_count = 0
+    statement_raw = ''
+    statement_terms = []
+    for raw_line in cql_buffer.splitlines(keepends=True):
+        if len(raw_line.strip()) == 0:
+            continue
+
+        statement_raw += raw_line
+        for term_item in re.split(r'(\W)', raw_line):
+            term_item = term_item.strip()
+            if term_item and term_item not in ['\'', '"']:
+                statement_terms.append(term_item)
+
+        if len(statement_terms) > 0 and statement_terms[-1] == ';':
+            token_count += len(statement_terms)
+            statement_raw = ''
+            statement_terms = []
+
+    return token_count
+
+
+def lexer_tokenize(cql_buffer):
+    token_count = 0
+    lexer = cql_lexer.CqlLexer()
+    for statement_terms, _, _ in lexer.iter_statements(cql_buffer):
+        token_count += len(statement_terms)
+
+    return token_count
+
+
+def typed_lexer_tokenize(cql_buffer):
+    lexer = cql_lexer.CqlLexer()
+    return sum(1 for _ in lexer.tokenize(cql_buffer))
+
+
+def run_benchmark(name, tokenize_fn, cql_buffer, rounds):
+    best_time = None
+    token_count = 0
+    for _ in range(rounds):
+        start_time = time.perf_counter()
+        token_count = tokenize_fn(cql_buffer)
+        elapsed = time.perf_counter() - start_time
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    print('{:<8} {:>10} tokens  {:>8.3f}s  {:>12,.0f} tokens/s'.format(
+        name,
+        token_count,
+        best_time,
+        token_count / best_time
+    ))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare CQL tokenisation throughput.')
+    arg_parser.add_argument(
+        'schema_file', nargs='?', help='CQL schema file to tokenise. Defaults to a generated schema.'
+    )
+    arg_parser.add_argument('-t', '--tables', type=int, default=5000, help='Number of tables to generate.')
+    arg_parser.add_argument('-r', '--rounds', type=int, default=3, help='Number of timed rounds; the best is reported.')
+    bench_args = arg_parser.parse_args()
+
+    if bench_args.schema_file:
+        with open(bench_args.schema_file, 'r') as in_cql:
+            cql_buffer = in_cql.read()
+    else:
+        cql_buffer = SchemaGenerator(tables=bench_args.tables, seed=0).generate()
+
+    print('Schema size: {:,} bytes'.format(len(cql_buffer)))
+    run_benchmark('legacy', legacy_tokenize, cql_buffer, bench_args.rounds)
+    run_benchmark('lexer', lexer_tokenize, cql_buffer, bench_args.rounds)
+    run_benchmark('typed', typed_lexer_tokenize, cql_buffer, bench_args.rounds)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
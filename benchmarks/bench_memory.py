@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.schema_parser as schema_parser
+from schema_generator import SchemaGenerator
+
+
+# The legacy parser built a fresh string for every term and column type, so nothing was shared between tables. The
+# strings are re-created here to reproduce that.
+def legacy_dom_object(table_definition):
+    return {
+        'name': table_definition.name.encode().decode(),
+        'attributes': {
+            'columns': [column_type.encode().decode() for column_type in table_definition.columns],
+            'key': {
+                'partition': [column_type.encode().decode() for column_type in table_definition.partition_key],
+                'clustering': [column_type.encode().decode() for column_type in table_definition.clustering_key]
+            },
+            'properties': {},
+        },
+        'statement': table_definition.statement
+    }
+
+
+def measure_bytes(build_fn, table_definitions):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    retained = build_fn(table_definitions)
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    del retained
+    return allocated
+
+
+def build_legacy(table_definitions):
+    return [legacy_dom_object(table_definition) for table_definition in table_definitions]
+
+
+# Rebuilds each record from its type names so that the measurement covers the record itself, its tuples and any newly
+# interned names, but not the statement text, which is shared with the legacy form.
+def build_compact(table_definitions):
+    return [
+        table_definition.from_type_names(
+            table_definition.keyspace,
+            table_definition.table.encode().decode(),
+            columns=table_definition.columns,
+            partition_key=table_definition.partition_key,
+            clustering_key=table_definition.clustering_key,
+            properties={},
+            statement=table_definition.statement
+        )
+        for table_definition in table_definitions
+    ]
+
+
+# Parses the schema file read as a stream, where every table holds a copy of its statement, and memory-mapped, where
+# every table holds a StatementRef to its statement in the file. The mapped file itself is not allocated on the heap.
+def measure_parsed_bytes(schema_file):
+    with open(schema_file, encoding='utf-8') as in_cql:
+        stream_bytes = measure_bytes(schema_parser.SchemaParser().parse_schema, in_cql)
+    mapped_bytes = measure_bytes(schema_parser.SchemaParser().parse_schema, schema_file)
+    return [('stream', stream_bytes), ('mapped', mapped_bytes)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare the memory used by parsed table representations.')
+    arg_parser.add_argument('schema_file', nargs='?', help='CQL schema file to parse. Defaults to a generated schema.')
+    arg_parser.add_argument('-t', '--tables', type=int, default=20000, help='Number of tables to generate.')
+    bench_args = arg_parser.parse_args()
+
+    schema_file = bench_args.schema_file
+    if not schema_file:
+        with tempfile.NamedTemporaryFile('w', suffix='.cql', delete=False) as out_cql:
+            SchemaGenerator(tables=bench_args.tables, seed=0).write(out_cql)
+            schema_file = out_cql.name
+
+    try:
+        table_definitions = schema_parser.SchemaParser().parse_schema(schema_file)
+        parsed_bytes = measure_parsed_bytes(schema_file)
+    finally:
+        if not bench_args.schema_file:
+            os.remove(schema_file)
+
+    table_count = len(table_definitions)
+    measured_bytes = [
+        (name, measure_bytes(build_fn, table_definitions))
+        for name, build_fn in [('legacy', build_legacy), ('compact', build_compact)]
+    ]
+    for name, allocated in measured_bytes + parsed_bytes:
+        print('{:<8} {:>8} tables  {:>14,} bytes  {:>8,.0f} bytes/table'.format(
+            name,
+            table_count,
+            allocated,
+            float(allocated) / table_count
+        ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
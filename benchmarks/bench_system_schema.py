@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.schema_parser as schema_parser
+import cql_schema_analyser.system_schema_loader as system_schema_loader
+from schema_generator import SchemaGenerator
+
+
+def run_benchmark(name, load_fn, schema_path, rounds):
+    best_time = None
+    table_count = 0
+    for _ in range(rounds):
+        quiet_diagnostics = diagnostics.DiagnosticsCollector(verbosity=diagnostics.DiagnosticsCollector.QUIET)
+        start_time = time.perf_counter()
+        table_count = len(load_fn(schema_path, parse_reserved_keyspaces=True, diagnostics_collector=quiet_diagnostics))
+        elapsed = time.perf_counter() - start_time
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    print('{:<14} {:>8} tables  {:>8.3f}s  {:>12,.0f} tables/s'.format(
+        name,
+        table_count,
+        best_time,
+        table_count / best_time
+    ))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare loading system_schema exports with parsing the same '
+                                                     'schema from CQL.')
+    arg_parser.add_argument('-k', '--keyspaces', type=int, default=100, help='Number of keyspaces to generate.')
+    arg_parser.add_argument('-t', '--tables', type=int, default=20000, help='Number of tables to generate.')
+    arg_parser.add_argument('-r', '--rounds', type=int, default=3, help='Number of timed rounds; the best is reported.')
+    bench_args = arg_parser.parse_args()
+
+    # Two generators with the same parameters and seed produce the same schema.
+    def get_schema_generator():
+        return SchemaGenerator(keyspaces=bench_args.keyspaces, tables=bench_args.tables, seed=0)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        schema_file = os.path.join(work_dir, 'schema.cql')
+        with open(schema_file, 'w') as out_cql:
+            get_schema_generator().write(out_cql)
+
+        export_dir = os.path.join(work_dir, 'system_schema')
+        get_schema_generator().write_system_schema(export_dir)
+
+        run_benchmark(
+            'cql parser',
+            lambda schema_path, **load_args: schema_parser.SchemaParser().parse_schema(schema_path, **load_args),
+            schema_file,
+            bench_args.rounds
+        )
+        run_benchmark(
+            'export loader',
+            lambda schema_path, **load_args: system_schema_loader.SystemSchemaLoader().load_schema(schema_path,
+                                                                                                  **load_args),
+            export_dir,
+            bench_args.rounds
+        )
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
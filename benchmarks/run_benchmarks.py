@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cql_schema_analyser.schema_parser as schema_parser
+import cql_schema_analyser.table_template_analyser as table_template_analyser
+from schema_generator import SchemaGenerator
+
+
+PROCESSOR_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'cql_schema_analyser', 'schema_processor.py')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+def get_peak_rss_bytes(who=resource.RUSAGE_SELF):
+    peak_rss = resource.getrusage(who).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def best_of(rounds, benchmark_fn):
+    best_time = None
+    result = None
+    for _ in range(rounds):
+        start_time = time.perf_counter()
+        result = benchmark_fn()
+        elapsed = time.perf_counter() - start_time
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, result
+
+
+def benchmark_parse(schema_file, rounds):
+    def parse_schema():
+        return sum(1 for _ in schema_parser.SchemaParser().iter_schema(schema_file))
+
+    elapsed, table_count = best_of(rounds, parse_schema)
+    return {
+        'seconds': elapsed,
+        'tables': table_count,
+        'tables_per_second': table_count / elapsed,
+        'bytes_per_second': os.path.getsize(schema_file) / elapsed,
+    }
+
+
+# Parses the schema with a single keyspace selected. The tables of every other keyspace are skipped, and should cost
+# little more than finding where their statements end.
+def benchmark_parse_selected(schema_file, rounds, keyspace_name):
+    def parse_schema():
+        return sum(1 for _ in schema_parser.SchemaParser().iter_schema(schema_file, select_keyspace=[keyspace_name]))
+
+    elapsed, table_count = best_of(rounds, parse_schema)
+    return {
+        'seconds': elapsed,
+        'keyspace': keyspace_name,
+        'tables': table_count,
+        'bytes_per_second': os.path.getsize(schema_file) / elapsed,
+    }
+
+
+def benchmark_catalog(schema_file, rounds):
+    table_definitions = schema_parser.SchemaParser().parse_schema(schema_file)
+
+    def catalog_tables():
+        cql_table_template_analyser = table_template_analyser.TableTemplateAnalyser()
+        for table_definition in table_definitions:
+            cql_table_template_analyser.catalog_table_definition(table_definition)
+        return len(cql_table_template_analyser.template_definitions)
+
+    elapsed, template_count = best_of(rounds, catalog_tables)
+    return {
+        'seconds': elapsed,
+        'tables': len(table_definitions),
+        'templates': template_count,
+        'tables_per_second': len(table_definitions) / elapsed,
+    }
+
+
+def benchmark_cli(schema_file, rounds):
+    def run_cli():
+        subprocess.run(
+            [sys.executable, PROCESSOR_SCRIPT, schema_file],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+
+    elapsed, _ = best_of(rounds, run_cli)
+    return {
+        'seconds': elapsed,
+        'peak_rss_bytes': get_peak_rss_bytes(resource.RUSAGE_CHILDREN),
+    }
+
+
+def compare_results(previous_results, current_results):
+    metrics = [
+        ('parse', 'tables_per_second', True),
+        ('parse_selected', 'bytes_per_second', True),
+        ('catalog', 'tables_per_second', True),
+        ('cli', 'seconds', False),
+        ('cli', 'peak_rss_bytes', False),
+        ('process', 'peak_rss_bytes', False),
+    ]
+
+    print('\nChange against {}:'.format(previous_results.get('timestamp')))
+    for section, metric, higher_is_better in metrics:
+        previous_value = previous_results.get('results', {}).get(section, {}).get(metric)
+        current_value = current_results['results'].get(section, {}).get(metric)
+        if not previous_value or current_value is None:
+            continue
+
+        change = (current_value - previous_value) / previous_value * 100
+        if change == 0:
+            verdict = 'unchanged'
+        elif (change > 0) == higher_is_better:
+            verdict = 'better'
+        else:
+            verdict = 'worse'
+
+        print('  {:<8} {:<18} {:>+8.1f}%  ({})'.format(section, metric, change, verdict))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark schema parsing, cataloguing and the CLI.')
+    arg_parser.add_argument('--schema-file', help='Benchmark an existing schema file instead of generating one.')
+    arg_parser.add_argument('-k', '--keyspaces', type=int, default=100, help='Number of generated keyspaces.')
+    arg_parser.add_argument('-t', '--tables', type=int, default=10000, help='Number of generated tables.')
+    arg_parser.add_argument('-d', '--duplicate-ratio', type=float, default=0.3,
+                            help='Fraction of generated tables that reuse an earlier layout.')
+    arg_parser.add_argument('-c', '--collection-ratio', type=float, default=0.2,
+                            help='Fraction of generated regular columns that are collections.')
+    arg_parser.add_argument('-f', '--frozen-ratio', type=float, default=0.1,
+                            help='Fraction of generated collection columns that are frozen.')
+    arg_parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed for the schema generator.')
+    arg_parser.add_argument('--select-keyspace', default='app_ks_0',
+                            help='Keyspace selected when timing a selective parse.')
+    arg_parser.add_argument('-r', '--rounds', type=int, default=3, help='Timed rounds per benchmark; the best is kept.')
+    arg_parser.add_argument('--skip-cli', action='store_true', help='Do not time the end-to-end CLI.')
+    arg_parser.add_argument('-o', '--output', help='File to save the results to. Defaults to a timestamped file in '
+                                                   'benchmarks/results.')
+    arg_parser.add_argument('--compare', help='Results file from an earlier run to compare against.')
+    bench_args = arg_parser.parse_args()
+
+    # Keep the diagnostics summary the parser logs after each run out of the benchmark output.
+    logging.disable(logging.WARNING)
+
+    timestamp = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
+    bench_results = {
+        'timestamp': timestamp,
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+
+    schema_file = bench_args.schema_file
+    if schema_file:
+        bench_results['schema_file'] = os.path.abspath(schema_file)
+    else:
+        schema_generator = SchemaGenerator(
+            keyspaces=bench_args.keyspaces,
+            tables=bench_args.tables,
+            duplicate_ratio=bench_args.duplicate_ratio,
+            collection_ratio=bench_args.collection_ratio,
+            frozen_ratio=bench_args.frozen_ratio,
+            seed=bench_args.seed
+        )
+        bench_results['generator'] = dict(schema_generator.get_parameters(), seed=bench_args.seed)
+
+        start_time = time.perf_counter()
+        with tempfile.NamedTemporaryFile('w', suffix='.cql', delete=False) as out_cql:
+            schema_generator.write(out_cql)
+            schema_file = out_cql.name
+        bench_results['results']['generate'] = {'seconds': time.perf_counter() - start_time}
+
+    bench_results['schema_bytes'] = os.path.getsize(schema_file)
+
+    try:
+        bench_results['results']['parse'] = benchmark_parse(schema_file, bench_args.rounds)
+        bench_results['results']['parse_selected'] = benchmark_parse_selected(
+            schema_file,
+            bench_args.rounds,
+            bench_args.select_keyspace
+        )
+        bench_results['results']['catalog'] = benchmark_catalog(schema_file, bench_args.rounds)
+        bench_results['results']['process'] = {'peak_rss_bytes': get_peak_rss_bytes()}
+        if not bench_args.skip_cli:
+            bench_results['results']['cli'] = benchmark_cli(schema_file, bench_args.rounds)
+    finally:
+        if not bench_args.schema_file:
+            os.remove(schema_file)
+
+    output_file = bench_args.output
+    if not output_file:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_file = os.path.join(RESULTS_DIR, '{}.json'.format(timestamp))
+
+    with open(output_file, 'w') as out_results:
+        json.dump(bench_results, out_results, indent=4)
+
+    print(json.dumps(bench_results['results'], indent=4))
+    print('Results saved to "{}"'.format(output_file))
+
+    if bench_args.compare:
+        with open(bench_args.compare, 'r') as in_results:
+            compare_results(json.load(in_results), bench_results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import os
+import random
+import sys
+import uuid
+
+
+class SchemaGenerator:
+    scalar_types = [
+        'ascii', 'bigint', 'blob', 'boolean', 'date', 'decimal', 'double', 'float', 'inet', 'int', 'smallint', 'text',
+        'time', 'timestamp', 'timeuuid', 'tinyint', 'uuid', 'varint'
+    ]
+
+    key_types = ['bigint', 'date', 'int', 'text', 'timestamp', 'timeuuid', 'uuid']
+
+    reserved_keyspace_tables = {
+        'system_auth': ['roles', 'role_members', 'role_permissions', 'resource_role_permissons_index'],
+        'system_distributed': ['parent_repair_history', 'repair_history', 'view_build_status'],
+        'system_traces': ['events', 'sessions'],
+        'dse_system': ['shared_data', 'encrypted_keys'],
+        'OpsCenter': ['events', 'rollups60', 'rollups300', 'rollups7200', 'settings'],
+    }
+
+    compaction_strategies = [
+        {'class': 'org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy', 'max_threshold': '32',
+         'min_threshold': '4'},
+        {'class': 'org.apache.cassandra.db.compaction.LeveledCompactionStrategy', 'sstable_size_in_mb': '160'},
+        {'class': 'org.apache.cassandra.db.compaction.TimeWindowCompactionStrategy', 'compaction_window_size': '1',
+         'compaction_window_unit': 'DAYS'},
+    ]
+
+    replication = {'class': 'org.apache.cassandra.locator.NetworkTopologyStrategy', 'dc1': '3'}
+
+    # Columns of the system_schema exports written by write_system_schema, as exported by cqlsh COPY TO with HEADER.
+    system_schema_fields = {
+        'keyspaces': ['keyspace_name', 'durable_writes', 'replication'],
+        'tables': [
+            'keyspace_name', 'table_name', 'bloom_filter_fp_chance', 'caching', 'comment', 'compaction', 'compression',
+            'crc_check_chance', 'default_time_to_live', 'flags', 'gc_grace_seconds', 'id', 'max_index_interval',
+            'memtable_flush_period_in_ms', 'min_index_interval', 'speculative_retry'
+        ],
+        'columns': [
+            'keyspace_name', 'table_name', 'column_name', 'clustering_order', 'column_name_bytes', 'kind', 'position',
+            'type'
+        ],
+    }
+
+    # Templates are drawn from a bounded pool so that memory use does not grow with the number of tables generated.
+    template_pool_size = 1024
+
+    def __init__(self, keyspaces=10, tables=1000, duplicate_ratio=0.3, collection_ratio=0.2, frozen_ratio=0.1,
+                 min_columns=3, max_columns=20, property_variant_ratio=0.1, include_reserved_keyspaces=True, seed=0):
+        if keyspaces < 1 or tables < 0:
+            raise ValueError('At least one keyspace is required and the table count cannot be negative.')
+
+        self.keyspaces = keyspaces
+        self.tables = tables
+        self.duplicate_ratio = duplicate_ratio
+        self.collection_ratio = collection_ratio
+        self.frozen_ratio = frozen_ratio
+        self.min_columns = min_columns
+        self.max_columns = max_columns
+        self.property_variant_ratio = property_variant_ratio
+        self.include_reserved_keyspaces = include_reserved_keyspaces
+        self.random = random.Random(seed)
+
+        self.template_pool = []
+
+    def get_parameters(self):
+        return {
+            'keyspaces': self.keyspaces,
+            'tables': self.tables,
+            'duplicate_ratio': self.duplicate_ratio,
+            'collection_ratio': self.collection_ratio,
+            'frozen_ratio': self.frozen_ratio,
+            'min_columns': self.min_columns,
+            'max_columns': self.max_columns,
+            'property_variant_ratio': self.property_variant_ratio,
+            'include_reserved_keyspaces': self.include_reserved_keyspaces,
+        }
+
+    def __get_value_type(self):
+        if self.random.random() >= self.collection_ratio:
+            return self.random.choice(SchemaGenerator.scalar_types)
+
+        collection_kind = self.random.choice(['list', 'set', 'map'])
+        if collection_kind == 'map':
+            collection_type = 'map<{}, {}>'.format(
+                self.random.choice(SchemaGenerator.key_types),
+                self.random.choice(SchemaGenerator.scalar_types)
+            )
+        else:
+            collection_type = '{}<{}>'.format(collection_kind, self.random.choice(SchemaGenerator.key_types))
+
+        if self.random.random() < self.frozen_ratio:
+            if self.random.random() < 0.5:
+                return 'frozen<{}>'.format(collection_type)
+            return 'map<text, frozen<{}>>'.format(collection_type)
+
+        return collection_type
+
+    def __get_template(self):
+        if self.template_pool and self.random.random() < self.duplicate_ratio:
+            return self.random.choice(self.template_pool)
+
+        partition_count = 1 if self.random.random() < 0.7 else 2
+        clustering_count = self.random.choice([0, 0, 1, 1, 2])
+        column_count = self.random.randint(self.min_columns, self.max_columns)
+
+        template = {
+            'partition': [('pk_{}'.format(idx), self.random.choice(SchemaGenerator.key_types))
+                          for idx in range(partition_count)],
+            'clustering': [('ck_{}'.format(idx), self.random.choice(SchemaGenerator.key_types))
+                           for idx in range(clustering_count)],
+            'columns': [('col_{}'.format(idx), self.__get_value_type()) for idx in range(column_count)],
+            'descending': self.random.random() < 0.3,
+        }
+
+        if len(self.template_pool) < SchemaGenerator.template_pool_size:
+            self.template_pool.append(template)
+        else:
+            self.template_pool[self.random.randrange(SchemaGenerator.template_pool_size)] = template
+
+        return template
+
+    def __get_properties(self):
+        compaction = SchemaGenerator.compaction_strategies[0]
+        gc_grace_seconds = 864000
+        default_time_to_live = 0
+        if self.random.random() < self.property_variant_ratio:
+            compaction = self.random.choice(SchemaGenerator.compaction_strategies)
+            gc_grace_seconds = self.random.choice([0, 3600, 86400, 864000])
+            default_time_to_live = self.random.choice([0, 86400, 2592000])
+
+        return {
+            'bloom_filter_fp_chance': 0.01,
+            'caching': {'keys': 'ALL', 'rows_per_partition': 'NONE'},
+            'comment': '',
+            'compaction': compaction,
+            'compression': {'chunk_length_in_kb': '64', 'class': 'org.apache.cassandra.io.compress.LZ4Compressor'},
+            'crc_check_chance': 1.0,
+            'default_time_to_live': default_time_to_live,
+            'gc_grace_seconds': gc_grace_seconds,
+            'max_index_interval': 2048,
+            'memtable_flush_period_in_ms': 0,
+            'min_index_interval': 128,
+            'speculative_retry': '99PERCENTILE',
+        }
+
+    # Formats a map in the way that both CQL and cqlsh exports write it, e.g. {'class': 'SimpleStrategy'}.
+    @staticmethod
+    def __format_map(map_value):
+        return '{{{}}}'.format(', '.join("'{}': '{}'".format(key, value) for key, value in map_value.items()))
+
+    @staticmethod
+    def __format_cql_value(value):
+        if isinstance(value, dict):
+            return SchemaGenerator.__format_map(value)
+        if isinstance(value, str):
+            return "'{}'".format(value.replace("'", "''"))
+        return str(value)
+
+    @staticmethod
+    def __get_table_statement(keyspace_name, table_name, template, properties):
+        column_lines = ['    {} {}'.format(column_name, column_type) for column_name, column_type in (
+            template['partition'] + template['clustering'] + template['columns']
+        )]
+
+        partition_names = [column_name for column_name, _ in template['partition']]
+        clustering_names = [column_name for column_name, _ in template['clustering']]
+        if len(partition_names) == 1 and not clustering_names:
+            column_lines[0] += ' PRIMARY KEY'
+        else:
+            partition_key = partition_names[0] if len(partition_names) == 1 else '({})'.format(', '.join(
+                partition_names
+            ))
+            column_lines.append('    PRIMARY KEY ({})'.format(', '.join([partition_key] + clustering_names)))
+
+        property_clauses = []
+        if template['clustering']:
+            property_clauses.append('CLUSTERING ORDER BY ({})'.format(', '.join(
+                '{} {}'.format(column_name, 'DESC' if template['descending'] else 'ASC')
+                for column_name, _ in template['clustering']
+            )))
+        property_clauses.extend(
+            '{} = {}'.format(property_name, SchemaGenerator.__format_cql_value(property_value))
+            for property_name, property_value in properties.items()
+        )
+
+        return 'CREATE TABLE {}.{} (\n{}\n) WITH {};\n\n'.format(
+            keyspace_name,
+            table_name,
+            ',\n'.join(column_lines),
+            '\n    AND '.join(property_clauses)
+        )
+
+    @staticmethod
+    def __get_keyspace_statement(keyspace_name):
+        return "CREATE KEYSPACE {} WITH replication = {{'class': 'NetworkTopologyStrategy', 'dc1': '3'}}  AND " \
+               "durable_writes = true;\n\n".format(keyspace_name)
+
+    def __iter_tables(self, table_names):
+        for table_name in table_names:
+            template = self.__get_template()
+            yield table_name, template, self.__get_properties()
+
+    # Yields each keyspace name along with an iterator over its tables. The tables of a keyspace must be consumed before
+    # moving on to the next keyspace, since they are generated as they are requested.
+    def iter_keyspaces(self):
+        if self.include_reserved_keyspaces:
+            for keyspace_name, table_names in SchemaGenerator.reserved_keyspace_tables.items():
+                yield keyspace_name, self.__iter_tables(table_names)
+
+        tables_per_keyspace, extra_tables = divmod(self.tables, self.keyspaces)
+        table_idx = 0
+        for keyspace_idx in range(self.keyspaces):
+            keyspace_table_count = tables_per_keyspace + (1 if keyspace_idx < extra_tables else 0)
+            yield 'app_ks_{}'.format(keyspace_idx), self.__iter_tables(
+                'table_{}'.format(idx) for idx in range(table_idx, table_idx + keyspace_table_count)
+            )
+            table_idx += keyspace_table_count
+
+    def iter_statements(self):
+        for keyspace_name, keyspace_tables in self.iter_keyspaces():
+            yield self.__get_keyspace_statement(keyspace_name)
+            for table_name, template, properties in keyspace_tables:
+                yield self.__get_table_statement(keyspace_name, table_name, template, properties)
+
+    def write(self, out_cql):
+        for statement in self.iter_statements():
+            out_cql.write(statement)
+
+    def generate(self):
+        return ''.join(self.iter_statements())
+
+    @staticmethod
+    def __get_column_rows(keyspace_name, table_name, template):
+        clustering_order = 'desc' if template['descending'] else 'asc'
+        column_rows = []
+        for kind, column_defs in [
+            ('partition_key', template['partition']),
+            ('clustering', template['clustering']),
+            ('regular', template['columns'])
+        ]:
+            for position, (column_name, column_type) in enumerate(column_defs):
+                column_rows.append([
+                    keyspace_name,
+                    table_name,
+                    column_name,
+                    clustering_order if kind == 'clustering' else 'none',
+                    '0x' + column_name.encode().hex(),
+                    kind,
+                    -1 if kind == 'regular' else position,
+                    column_type
+                ])
+
+        # cqlsh exports the columns of a table in column name order.
+        return sorted(column_rows, key=lambda column_row: column_row[2])
+
+    # Writes the schema as keyspaces.csv, tables.csv and columns.csv exports of the system_schema tables. A generator
+    # created with the same parameters and seed writes the same schema as CQL with write().
+    def write_system_schema(self, out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        out_files = {
+            export_name: open(os.path.join(out_dir, '{}.csv'.format(export_name)), 'w', newline='')
+            for export_name in SchemaGenerator.system_schema_fields
+        }
+        try:
+            csv_writers = {export_name: csv.writer(out_file) for export_name, out_file in out_files.items()}
+            for export_name, field_names in SchemaGenerator.system_schema_fields.items():
+                csv_writers[export_name].writerow(field_names)
+
+            for keyspace_name, keyspace_tables in self.iter_keyspaces():
+                csv_writers['keyspaces'].writerow([
+                    keyspace_name,
+                    'True',
+                    self.__format_map(SchemaGenerator.replication)
+                ])
+
+                for table_name, template, properties in keyspace_tables:
+                    table_values = dict(
+                        properties,
+                        keyspace_name=keyspace_name,
+                        table_name=table_name,
+                        flags="{'compound'}",
+                        id=str(uuid.uuid5(uuid.NAMESPACE_OID, '{}.{}'.format(keyspace_name, table_name)))
+                    )
+                    csv_writers['tables'].writerow([
+                        self.__format_map(table_values[field_name]) if isinstance(table_values[field_name], dict) else
+                        table_values[field_name]
+                        for field_name in SchemaGenerator.system_schema_fields['tables']
+                    ])
+                    csv_writers['columns'].writerows(self.__get_column_rows(keyspace_name, table_name, template))
+        finally:
+            for out_file in out_files.values():
+                out_file.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Generate a synthetic CQL schema for benchmarking.')
+    arg_parser.add_argument('-o', '--output', help='File to write the schema to. Defaults to stdout.')
+    arg_parser.add_argument('-k', '--keyspaces', type=int, default=10, help='Number of application keyspaces.')
+    arg_parser.add_argument('-t', '--tables', type=int, default=1000, help='Number of application tables.')
+    arg_parser.add_argument('-d', '--duplicate-ratio', type=float, default=0.3,
+                            help='Fraction of tables that reuse the layout of an earlier table.')
+    arg_parser.add_argument('-c', '--collection-ratio', type=float, default=0.2,
+                            help='Fraction of regular columns that are collections.')
+    arg_parser.add_argument('-f', '--frozen-ratio', type=float, default=0.1,
+                            help='Fraction of collection columns that are frozen.')
+    arg_parser.add_argument('--no-reserved-keyspaces', dest='include_reserved_keyspaces', action='store_false',
+                            help='Do not generate the system, dse_* and OpsCenter keyspaces.')
+    arg_parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed.')
+    arg_parser.add_argument('--system-schema', dest='system_schema_dir',
+                            help='Write the schema as CSV exports of the system_schema keyspaces, tables and columns '
+                                 'tables to this directory instead of as CQL.')
+    gen_args = arg_parser.parse_args()
+
+    schema_generator = SchemaGenerator(
+        keyspaces=gen_args.keyspaces,
+        tables=gen_args.tables,
+        duplicate_ratio=gen_args.duplicate_ratio,
+        collection_ratio=gen_args.collection_ratio,
+        frozen_ratio=gen_args.frozen_ratio,
+        include_reserved_keyspaces=gen_args.include_reserved_keyspaces,
+        seed=gen_args.seed
+    )
+
+    if gen_args.system_schema_dir:
+        schema_generator.write_system_schema(gen_args.system_schema_dir)
+    elif gen_args.output:
+        with open(gen_args.output, 'w') as out_cql:
+            schema_generator.write(out_cql)
+    else:
+        schema_generator.write(sys.stdout)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
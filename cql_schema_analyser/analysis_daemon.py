@@ -0,0 +1,260 @@
+import asyncio
+import concurrent.futures
+import ipaddress
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import time
+
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.table_template_analyser as table_template_analyser
+
+
+class AnalysisDaemon:
+    def __init__(self, catalog_worker, schema_files, jobs=None, verbosity=diagnostics.DiagnosticsCollector.SUMMARY,
+                 allow_remote=False):
+        # Called in a worker process with a schema file, and returns the (template_definitions, stats, diagnostics)
+        # tuple returned by SchemaProcessor.catalog_schema_worker.
+        self.catalog_worker = catalog_worker
+        self.schema_files = list(schema_files)
+        self.jobs = jobs
+        self.verbosity = verbosity
+
+        # Only the files the daemon was started with can be re-loaded, so a client cannot have it read anything else.
+        # Each is also looked up by its real path so that a reload can name it however the client sees it.
+        self.served_files = {os.path.realpath(schema_file): schema_file for schema_file in self.schema_files}
+
+        # The daemon answers anyone who can connect to it and has no authentication, so it only listens on a loopback
+        # address unless told otherwise.
+        self.allow_remote = allow_remote
+
+        # Stores the catalog of each schema file on its own so that a single file can be re-loaded without re-parsing
+        # the others. The merged catalog is rebuilt from these whenever one of them changes.
+        #
+        #   '<schema_file>': {<TableTemplateAnalyser.template_definitions>}
+        #
+        self.source_catalogs = {}
+
+        # The merged catalog and an index of where each table was catalogued in it, in the following format:
+        #
+        #   '<keyspace.table>': [('<columns_hash>', '<properties_hash>', '<schema_file>'), ...]
+        #
+        # Both are replaced together once a load has finished, so queries never see a partially built catalog.
+        self.cql_table_template_analyser = table_template_analyser.TableTemplateAnalyser()
+        self.table_index = {}
+        self.loaded_at = None
+
+        self.executor = None
+        self.reload_lock = None
+        self.logger = logging.getLogger(__name__)
+
+    # Addresses of the form [<host>]:<port> are served over TCP, on 127.0.0.1 when no host is given. Anything else is
+    # taken to be the path of a Unix socket.
+    @staticmethod
+    def parse_address(address):
+        host, separator, port = address.rpartition(':')
+        if separator and port.isdigit() and '/' not in host:
+            return host.strip('[]') or '127.0.0.1', int(port)
+        return None
+
+    @staticmethod
+    def is_loopback_host(host):
+        if host == 'localhost':
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    @staticmethod
+    def get_table_index(template_definitions):
+        table_index = {}
+        for columns_hash, template_variants in template_definitions.items():
+            for props_hash in template_variants['variants']:
+                for occurrence in template_variants[props_hash]['occurrences']:
+                    table_index.setdefault(occurrence['name'], []).append(
+                        (columns_hash, props_hash, occurrence['source'])
+                    )
+        return table_index
+
+    def __rebuild_catalog(self):
+        merged_analyser = table_template_analyser.TableTemplateAnalyser()
+        for schema_file in self.schema_files:
+            merged_analyser.merge(self.source_catalogs[schema_file])
+
+        self.cql_table_template_analyser, self.table_index = (
+            merged_analyser,
+            self.get_table_index(merged_analyser.template_definitions)
+        )
+        self.loaded_at = time.time()
+
+    # Catalogs the schema files in the worker processes, then rebuilds the merged catalog. Only one load runs at a
+    # time; queries are answered from the previous catalog until the load has finished.
+    async def load(self, schema_files):
+        async with self.reload_lock:
+            loop = asyncio.get_running_loop()
+            diagnostics_collector = diagnostics.DiagnosticsCollector(verbosity=self.verbosity)
+
+            worker_results = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, self.catalog_worker, schema_file) for schema_file in schema_files
+            ])
+
+            for schema_file, (template_definitions, _, diagnostics_dict) in zip(schema_files, worker_results):
+                self.source_catalogs[schema_file] = template_definitions
+                diagnostics_collector.merge(diagnostics_dict)
+
+            self.__rebuild_catalog()
+            diagnostics_collector.log_summary()
+
+            self.logger.info('Loaded {} schema file(s); the catalog has {} templates and {} tables.'.format(
+                len(schema_files),
+                len(self.cql_table_template_analyser.template_definitions),
+                len(self.table_index)
+            ))
+
+    def query_duplicates(self, table):
+        table_entries = self.table_index.get(table)
+        if table_entries is None:
+            raise KeyError('table {} is not in the catalog'.format(table))
+
+        template_definitions = self.cql_table_template_analyser.template_definitions
+        duplicates = []
+        for columns_hash, props_hash, source in table_entries:
+            template_variants = template_definitions[columns_hash]
+            duplicates.append({
+                'hash': columns_hash,
+                'variant': props_hash,
+                'source': source,
+                'occurrences': [
+                    dict(occurrence, variant=variant_hash)
+                    for variant_hash in template_variants['variants']
+                    for occurrence in template_variants[variant_hash]['occurrences']
+                    if occurrence['name'] != table or occurrence['source'] != source
+                ],
+            })
+
+        return duplicates
+
+    def query_templates(self, min_occurrences=2):
+        return [
+            template_record
+            for template_record in self.cql_table_template_analyser.iter_template_records()
+            if template_record['occurrences'] >= min_occurrences
+        ]
+
+    def query_status(self):
+        return {
+            'schema_files': list(self.schema_files),
+            'templates': len(self.cql_table_template_analyser.template_definitions),
+            'tables': len(self.table_index),
+            'loaded_at': self.loaded_at,
+        }
+
+    def get_served_file(self, path):
+        try:
+            return self.served_files[os.path.realpath(path)]
+        except KeyError:
+            raise ValueError('schema file {} is not served by this daemon; only the files it was started with can be '
+                             'reloaded'.format(path)) from None
+
+    async def __handle_request(self, request):
+        op = request.get('op')
+        if op == 'duplicates':
+            if not request.get('table'):
+                raise ValueError('the duplicates op requires a table')
+            return self.query_duplicates(request['table'])
+        if op == 'templates':
+            return self.query_templates(int(request.get('min_occurrences', 2)))
+        if op == 'status':
+            return self.query_status()
+        if op == 'reload':
+            schema_files = [self.get_served_file(request['path'])] if request.get('path') else list(self.schema_files)
+            missing_files = [schema_file for schema_file in schema_files if not os.path.isfile(schema_file)]
+            if missing_files:
+                raise FileNotFoundError('schema file {} does not exist'.format(', '.join(missing_files)))
+            await self.load(schema_files)
+            return self.query_status()
+
+        raise ValueError('unknown op {!r}; expected one of duplicates, templates, reload or status'.format(op))
+
+    # Requests and responses are JSON objects, one per line. A client can send any number of requests over the same
+    # connection, and each one is answered in turn with either {"ok": true, "result": ...} or
+    # {"ok": false, "error": "..."}.
+    async def __handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if not request_line.strip():
+                    continue
+
+                try:
+                    request = json.loads(request_line)
+                    if not isinstance(request, dict):
+                        raise ValueError('request must be a JSON object')
+                    response = {'ok': True, 'result': await self.__handle_request(request)}
+                except KeyError as request_error:
+                    response = {'ok': False, 'error': request_error.args[0]}
+                except (ValueError, OSError) as request_error:
+                    response = {'ok': False, 'error': str(request_error)}
+                except Exception as request_error:
+                    self.logger.exception('Failed to handle request {}'.format(request_line.strip()))
+                    response = {'ok': False, 'error': repr(request_error)}
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def check_address(self, address):
+        tcp_address = self.parse_address(address)
+        if tcp_address and not self.allow_remote and not self.is_loopback_host(tcp_address[0]):
+            raise ValueError('refusing to serve on non-loopback host {}; the daemon has no authentication, so remote '
+                             'access must be allowed explicitly'.format(tcp_address[0]))
+
+    async def __start_server(self, address):
+        tcp_address = self.parse_address(address)
+        if tcp_address:
+            return await asyncio.start_server(self.__handle_client, *tcp_address)
+
+        # Only remove a left over socket, never a regular file that happens to have the same name.
+        try:
+            if stat.S_ISSOCK(os.stat(address).st_mode):
+                os.remove(address)
+        except FileNotFoundError:
+            pass
+
+        return await asyncio.start_unix_server(self.__handle_client, address)
+
+    # The address is checked before the schema files are catalogued, so that a refused address fails straight away.
+    async def serve(self, address):
+        self.check_address(address)
+        self.reload_lock = asyncio.Lock()
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for stop_signal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(stop_signal, stop_event.set)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as self.executor:
+            await self.load(self.schema_files)
+
+            server = await self.__start_server(address)
+            self.logger.info('Serving queries on {}'.format(', '.join(
+                str(server_socket.getsockname()) if server_socket.family != socket.AF_UNIX else address
+                for server_socket in server.sockets
+            )))
+
+            async with server:
+                await stop_event.wait()
+
+        if not self.parse_address(address) and os.path.exists(address):
+            os.remove(address)
+
+    def run(self, address):
+        asyncio.run(self.serve(address))
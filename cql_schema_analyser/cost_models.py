@@ -0,0 +1,90 @@
+import json
+import math
+
+
+class TableCostModel:
+    # Fixed costs of a single table on a single node, regardless of how much data it holds. The defaults are rough
+    # estimates for Cassandra 3.x and 4.x:
+    #   memtable_heap_bytes: The memtable slab region a table allocates on heap once it has been written to.
+    #   metadata_heap_bytes: The table metadata, column family store, compaction strategy and other per-table objects.
+    #   metrics_objects: The gauges, counters, meters and histograms registered for each table.
+    #   metrics_object_heap_bytes: The average heap held by one of those metrics objects.
+    #   offheap_bytes: Per-table off heap structures, such as the fixed part of the bloom filters and index summaries.
+    #   sstables: The number of SSTables a table is expected to have, each of which is flushed and compacted.
+    default_costs = {
+        'memtable_heap_bytes': 1 << 20,
+        'metadata_heap_bytes': 64 << 10,
+        'metrics_objects': 100,
+        'metrics_object_heap_bytes': 1 << 10,
+        'offheap_bytes': 16 << 10,
+        'sstables': 4,
+    }
+    # Costs that count whole objects rather than bytes.
+    count_costs = {'metrics_objects', 'sstables'}
+
+    def __init__(self, **costs):
+        unknown_costs = set(costs) - set(TableCostModel.default_costs)
+        if unknown_costs:
+            raise ValueError('Unknown table costs: {}'.format(', '.join(sorted(unknown_costs))))
+
+        table_costs = {
+            cost_name: TableCostModel.__get_cost(cost_name, cost_value)
+            for cost_name, cost_value in dict(TableCostModel.default_costs, **costs).items()
+        }
+        self.memtable_heap_bytes = table_costs['memtable_heap_bytes']
+        self.metadata_heap_bytes = table_costs['metadata_heap_bytes']
+        self.metrics_objects = table_costs['metrics_objects']
+        self.metrics_object_heap_bytes = table_costs['metrics_object_heap_bytes']
+        self.offheap_bytes = table_costs['offheap_bytes']
+        self.sstables = table_costs['sstables']
+
+    # Costs may be given as numbers or numeric strings, such as when they come from a JSON file or the command line.
+    # Whole values are kept as ints so the savings report the same way as with the defaults.
+    @staticmethod
+    def __get_cost(cost_name, cost_value):
+        try:
+            if isinstance(cost_value, bool):
+                raise TypeError
+            cost = float(cost_value)
+        except (TypeError, ValueError):
+            raise ValueError('Table cost "{}" must be a number; found {!r}.'.format(cost_name, cost_value)) from None
+
+        if not math.isfinite(cost) or cost < 0:
+            raise ValueError('Table cost "{}" must be a finite number of at least 0; found {!r}.'.format(
+                cost_name,
+                cost_value
+            ))
+
+        if cost.is_integer():
+            return int(cost)
+
+        if cost_name in TableCostModel.count_costs:
+            raise ValueError('Table cost "{}" must be a whole number; found {!r}.'.format(cost_name, cost_value))
+
+        return cost
+
+    # Reads a cost model from a JSON object of costs. Costs that are not given keep their default values.
+    @staticmethod
+    def from_json_file(cost_model_file):
+        with open(cost_model_file, 'r') as in_costs:
+            return TableCostModel(**json.load(in_costs))
+
+    @property
+    def heap_bytes(self):
+        return (
+            self.memtable_heap_bytes +
+            self.metadata_heap_bytes +
+            self.metrics_objects * self.metrics_object_heap_bytes
+        )
+
+    def as_dict(self):
+        return {cost_name: getattr(self, cost_name) for cost_name in TableCostModel.default_costs}
+
+    # Returns the costs saved by dropping the given number of tables, counting each node's copy of a table separately.
+    def get_savings(self, tables):
+        return {
+            'heap_bytes_saved': tables * self.heap_bytes,
+            'offheap_bytes_saved': tables * self.offheap_bytes,
+            'metrics_objects_saved': tables * self.metrics_objects,
+            'sstables_saved': tables * self.sstables,
+        }
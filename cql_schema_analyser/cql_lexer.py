@@ -0,0 +1,162 @@
+import collections
+import re
+
+
+Token = collections.namedtuple('Token', ['kind', 'value', 'start', 'end'])
+
+
+class CqlLexer:
+    STRING = 'STRING'
+    QUOTED_IDENTIFIER = 'QUOTED_IDENTIFIER'
+    NUMBER = 'NUMBER'
+    IDENTIFIER = 'IDENTIFIER'
+    SYMBOL = 'SYMBOL'
+    MISMATCH = 'MISMATCH'
+
+    symbols = frozenset('(),;.<>={}[]:+-*/?')
+
+    # Whitespace and comments are consumed ahead of every token so that only the token itself is captured. They are
+    # consumed possessively and the single character fallback never matches whitespace, so that whitespace or a comment
+    # at the end of the text is never given back to be matched as a token. The token alternatives are ordered so that
+    # literals are tried before the fallback.
+    token_pattern = re.compile(
+        r'''(?:\s+|--[^\n]*|//[^\n]*|/\*.*?\*/)*+'''
+        r'''('(?:[^']|'')*'|\$\$.*?\$\$|"(?:[^"]|"")*"|0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|[^\W\d]\w*|'''
+        r'''\S)''',
+        re.DOTALL
+    )
+
+    # Matches a complete statement up to and including its terminating ";". Literals and comments are consumed whole
+    # so that a ";" inside them does not end the statement. Possessive quantifiers keep unterminated literals from
+    # causing catastrophic backtracking.
+    statement_pattern = re.compile(
+        r'''(?:[^'"$;/\-]++|'(?:[^']|'')*+'|"(?:[^"]|"")*+"|\$\$.*?\$\$|--[^\n]*+|//[^\n]*+|/\*.*?\*/|[$/\-'"])*+;''',
+        re.DOTALL
+    )
+
+    # The same as statement_pattern except that a quote, "$$" or "/*" must be closed within the statement rather than
+    # being taken as a single character. Used when the rest of the literal or comment may not have been read yet.
+    closed_statement_pattern = re.compile(
+        r'''(?:[^'"$;/\-]++|'(?:[^']|'')*+'|"(?:[^"]|"")*+"|\$\$.*?\$\$|--[^\n]*+|//[^\n]*+|/\*.*?\*/|'''
+        r'''\$(?!\$)|/(?!\*)|-)*+;''',
+        re.DOTALL
+    )
+
+    leading_space_pattern = re.compile(r'\s*')
+
+    # Bytes forms of statement_pattern and leading_space_pattern, used to find statements in a memory-mapped UTF-8
+    # schema file without decoding it. The patterns only name ASCII characters, and every byte of a UTF-8 encoded
+    # non-ASCII character is outside of the ASCII range, so a statement is found at the same place in the bytes as in
+    # the text.
+    statement_bytes_pattern = re.compile(statement_pattern.pattern.encode('ascii'), re.DOTALL)
+    leading_space_bytes_pattern = re.compile(rb'\s*')
+
+    @staticmethod
+    def token_kind(value):
+        first_char = value[0]
+        if first_char == '\'' or first_char == '$':
+            return CqlLexer.STRING if len(value) > 1 else CqlLexer.MISMATCH
+        if first_char == '"':
+            return CqlLexer.QUOTED_IDENTIFIER if len(value) > 1 else CqlLexer.MISMATCH
+        if first_char.isdigit():
+            return CqlLexer.NUMBER
+        if first_char.isalpha() or first_char == '_':
+            return CqlLexer.IDENTIFIER
+        if first_char in CqlLexer.symbols:
+            return CqlLexer.SYMBOL
+
+        return CqlLexer.MISMATCH
+
+    # Strips the quotes from a string literal or quoted identifier and collapses any escaped quotes. Any other value
+    # is returned unchanged.
+    @staticmethod
+    def unquote(value):
+        if len(value) > 1:
+            first_char = value[0]
+            if first_char == '"':
+                return value[1:-1].replace('""', '"')
+            if first_char == '\'':
+                return value[1:-1].replace('\'\'', '\'')
+            if first_char == '$' and value.startswith('$$'):
+                return value[2:-2]
+
+        return value
+
+    # Yields every token in the buffer along with its kind and position. Comments and whitespace are skipped.
+    def tokenize(self, cql_buffer, start=0, end=None):
+        if end is None:
+            end = len(cql_buffer)
+
+        # Each token is matched where the previous one ended, rather than searched for, so that a trailing comment is
+        # not searched again from inside it.
+        token_kind = CqlLexer.token_kind
+        token_match = CqlLexer.token_pattern.match
+        match = token_match(cql_buffer, start, end)
+        while match:
+            value = match.group(1)
+            yield Token(token_kind(value), value, match.start(1), match.end(1))
+            match = token_match(cql_buffer, match.end(), end)
+
+    # Returns the token values between the two offsets. Literals keep their quotes so that their kind can still be
+    # determined with token_kind(). The text is searched for tokens, so it must not end in a comment, as a statement
+    # ending in ";" never does.
+    def token_values(self, cql_buffer, start, end):
+        return CqlLexer.token_pattern.findall(cql_buffer, start, end)
+
+    # Yields a (start, end) offset pair for every complete statement in the buffer. The start offset points at the
+    # first non-whitespace character of the statement and the end offset is just after its terminating ";". Trailing
+    # text that is never terminated is discarded.
+    def iter_statement_bounds(self, cql_buffer):
+        leading_space_match = CqlLexer.leading_space_pattern.match
+        for match in CqlLexer.statement_pattern.finditer(cql_buffer):
+            yield leading_space_match(cql_buffer, match.start()).end(), match.end()
+
+    # The same as iter_statement_bounds(), but for a memory-mapped schema file, or any other bytes-like object, holding
+    # UTF-8 encoded text. The offsets are byte offsets. Only the statements between the start and end offsets are found
+    # when they are given, which must fall between statements.
+    def iter_mapped_statement_bounds(self, schema_map, start=0, end=None):
+        if end is None:
+            end = len(schema_map)
+
+        leading_space_match = CqlLexer.leading_space_bytes_pattern.match
+        for match in CqlLexer.statement_bytes_pattern.finditer(schema_map, start, end):
+            yield leading_space_match(schema_map, match.start()).end(), match.end()
+
+    # Yields the token values of every complete statement in the buffer, including the terminating ";", along with the
+    # statement offsets.
+    def iter_statements(self, cql_buffer):
+        findall = CqlLexer.token_pattern.findall
+        for start, end in self.iter_statement_bounds(cql_buffer):
+            yield findall(cql_buffer, start, end), start, end
+
+    # Yields a (cql_buffer, start, end) triple for every complete statement read from a text stream, holding no more
+    # than one chunk plus one statement in memory. The buffer changes as chunks are read, so the offsets are only valid
+    # for the buffer they are yielded with.
+    #
+    # A statement is only taken from the buffer once every literal and comment in it has been closed. Otherwise a ";"
+    # inside a literal that continues in the next chunk would end the statement early. Whatever is left when the stream
+    # ends is scanned in the same way as iter_statement_bounds() so that malformed input gives the same result. The
+    # read size doubles while no statement is found so that an unterminated literal is not re-scanned for every chunk.
+    def iter_stream_statement_bounds(self, cql_stream, chunk_size=1 << 20):
+        leading_space_match = CqlLexer.leading_space_pattern.match
+        closed_statement_match = CqlLexer.closed_statement_pattern.match
+        cql_buffer = ''
+        read_size = chunk_size
+        while True:
+            cql_chunk = cql_stream.read(read_size)
+            if not cql_chunk:
+                break
+
+            cql_buffer += cql_chunk
+            statement_start = 0
+            match = closed_statement_match(cql_buffer)
+            while match:
+                statement_start = match.end()
+                yield cql_buffer, leading_space_match(cql_buffer, match.start()).end(), statement_start
+                match = closed_statement_match(cql_buffer, statement_start)
+
+            cql_buffer = cql_buffer[statement_start:]
+            read_size = chunk_size if statement_start else read_size * 2
+
+        for statement_start, statement_end in self.iter_statement_bounds(cql_buffer):
+            yield cql_buffer, statement_start, statement_end
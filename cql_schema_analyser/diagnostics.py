@@ -0,0 +1,79 @@
+import collections
+import logging
+
+
+# A kind of event that can be reported while processing a schema. The message is a format string that is only filled in
+# with the arguments of an event when it is logged.
+DiagnosticEvent = collections.namedtuple('DiagnosticEvent', ['code', 'level', 'message'])
+
+
+class DiagnosticsCollector:
+    # Verbosity levels.
+    #   QUIET: Only warnings and errors are summarised.
+    #   SUMMARY: All events are summarised at the end of the run.
+    #   VERBOSE: Every event is logged as it is recorded, and all events are summarised at the end of the run.
+    QUIET = 0
+    SUMMARY = 1
+    VERBOSE = 2
+
+    def __init__(self, verbosity=SUMMARY, max_samples=5):
+        self.verbosity = verbosity
+        self.max_samples = max_samples
+
+        # Recording an event only counts it and, for the first few occurrences, keeps its arguments. Nothing is
+        # formatted or written until the summary is logged, so events can be recorded from the parsing hot loop.
+        self.events = {}
+        self.counts = collections.defaultdict(int)
+        self.samples = collections.defaultdict(list)
+
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, event, *args):
+        self.counts[event.code] += 1
+        if self.counts[event.code] <= self.max_samples:
+            self.events[event.code] = event
+            self.samples[event.code].append(args)
+
+        if self.verbosity >= DiagnosticsCollector.VERBOSE:
+            self.logger.log(event.level, event.message.format(*args))
+
+    def get_count(self, code):
+        return self.counts.get(code, 0)
+
+    def merge(self, diagnostics_dict):
+        for code, event_dict in diagnostics_dict.items():
+            self.events[code] = DiagnosticEvent(code, event_dict['level'], event_dict['message'])
+            self.counts[code] += event_dict['count']
+            samples = self.samples[code]
+            samples.extend(tuple(sample) for sample in event_dict['samples'][:self.max_samples - len(samples)])
+
+    # Sample arguments are converted to strings so that the result can be pickled and written as JSON.
+    def as_dict(self):
+        return {
+            code: {
+                'level': self.events[code].level,
+                'message': self.events[code].message,
+                'count': self.counts[code],
+                'samples': [[str(arg) for arg in sample] for sample in self.samples[code]],
+            }
+            for code in sorted(self.events)
+        }
+
+    def log_summary(self):
+        min_level = logging.WARNING if self.verbosity == DiagnosticsCollector.QUIET else logging.NOTSET
+
+        for event in sorted(self.events.values(), key=lambda event: (-event.level, event.code)):
+            if event.level < min_level:
+                continue
+
+            count = self.counts[event.code]
+            samples = self.samples[event.code]
+            summary_lines = ['{} occurred {:,} time{}.{}'.format(
+                event.code,
+                count,
+                '' if count == 1 else 's',
+                ' First {} shown:'.format(len(samples)) if count > len(samples) else ''
+            )]
+            summary_lines.extend('    {}'.format(event.message.format(*sample)) for sample in samples)
+
+            self.logger.log(event.level, '\n'.join(summary_lines))
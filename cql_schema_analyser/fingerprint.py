@@ -0,0 +1,90 @@
+import hashlib
+
+import cql_schema_analyser.schema_definitions as schema_definitions
+
+
+class TemplateFingerprinter:
+    # Each kind of fingerprint is personalised so that a layout and a set of properties can never share a fingerprint.
+    layout_person = b'cql-layout'
+    properties_person = b'cql-properties'
+    names_person = b'cql-names'
+
+    def __init__(self, digest_size=16):
+        self.digest_size = digest_size
+
+        # Fingerprints already computed, keyed on the type ids of a layout or on the canonical form of a set of
+        # properties. Tables are largely built from a small number of layouts, so most lookups are hits.
+        self.layout_fingerprints = {}
+        self.properties_fingerprints = {}
+
+    def __get_digest(self, canonical_value, person):
+        return hashlib.blake2b(repr(canonical_value).encode(), digest_size=self.digest_size, person=person).hexdigest()
+
+    # Builds a hashable form of a property value in which the order of map entries does not matter. The input is not
+    # modified.
+    @staticmethod
+    def get_canonical_value(value):
+        if isinstance(value, dict):
+            return tuple(sorted(
+                (key, TemplateFingerprinter.get_canonical_value(item_value)) for key, item_value in value.items()
+            ))
+        if isinstance(value, (list, tuple)):
+            return tuple(TemplateFingerprinter.get_canonical_value(item_value) for item_value in value)
+        return value
+
+    # The fingerprint of a layout depends on its column types and keys but not on the order in which the columns were
+    # defined. Type ids are only used to look up fingerprints that have already been computed; the fingerprint itself is
+    # computed from the type names so that it is the same in every process.
+    def get_layout_fingerprint(self, column_ids, partition_key_ids, clustering_key_ids):
+        layout = (column_ids, partition_key_ids, clustering_key_ids)
+        try:
+            return self.layout_fingerprints[layout]
+        except KeyError:
+            pass
+
+        type_names = schema_definitions.type_registry.names
+        fingerprint = self.__get_digest(
+            (
+                tuple(sorted(type_names(column_ids))),
+                tuple(sorted(type_names(partition_key_ids))),
+                tuple(sorted(type_names(clustering_key_ids)))
+            ),
+            TemplateFingerprinter.layout_person
+        )
+        self.layout_fingerprints[layout] = fingerprint
+        return fingerprint
+
+    def get_properties_fingerprint(self, properties):
+        canonical_properties = self.get_canonical_value(properties)
+        try:
+            return self.properties_fingerprints[canonical_properties]
+        except KeyError:
+            pass
+
+        fingerprint = self.__get_digest(canonical_properties, TemplateFingerprinter.properties_person)
+        self.properties_fingerprints[canonical_properties] = fingerprint
+        return fingerprint
+
+    # The fingerprint of the names of a table's columns, along with their types, and of its key columns in key order.
+    # Unlike a layout fingerprint it tells apart tables with renamed columns or a different key, so it is only used to
+    # check that two tables are the same table, never to group tables into templates. The table must have been parsed
+    # with its column names kept.
+    def get_names_fingerprint(self, table_definition):
+        return self.__get_digest(
+            (
+                tuple(sorted(zip(table_definition.column_names, table_definition.columns))),
+                table_definition.partition_key_names,
+                table_definition.clustering_key_names
+            ),
+            TemplateFingerprinter.names_person
+        )
+
+    def get_table_fingerprints(self, table_definition):
+        return (
+            self.get_layout_fingerprint(
+                table_definition.column_ids,
+                table_definition.partition_key_ids,
+                table_definition.clustering_key_ids
+            ),
+            self.get_properties_fingerprint(table_definition.properties)
+        )
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+
+class ParseCache:
+    CACHE_VERSION = 7
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.entry_path = None
+
+        # Stores the state of the previous run against a schema file in the following format:
+        #
+        #   file_digest: '<digest of the schema file contents>',
+        #   statements: {'<statement_key>': <TableDefinition>, ...},
+        #   tables: {('<keyspace.table>', <ordinal>): ('<statement_digest>', '<columns_hash>', '<properties_hash>'),
+        #            ...},
+        #
+        # A table is keyed on its name and on how many tables of the same name came before it in the schema file, so
+        # that a table that is defined more than once is catalogued once for each definition.
+        #   template_definitions: {<TableTemplateAnalyser.template_definitions>}
+        #
+        self.file_digest = None
+        self.statements = {}
+        self.tables = {}
+        self.template_definitions = None
+
+        # Statements seen during the current run. Only these are written back so that the cache does not grow with
+        # statements that have since been removed from the schema.
+        self.current_statements = {}
+
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def get_digest(*parts):
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_file_digest(file_path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as in_file:
+            for file_block in iter(lambda: in_file.read(1 << 20), b''):
+                digest.update(file_block)
+        return digest.hexdigest()
+
+    # The cache entry for a schema file is keyed on its absolute path and on the options that change which tables are
+    # catalogued.
+    def load(self, schema_file, *options):
+        self.entry_path = os.path.join(
+            self.cache_dir,
+            '{}.pickle'.format(self.get_digest(os.path.abspath(schema_file), repr(options)))
+        )
+
+        try:
+            with open(self.entry_path, 'rb') as in_cache:
+                cache_entry = pickle.load(in_cache)
+        except FileNotFoundError:
+            return False
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            self.logger.warning('Unable to read cache entry "{}"; ignoring it. {}'.format(self.entry_path, e))
+            return False
+
+        if cache_entry.get('version') != ParseCache.CACHE_VERSION:
+            return False
+
+        self.file_digest = cache_entry['file_digest']
+        self.statements = cache_entry['statements']
+        self.tables = cache_entry['tables']
+        self.template_definitions = cache_entry['template_definitions']
+        return True
+
+    def save(self, file_digest, tables, template_definitions):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_entry = {
+            'version': ParseCache.CACHE_VERSION,
+            'file_digest': file_digest,
+            'statements': self.current_statements,
+            'tables': tables,
+            'template_definitions': template_definitions
+        }
+
+        # Write to a temporary file first so that an interrupted run never leaves a truncated entry behind.
+        out_fd, out_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(out_fd, 'wb') as out_cache:
+                pickle.dump(cache_entry, out_cache, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(out_path, self.entry_path)
+        except BaseException:
+            os.remove(out_path)
+            raise
+
+    # The statement cache interface used by SchemaParser.iter_schema. A statement is keyed on its text and the keyspace
+    # that was current when it was parsed, since an unqualified table name resolves against that keyspace.
+    def get_statement_key(self, current_keyspace, statement_raw):
+        return self.get_digest(current_keyspace, statement_raw)
+
+    def get_statement(self, statement_key):
+        dom_object = self.statements.get(statement_key)
+        if dom_object is not None:
+            self.current_statements[statement_key] = dom_object
+        return dom_object
+
+    def put_statement(self, statement_key, dom_object):
+        self.current_statements[statement_key] = dom_object
@@ -0,0 +1,42 @@
+import collections
+import contextlib
+import json
+import time
+
+
+class ProcessingStats:
+    def __init__(self):
+        # Seconds spent in each processing stage, and counts of the events seen while processing. Names are dotted,
+        # with the component that records them first, e.g. 'parser.tokenise' or 'catalog.variant_comparisons'.
+        self.timers = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[stage] += time.perf_counter() - start_time
+
+    def add_time(self, stage, seconds):
+        self.timers[stage] += seconds
+
+    def incr(self, counter, count=1):
+        self.counters[counter] += count
+
+    def merge(self, stats_dict):
+        for stage, seconds in stats_dict['timers'].items():
+            self.timers[stage] += seconds
+        for counter, count in stats_dict['counters'].items():
+            self.counters[counter] += count
+
+    def as_dict(self):
+        return {
+            'timers': dict(sorted(self.timers.items())),
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def write_json(self, out_file):
+        json.dump(self.as_dict(), out_file, indent=4)
+        out_file.write('\n')
@@ -0,0 +1,209 @@
+import array
+import collections
+import operator
+import sys
+
+import cql_schema_analyser.fingerprint as fingerprint
+
+
+class PropertyDriftAnalyser:
+    record_fields = [
+        'template', 'property', 'table', 'source', 'value', 'majority_value', 'majority_tables', 'template_tables'
+    ]
+
+    # Properties that change how a table is compacted, compressed, cached, expired or read. Map properties are split
+    # into one property per key, e.g. compaction.class, so that each setting of a map drifts on its own.
+    perf_properties = (
+        'bloom_filter_fp_chance', 'caching', 'compaction', 'compression', 'default_time_to_live', 'gc_grace_seconds',
+        'memtable_flush_period_in_ms', 'speculative_retry'
+    )
+
+    def __init__(self, properties=None):
+        self.properties = tuple(PropertyDriftAnalyser.perf_properties if properties is None else properties)
+        self.fingerprinter = fingerprint.TemplateFingerprinter()
+
+        # The property values of every table are held as a matrix of value ids, with one array per property and one
+        # row per table. Value id 0 means that a table does not set the property. Rows are added as tables are seen,
+        # and a property that is first seen part way through gets a column of zeros for the rows before it.
+        self.table_names = []
+        self.table_sources = []
+        self.table_templates = array.array('I')
+        self.template_hashes = []
+        self.template_ids = {}
+        self.property_names = []
+        self.property_ids = {}
+        self.property_columns = []
+        self.property_values = []
+        self.property_value_ids = []
+
+        # Whether each property name is one of the analysed properties, and the (property_id, value_id) pairs of each
+        # distinct set of properties, keyed on its canonical form. Most tables share a few sets of properties, so most
+        # tables are a single lookup.
+        self.selected_names = {}
+        self.encoded_properties = {}
+
+    def __is_selected(self, property_name):
+        try:
+            return self.selected_names[property_name]
+        except KeyError:
+            pass
+
+        selected = any(
+            property_name == name or property_name.startswith(name + '.') for name in self.properties
+        )
+        self.selected_names[property_name] = selected
+        return selected
+
+    def __get_property_id(self, property_name):
+        try:
+            return self.property_ids[property_name]
+        except KeyError:
+            pass
+
+        property_id = len(self.property_names)
+        self.property_names.append(property_name)
+        self.property_ids[property_name] = property_id
+        self.property_columns.append(array.array('I', [0]) * len(self.table_names))
+        self.property_values.append([None])
+        self.property_value_ids.append({})
+        return property_id
+
+    def __get_value_id(self, property_id, property_value):
+        value_ids = self.property_value_ids[property_id]
+        try:
+            return value_ids[property_value]
+        except KeyError:
+            pass
+
+        value_id = len(self.property_values[property_id])
+        self.property_values[property_id].append(property_value)
+        value_ids[property_value] = value_id
+        return value_id
+
+    def __encode_properties(self, properties):
+        canonical_properties = self.fingerprinter.get_canonical_value(properties)
+        try:
+            return self.encoded_properties[canonical_properties]
+        except KeyError:
+            pass
+
+        property_items = []
+        for property_name, property_value in properties.items():
+            if isinstance(property_value, dict):
+                property_items.extend(
+                    ('{}.{}'.format(property_name, map_key), map_value) for map_key, map_value in property_value.items()
+                )
+            else:
+                property_items.append((property_name, property_value))
+
+        encoded_properties = []
+        for property_name, property_value in property_items:
+            if self.__is_selected(property_name):
+                property_id = self.__get_property_id(property_name)
+                encoded_properties.append((property_id, self.__get_value_id(property_id, property_value)))
+
+        self.encoded_properties[canonical_properties] = encoded_properties
+        return encoded_properties
+
+    def add_table_definition(self, table_definition, source=None):
+        layout_hash = self.fingerprinter.get_layout_fingerprint(
+            table_definition.column_ids,
+            table_definition.partition_key_ids,
+            table_definition.clustering_key_ids
+        )
+        template_id = self.template_ids.get(layout_hash)
+        if template_id is None:
+            template_id = len(self.template_hashes)
+            self.template_hashes.append(layout_hash)
+            self.template_ids[layout_hash] = template_id
+
+        row_id = len(self.table_names)
+        self.table_names.append(table_definition.name)
+        self.table_sources.append(source)
+        self.table_templates.append(template_id)
+        for property_column in self.property_columns:
+            property_column.append(0)
+        for property_id, value_id in self.__encode_properties(table_definition.properties):
+            self.property_columns[property_id][row_id] = value_id
+
+    # Yields one record per table whose value of a property differs from the value held by most tables of the same
+    # template. The rows of each template are gathered once, and each property column is then sliced and counted for
+    # the whole template at a time. Properties without a value held by more than half of the tables of a template have
+    # no majority to drift from, and templates with a single table can not drift, so both are skipped.
+    def iter_drift_records(self):
+        template_rows = [[] for _ in self.template_hashes]
+        for row_id, template_id in enumerate(self.table_templates):
+            template_rows[template_id].append(row_id)
+
+        property_order = sorted(range(len(self.property_names)), key=self.property_names.__getitem__)
+        for template_id, row_ids in enumerate(template_rows):
+            if len(row_ids) < 2:
+                continue
+
+            get_rows = operator.itemgetter(*row_ids)
+            for property_id in property_order:
+                value_ids = get_rows(self.property_columns[property_id])
+                value_counts = collections.Counter(value_ids)
+                if len(value_counts) == 1:
+                    continue
+
+                majority_value_id, majority_tables = value_counts.most_common(1)[0]
+                if majority_tables * 2 <= len(row_ids):
+                    continue
+
+                property_values = self.property_values[property_id]
+                for row_id, value_id in zip(row_ids, value_ids):
+                    if value_id != majority_value_id:
+                        yield {
+                            'template': self.template_hashes[template_id],
+                            'property': self.property_names[property_id],
+                            'table': self.table_names[row_id],
+                            'source': self.table_sources[row_id],
+                            'value': property_values[value_id],
+                            'majority_value': property_values[majority_value_id],
+                            'majority_tables': majority_tables,
+                            'template_tables': len(row_ids),
+                        }
+
+    @staticmethod
+    def __format_value(property_value):
+        return '<unset>' if property_value is None else '\'{}\''.format(property_value)
+
+    def print_drift_report(self, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
+
+        drift_records = list(self.iter_drift_records())
+        out_file.write('Analysed {} properties of {} tables in {} templates. {} tables drift from the majority of '
+                       'their template.\n'.format(
+                           len(self.property_names),
+                           len(self.table_names),
+                           len(self.template_hashes),
+                           len({(record['table'], record['source']) for record in drift_records})
+                       ))
+
+        template_hash = None
+        property_name = None
+        for record in drift_records:
+            if template_hash != record['template']:
+                template_hash = record['template']
+                property_name = None
+                out_file.write('\n')
+                out_file.write('template: {} ({} tables)\n'.format(template_hash, record['template_tables']))
+
+            if property_name != record['property']:
+                property_name = record['property']
+                out_file.write('  {} - majority {} ({} tables)\n'.format(
+                    property_name,
+                    self.__format_value(record['majority_value']),
+                    record['majority_tables']
+                ))
+
+            if record['source']:
+                out_file.write('    {} [{}] - {}\n'.format(
+                    record['table'],
+                    record['source'],
+                    self.__format_value(record['value'])
+                ))
+            else:
+                out_file.write('    {} - {}\n'.format(record['table'], self.__format_value(record['value'])))
@@ -0,0 +1,48 @@
+import csv
+import json
+
+
+class JsonLinesReportWriter:
+    def __init__(self, out_file, field_names):
+        self.out_file = out_file
+        self.field_names = field_names
+
+    # Each record is encoded and written on its own, so only one record is ever held in memory.
+    def write_records(self, records):
+        for record in records:
+            self.out_file.write(json.dumps(record))
+            self.out_file.write('\n')
+
+
+class CsvReportWriter:
+    # Separates the items of a list value, such as the column types of a template, within a single CSV field. Column
+    # types can contain commas, e.g. map<text, int>, so a comma is not used.
+    list_separator = ';'
+
+    def __init__(self, out_file, field_names):
+        self.out_file = out_file
+        self.field_names = field_names
+
+    @staticmethod
+    def __get_field_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, (list, tuple)):
+            if all(isinstance(item, str) for item in value):
+                return CsvReportWriter.list_separator.join(value)
+            return json.dumps(value)
+        if isinstance(value, dict):
+            return json.dumps(value, sort_keys=True)
+        return value
+
+    def write_records(self, records):
+        csv_writer = csv.writer(self.out_file)
+        csv_writer.writerow(self.field_names)
+        for record in records:
+            csv_writer.writerow([self.__get_field_value(record[field_name]) for field_name in self.field_names])
+
+
+report_writers = {
+    'jsonl': JsonLinesReportWriter,
+    'csv': CsvReportWriter,
+}
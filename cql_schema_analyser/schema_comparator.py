@@ -0,0 +1,123 @@
+import sys
+
+
+class SchemaComparator:
+    MISSING_LABEL = '-'
+
+    # Kinds of disagreement, from the most to the least severe.
+    MISSING = 'missing'
+    COLUMNS = 'columns'
+    PROPERTIES = 'properties'
+
+    def __init__(self):
+        # Stores the fingerprints of the tables in each node's schema in the following format:
+        #
+        #   '<node_name>': {'<keyspace.table>': ('<columns_hash>', '<properties_hash>', '<names_hash>'), ...}
+        #
+        self.node_fingerprints = {}
+
+    # Fingerprints the tables in the same way as TableTemplateAnalyser, along with the names of their columns and key
+    # columns, so that a table has the same fingerprint on two nodes exactly when it would be catalogued under the same
+    # template and variant and no column has been renamed or moved in or out of the key. The tables must have been
+    # parsed with their column names kept.
+    @staticmethod
+    def get_table_fingerprints(table_definitions, fingerprinter):
+        return {
+            table_definition.name: fingerprinter.get_table_fingerprints(table_definition) + (
+                fingerprinter.get_names_fingerprint(table_definition),
+            )
+            for table_definition in table_definitions
+        }
+
+    def add_node(self, node_name, table_fingerprints):
+        self.node_fingerprints[node_name] = table_fingerprints
+
+    def get_record_fields(self):
+        return ['table', 'kind'] + list(self.node_fingerprints)
+
+    # Finds the tables that are not identical on every node. A table agrees when the same (table, fingerprint) pair is
+    # in every node's set, so the tables that disagree are those in the union of the sets but not in their
+    # intersection. Each node's tables are visited a fixed number of times, so the cost grows linearly with the number
+    # of nodes times the number of tables.
+    def get_disagreeing_tables(self):
+        node_sets = [set(table_fingerprints.items()) for table_fingerprints in self.node_fingerprints.values()]
+        if not node_sets:
+            return []
+
+        all_tables = set().union(*node_sets)
+        agreed_tables = set.intersection(*node_sets)
+        return sorted({table_name for table_name, _ in all_tables - agreed_tables})
+
+    # Yields one record per table that disagrees. Each node is given a label for the version of the table that it has:
+    # "A" for the version held by the most nodes, "B" for the next, and so on, or "-" when the node does not have the
+    # table at all.
+    def iter_disagreement_records(self):
+        for table_name in self.get_disagreeing_tables():
+            node_versions = {
+                node_name: table_fingerprints.get(table_name)
+                for node_name, table_fingerprints in self.node_fingerprints.items()
+            }
+
+            version_nodes = {}
+            for node_name, version in node_versions.items():
+                if version is not None:
+                    version_nodes.setdefault(version, []).append(node_name)
+
+            version_labels = {
+                version: chr(ord('A') + idx) if idx < 26 else str(idx)
+                for idx, version in enumerate(sorted(version_nodes, key=lambda version: -len(version_nodes[version])))
+            }
+
+            if None in node_versions.values():
+                kind = SchemaComparator.MISSING
+            elif len({(columns_hash, names_hash) for columns_hash, _, names_hash in version_nodes}) > 1:
+                kind = SchemaComparator.COLUMNS
+            else:
+                kind = SchemaComparator.PROPERTIES
+
+            disagreement_record = {'table': table_name, 'kind': kind}
+            for node_name, version in node_versions.items():
+                disagreement_record[node_name] = version_labels.get(version, SchemaComparator.MISSING_LABEL)
+
+            yield disagreement_record
+
+    @staticmethod
+    def __format_row(cells, widths):
+        return '  '.join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip() + '\n'
+
+    def print_disagreement_matrix(self, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
+
+        node_names = list(self.node_fingerprints)
+        disagreement_records = list(self.iter_disagreement_records())
+        table_count = len(set().union(*self.node_fingerprints.values())) if node_names else 0
+
+        out_file.write('Compared {} nodes and {} tables. {} tables disagree.\n'.format(
+            len(node_names),
+            table_count,
+            len(disagreement_records)
+        ))
+        if not disagreement_records:
+            return
+
+        record_fields = self.get_record_fields()
+        field_widths = [
+            max([len(field_name)] + [len(record[field_name]) for record in disagreement_records])
+            for field_name in record_fields
+        ]
+
+        out_file.write('\n')
+        out_file.write(self.__format_row(record_fields, field_widths))
+        node_disagreements = dict.fromkeys(node_names, 0)
+        for record in disagreement_records:
+            out_file.write(self.__format_row([record[field_name] for field_name in record_fields], field_widths))
+            for node_name in node_names:
+                if record[node_name] != 'A':
+                    node_disagreements[node_name] += 1
+
+        node_width = max(len('node'), max(len(node_name) for node_name in node_names))
+        out_file.write('\n')
+        out_file.write(self.__format_row(['node', 'tables differing from the majority'], [node_width, 0]))
+        for node_name in node_names:
+            out_file.write(self.__format_row([node_name, str(node_disagreements[node_name])], [node_width, 0]))
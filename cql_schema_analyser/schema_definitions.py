@@ -0,0 +1,284 @@
+import sys
+import threading
+
+
+class TypeRegistry:
+    def __init__(self):
+        self.type_ids = {}
+        self.type_names = []
+        self.intern_lock = threading.Lock()
+
+    # Lookups of known types take no lock. A new type is added under the lock so that sessions parsing on different
+    # threads never give two types the same identifier, and the name is appended before the identifier is published so
+    # a lookup that finds the identifier can always resolve it.
+    def intern(self, type_name):
+        try:
+            return self.type_ids[type_name]
+        except KeyError:
+            pass
+
+        with self.intern_lock:
+            try:
+                return self.type_ids[type_name]
+            except KeyError:
+                pass
+
+            type_name = sys.intern(type_name)
+            type_id = len(self.type_names)
+            self.type_names.append(type_name)
+            self.type_ids[type_name] = type_id
+            return type_id
+
+    def intern_all(self, type_names):
+        return tuple(self.intern(type_name) for type_name in type_names)
+
+    def name(self, type_id):
+        return self.type_names[type_id]
+
+    def names(self, type_ids):
+        type_names = self.type_names
+        return tuple(type_names[type_id] for type_id in type_ids)
+
+
+# Type identifiers are only meaningful within the process that interned them. Anything that leaves the process, such as
+# a pickled TableDefinition or a template catalog, carries type names instead.
+type_registry = TypeRegistry()
+
+
+class StatementRef:
+    # The statement of a schema object parsed from a memory-mapped schema file, held as the offsets of its text in the
+    # file rather than as a copy of it. The text is only decoded when it is asked for, e.g. when a report prints it, and
+    # the file stays mapped for as long as any of its statements is referenced. A pickled reference is unpickled as the
+    # text itself, as the file is not mapped in the process it is unpickled in.
+    __slots__ = ('schema_map', 'start', 'end')
+
+    def __init__(self, schema_map, start, end):
+        self.schema_map = schema_map
+        self.start = start
+        self.end = end
+
+    # Newlines are translated in the same way as when the schema file is read in text mode, so that a statement has
+    # the same text whether it was read or mapped.
+    @staticmethod
+    def decode(statement_bytes):
+        if b'\r' in statement_bytes:
+            statement_bytes = statement_bytes.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        return statement_bytes.decode('utf-8')
+
+    def __str__(self):
+        return StatementRef.decode(self.schema_map[self.start:self.end])
+
+    def __reduce__(self):
+        return str, (str(self),)
+
+    def __eq__(self, other):
+        if not isinstance(other, (StatementRef, str)):
+            return NotImplemented
+
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return 'StatementRef({}, {})'.format(self.start, self.end)
+
+
+class TableDefinition:
+    __slots__ = (
+        'keyspace', 'table', 'column_ids', 'partition_key_ids', 'clustering_key_ids', 'properties', 'statement_ref',
+        'column_names', 'partition_key_names', 'clustering_key_names'
+    )
+
+    # The statement can be given as its text or as a StatementRef to it, and is read back as text from statement.
+    #
+    # The names of the columns, in the same order as column_ids, and of the key columns are only kept when they are
+    # asked for, e.g. to compare the schemas of nodes, and are None otherwise. Templates never depend on them.
+    def __init__(self, keyspace, table, column_ids=(), partition_key_ids=(), clustering_key_ids=(), properties=None,
+                 statement='', column_names=None, partition_key_names=None, clustering_key_names=None):
+        self.keyspace = sys.intern(keyspace)
+        self.table = table
+        self.column_ids = tuple(column_ids)
+        self.partition_key_ids = tuple(partition_key_ids)
+        self.clustering_key_ids = tuple(clustering_key_ids)
+        self.properties = properties if properties is not None else {}
+        self.statement_ref = statement
+        self.column_names = column_names
+        self.partition_key_names = partition_key_names
+        self.clustering_key_names = clustering_key_names
+
+    @staticmethod
+    def from_type_names(keyspace, table, columns=(), partition_key=(), clustering_key=(), properties=None,
+                        statement='', column_names=None, partition_key_names=None, clustering_key_names=None):
+        return TableDefinition(
+            keyspace,
+            table,
+            column_ids=type_registry.intern_all(columns),
+            partition_key_ids=type_registry.intern_all(partition_key),
+            clustering_key_ids=type_registry.intern_all(clustering_key),
+            properties=properties,
+            statement=statement,
+            column_names=column_names,
+            partition_key_names=partition_key_names,
+            clustering_key_names=clustering_key_names
+        )
+
+    def __reduce__(self):
+        return TableDefinition.from_type_names, (
+            self.keyspace,
+            self.table,
+            self.columns,
+            self.partition_key,
+            self.clustering_key,
+            self.properties,
+            self.statement,
+            self.column_names,
+            self.partition_key_names,
+            self.clustering_key_names
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, TableDefinition):
+            return NotImplemented
+
+        return all(getattr(self, slot) == getattr(other, slot) for slot in TableDefinition.__slots__)
+
+    def __repr__(self):
+        return 'TableDefinition({})'.format(self.name)
+
+    @property
+    def name(self):
+        return '{}.{}'.format(self.keyspace, self.table)
+
+    @property
+    def columns(self):
+        return type_registry.names(self.column_ids)
+
+    @property
+    def partition_key(self):
+        return type_registry.names(self.partition_key_ids)
+
+    @property
+    def clustering_key(self):
+        return type_registry.names(self.clustering_key_ids)
+
+    @property
+    def statement(self):
+        return str(self.statement_ref)
+
+    # Returns the table in the nested dict form produced by earlier versions of the parser.
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'attributes': {
+                'columns': list(self.columns),
+                'key': {
+                    'partition': list(self.partition_key),
+                    'clustering': list(self.clustering_key)
+                },
+                'properties': self.properties,
+            },
+            'statement': self.statement
+        }
+
+
+class TypeDefinition:
+    __slots__ = ('keyspace', 'type_name', 'field_types', 'statement_ref')
+
+    def __init__(self, keyspace, type_name, field_types=(), statement=''):
+        self.keyspace = sys.intern(keyspace)
+        self.type_name = type_name
+        self.field_types = tuple(field_types)
+        self.statement_ref = statement
+
+    def __eq__(self, other):
+        if not isinstance(other, TypeDefinition):
+            return NotImplemented
+
+        return all(getattr(self, slot) == getattr(other, slot) for slot in TypeDefinition.__slots__)
+
+    def __repr__(self):
+        return 'TypeDefinition({})'.format(self.name)
+
+    @property
+    def name(self):
+        return '{}.{}'.format(self.keyspace, self.type_name)
+
+    @property
+    def statement(self):
+        return str(self.statement_ref)
+
+
+class ViewDefinition:
+    __slots__ = ('keyspace', 'view', 'base_keyspace', 'base_table', 'statement_ref')
+
+    def __init__(self, keyspace, view, base_keyspace, base_table, statement=''):
+        self.keyspace = sys.intern(keyspace)
+        self.view = view
+        self.base_keyspace = sys.intern(base_keyspace)
+        self.base_table = base_table
+        self.statement_ref = statement
+
+    def __eq__(self, other):
+        if not isinstance(other, ViewDefinition):
+            return NotImplemented
+
+        return all(getattr(self, slot) == getattr(other, slot) for slot in ViewDefinition.__slots__)
+
+    def __repr__(self):
+        return 'ViewDefinition({})'.format(self.name)
+
+    @property
+    def name(self):
+        return '{}.{}'.format(self.keyspace, self.view)
+
+    @property
+    def base_name(self):
+        return '{}.{}'.format(self.base_keyspace, self.base_table)
+
+    @property
+    def statement(self):
+        return str(self.statement_ref)
+
+
+class IndexDefinition:
+    # Kinds of index. A secondary index is the built-in index kept in a hidden table. SAI and SASI indexes are attached
+    # to the SSTables of their base table, and a search index is a DSE Search (Solr) core.
+    SECONDARY = 'secondary'
+    SAI = 'sai'
+    SASI = 'sasi'
+    SEARCH = 'search'
+    CUSTOM = 'custom'
+
+    __slots__ = ('keyspace', 'index', 'base_table', 'target', 'kind', 'statement_ref')
+
+    # Indexes are created in the keyspace of their base table. Unnamed indexes, such as search indexes, have an index
+    # name of None.
+    def __init__(self, keyspace, index, base_table, target=None, kind=SECONDARY, statement=''):
+        self.keyspace = sys.intern(keyspace)
+        self.index = index
+        self.base_table = base_table
+        self.target = target
+        self.kind = kind
+        self.statement_ref = statement
+
+    def __eq__(self, other):
+        if not isinstance(other, IndexDefinition):
+            return NotImplemented
+
+        return all(getattr(self, slot) == getattr(other, slot) for slot in IndexDefinition.__slots__)
+
+    def __repr__(self):
+        return 'IndexDefinition({})'.format(self.name)
+
+    @property
+    def name(self):
+        return '{}.{}'.format(self.keyspace, self.index if self.index else '{}_{}'.format(self.base_table, self.kind))
+
+    @property
+    def base_name(self):
+        return '{}.{}'.format(self.keyspace, self.base_table)
+
+    @property
+    def statement(self):
+        return str(self.statement_ref)
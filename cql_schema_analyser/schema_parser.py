@@ -1,6 +1,13 @@
-import copy
+import collections
+import contextlib
 import logging
-import re
+import os
+import time
+
+import cql_schema_analyser.cql_lexer as cql_lexer
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.schema_definitions as schema_definitions
+import cql_schema_analyser.schema_sources as schema_sources
 
 
 class SchemaParser:
@@ -16,6 +23,140 @@ class SchemaParser:
                     'keyspace and ignored.'
     }
 
+    # Events recorded in the diagnostics collector while parsing. Each is counted rather than logged as it happens.
+    KEYSPACE_DEFINED = diagnostics.DiagnosticEvent(
+        'parser.keyspace_defined',
+        logging.INFO,
+        'Keyspace "{}" defined in CREATE statement. {}'
+    )
+    KEYSPACE_SELECTED = diagnostics.DiagnosticEvent(
+        'parser.keyspace_selected',
+        logging.INFO,
+        'Keyspace "{}" selected in USE statement. {}'
+    )
+    UNDEFINED_USE_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.undefined_use_keyspace',
+        logging.WARNING,
+        'Keyspace "{}" is undefined. Ignoring USE statement.'
+    )
+    TABLE_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.table_in_ignored_keyspace',
+        logging.INFO,
+        'Table "{}.{}" defined in CREATE statement. Table is in an ignored keyspace and will be ignored.'
+    )
+    TABLE_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.table_in_unselected_keyspace',
+        logging.INFO,
+        'Table "{}.{}" defined in CREATE statement. Table is in an unselected keyspace and will be ignored.'
+    )
+    TABLE_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.table_in_undefined_keyspace',
+        logging.WARNING,
+        'Table "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'
+    )
+    TYPE_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.type_in_ignored_keyspace',
+        logging.INFO,
+        'Type "{}.{}" defined in CREATE statement. It is in an ignored keyspace and will be ignored.'
+    )
+    TYPE_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.type_in_unselected_keyspace',
+        logging.INFO,
+        'Type "{}.{}" defined in CREATE statement. It is in an unselected keyspace and will be ignored.'
+    )
+    TYPE_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.type_in_undefined_keyspace',
+        logging.WARNING,
+        'Type "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'
+    )
+    VIEW_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.view_in_ignored_keyspace',
+        logging.INFO,
+        'Materialized view "{}.{}" defined in CREATE statement. It is in an ignored keyspace and will be ignored.'
+    )
+    VIEW_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.view_in_unselected_keyspace',
+        logging.INFO,
+        'Materialized view "{}.{}" defined in CREATE statement. It is in an unselected keyspace and will be ignored.'
+    )
+    VIEW_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.view_in_undefined_keyspace',
+        logging.WARNING,
+        'Materialized view "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'
+    )
+    INDEX_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.index_in_ignored_keyspace',
+        logging.INFO,
+        'Index "{}.{}" defined in CREATE statement. It is in an ignored keyspace and will be ignored.'
+    )
+    INDEX_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.index_in_unselected_keyspace',
+        logging.INFO,
+        'Index "{}.{}" defined in CREATE statement. It is in an unselected keyspace and will be ignored.'
+    )
+    INDEX_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.index_in_undefined_keyspace',
+        logging.WARNING,
+        'Index "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'
+    )
+    SEARCH_INDEX_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.search_index_in_ignored_keyspace',
+        logging.INFO,
+        'Search index on table "{}.{}" defined in CREATE statement. It is in an ignored keyspace and will be ignored.'
+    )
+    SEARCH_INDEX_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.search_index_in_unselected_keyspace',
+        logging.INFO,
+        'Search index on table "{}.{}" defined in CREATE statement. It is in an unselected keyspace and will be '
+        'ignored.'
+    )
+    SEARCH_INDEX_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'parser.search_index_in_undefined_keyspace',
+        logging.WARNING,
+        'Search index on table "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'
+    )
+    INCOMPLETE_CREATE_STATEMENT = diagnostics.DiagnosticEvent(
+        'parser.incomplete_create_statement',
+        logging.ERROR,
+        'Incomplete "CREATE" statement found. Ignoring.'
+    )
+    UNSUPPORTED_CREATE_STATEMENT = diagnostics.DiagnosticEvent(
+        'parser.unsupported_create_statement',
+        logging.ERROR,
+        'Unsupported CREATE statement "{}" found. Ignoring.'
+    )
+    UNSUPPORTED_OPERATION = diagnostics.DiagnosticEvent(
+        'parser.unsupported_operation',
+        logging.ERROR,
+        'Unsupported CQL operation "{}" found. Skipping.'
+    )
+    MALFORMED_STATEMENT = diagnostics.DiagnosticEvent(
+        'parser.malformed_statement',
+        logging.ERROR,
+        '{}'
+    )
+
+    # Kinds of schema object that are skipped when they are in an ignored, unselected or undefined keyspace. Each kind
+    # has its own stats counters, parser.<kind>_skipped.<reason>, and its own events.
+    OBJ_TABLE = 'tables'
+    OBJ_TYPE = 'types'
+    OBJ_VIEW = 'views'
+    OBJ_INDEX = 'indexes'
+    OBJ_SEARCH_INDEX = 'search_indexes'
+
+    # The events recorded for each kind of object skipped in an ignored, unselected and undefined keyspace.
+    skipped_object_events = {
+        OBJ_TABLE: (TABLE_IN_IGNORED_KEYSPACE, TABLE_IN_UNSELECTED_KEYSPACE, TABLE_IN_UNDEFINED_KEYSPACE),
+        OBJ_TYPE: (TYPE_IN_IGNORED_KEYSPACE, TYPE_IN_UNSELECTED_KEYSPACE, TYPE_IN_UNDEFINED_KEYSPACE),
+        OBJ_VIEW: (VIEW_IN_IGNORED_KEYSPACE, VIEW_IN_UNSELECTED_KEYSPACE, VIEW_IN_UNDEFINED_KEYSPACE),
+        OBJ_INDEX: (INDEX_IN_IGNORED_KEYSPACE, INDEX_IN_UNSELECTED_KEYSPACE, INDEX_IN_UNDEFINED_KEYSPACE),
+        OBJ_SEARCH_INDEX: (
+            SEARCH_INDEX_IN_IGNORED_KEYSPACE,
+            SEARCH_INDEX_IN_UNSELECTED_KEYSPACE,
+            SEARCH_INDEX_IN_UNDEFINED_KEYSPACE
+        ),
+    }
+
     reserved_keyspaces = {
         'dse_insights',
         'dse_insights_local',
@@ -32,59 +173,365 @@ class SchemaParser:
         'system_traces'
     }
 
-    column_grammar_to_state_mapping = {
-        'ascii': 'COLUMN_TYPE_DEF',
-        'bigint': 'COLUMN_TYPE_DEF',
-        'blob': 'COLUMN_TYPE_DEF',
-        'boolean': 'COLUMN_TYPE_DEF',
-        'counter': 'COLUMN_TYPE_DEF',
-        'date': 'COLUMN_TYPE_DEF',
-        'decimal': 'COLUMN_TYPE_DEF',
-        'double': 'COLUMN_TYPE_DEF',
-        'duration': 'COLUMN_TYPE_DEF',
-        'float': 'COLUMN_TYPE_DEF',
-        'inet': 'COLUMN_TYPE_DEF',
-        'int': 'COLUMN_TYPE_DEF',
-        'smallint': 'COLUMN_TYPE_DEF',
-        'text': 'COLUMN_TYPE_DEF',
-        'time': 'COLUMN_TYPE_DEF',
-        'timestamp': 'COLUMN_TYPE_DEF',
-        'timeuuid': 'COLUMN_TYPE_DEF',
-        'tinyint': 'COLUMN_TYPE_DEF',
-        'uuid': 'COLUMN_TYPE_DEF',
-        'varchar': 'COLUMN_TYPE_DEF',
-        'varint': 'COLUMN_TYPE_DEF',
-        'list': 'COLUMN_TYPE_DEF',
-        'frozen': 'COLUMN_TYPE_DEF',
-        'map': 'COLUMN_TYPE_DEF',
-        'set': 'COLUMN_TYPE_DEF',
-        'tuple': 'COLUMN_TYPE_DEF',
-        'PRIMARY': 'PRIMARY_CLAUSE',
-        'KEY': 'KEY_CLAUSE',
-        '(': 'START_SCOPE_TABLE_DEF',
-        ')': 'END_SCOPE_TABLE_DEF',
-        '<': 'START_SCOPE_COLUMN_TYPE_DEF',
-        '>': 'END_SCOPE_COLUMN_TYPE_DEF',
-        ',': 'TERM_SEPARATOR',
-        ';': 'END_STATEMENT'
+    # Table properties that can be given in a WITH clause but that are not kept in system_schema.tables, or that
+    # identify a table rather than describe it. They are left out of the table properties, as they are by the
+    # system_schema loader.
+    non_property_names = frozenset(['id', 'extensions'])
+
+    # Terms that end a table property value.
+    property_delimiters = frozenset(['AND', ';', ',', ':', '}'])
+
+    native_types = frozenset([
+        'ascii', 'bigint', 'blob', 'boolean', 'counter', 'date', 'decimal', 'double', 'duration', 'float', 'inet',
+        'int', 'smallint', 'text', 'time', 'timestamp', 'timeuuid', 'tinyint', 'uuid', 'varchar', 'varint', 'list',
+        'frozen', 'map', 'set', 'tuple', 'vector'
+    ])
+
+    # Classes of the terms in the column definitions of a CREATE TABLE statement. Every term that is not listed in
+    # column_token_classes is a name; column names, key column names and type names are told apart by the state that
+    # the term is found in. Keywords are listed in lower and upper case so that terms do not have to be lower cased.
+    TK_NAME = 0
+    TK_PRIMARY = 1
+    TK_KEY = 2
+    TK_STATIC = 3
+    TK_OPEN_BRACKET = 4
+    TK_CLOSE_BRACKET = 5
+    TK_OPEN_ANGLE = 6
+    TK_CLOSE_ANGLE = 7
+    TK_COMMA = 8
+    TK_DOT = 9
+    TK_OTHER = 10
+    TOKEN_CLASS_COUNT = 11
+
+    column_token_classes = {
+        **dict.fromkeys(cql_lexer.CqlLexer.symbols, TK_OTHER),
+        'primary': TK_PRIMARY,
+        'PRIMARY': TK_PRIMARY,
+        'key': TK_KEY,
+        'KEY': TK_KEY,
+        'static': TK_STATIC,
+        'STATIC': TK_STATIC,
+        '(': TK_OPEN_BRACKET,
+        ')': TK_CLOSE_BRACKET,
+        '<': TK_OPEN_ANGLE,
+        '>': TK_CLOSE_ANGLE,
+        ',': TK_COMMA,
+        '.': TK_DOT,
     }
 
+    # States of the column definition parser. ST_TYPE_* states are within a column type at the top level, and
+    # ST_TYPE_ARG_* states are within the angle brackets of a collection, tuple or frozen type.
+    ST_COLUMN_NAME = 0
+    ST_COLUMN_TYPE = 1
+    ST_TYPE_END = 2
+    ST_TYPE_QUALIFIED = 3
+    ST_TYPE_ARG = 4
+    ST_TYPE_ARG_END = 5
+    ST_TYPE_ARG_QUALIFIED = 6
+    ST_STATIC = 7
+    ST_INLINE_PRIMARY = 8
+    ST_INLINE_KEY = 9
+    ST_PRIMARY = 10
+    ST_KEY = 11
+    ST_PRIMARY_KEY = 12
+    ST_PARTITION_NAME = 13
+    ST_PARTITION_NAME_END = 14
+    ST_PARTITION_END = 15
+    ST_CLUSTERING_NAME = 16
+    ST_CLUSTERING_END = 17
+    ST_KEY_END = 18
+    ST_DONE = 19
+    ST_ERROR = -1
+
+    # Actions taken on a transition. Each indexes the session's column_actions dispatch list.
+    AC_NONE = 0
+    AC_COLUMN_NAME = 1
+    AC_TYPE_START = 2
+    AC_TYPE_APPEND = 3
+    AC_TYPE_OPEN = 4
+    AC_TYPE_CLOSE = 5
+    AC_COLUMN_END = 6
+    AC_TABLE_END = 7
+    AC_INLINE_KEY = 8
+    AC_PRIMARY_KEY = 9
+    AC_PARTITION_KEY = 10
+    AC_CLUSTERING_KEY = 11
+    AC_UNEXPECTED = 12
+
+    # The transitions of the column definition parser as (state, token classes): (next state, action). Any other term
+    # is unexpected, and raises a ValueError. A key column, static column or type can be called "key" or "static", so
+    # those are names too wherever a name is expected.
+    column_transition_rules = {
+        (ST_COLUMN_NAME, (TK_NAME, TK_KEY, TK_STATIC)): (ST_COLUMN_TYPE, AC_COLUMN_NAME),
+        (ST_COLUMN_NAME, (TK_PRIMARY,)): (ST_PRIMARY, AC_NONE),
+        (ST_COLUMN_TYPE, (TK_NAME, TK_KEY, TK_STATIC)): (ST_TYPE_END, AC_TYPE_START),
+        (ST_TYPE_END, (TK_OPEN_ANGLE,)): (ST_TYPE_ARG, AC_TYPE_OPEN),
+        (ST_TYPE_END, (TK_DOT,)): (ST_TYPE_QUALIFIED, AC_TYPE_APPEND),
+        (ST_TYPE_END, (TK_COMMA,)): (ST_COLUMN_NAME, AC_COLUMN_END),
+        (ST_TYPE_END, (TK_CLOSE_BRACKET,)): (ST_DONE, AC_TABLE_END),
+        (ST_TYPE_END, (TK_STATIC,)): (ST_STATIC, AC_NONE),
+        (ST_TYPE_END, (TK_PRIMARY,)): (ST_INLINE_PRIMARY, AC_NONE),
+        (ST_TYPE_QUALIFIED, (TK_NAME, TK_KEY, TK_STATIC)): (ST_TYPE_END, AC_TYPE_APPEND),
+        (ST_TYPE_ARG, (TK_NAME, TK_KEY, TK_STATIC)): (ST_TYPE_ARG_END, AC_TYPE_APPEND),
+        (ST_TYPE_ARG_END, (TK_OPEN_ANGLE,)): (ST_TYPE_ARG, AC_TYPE_OPEN),
+        (ST_TYPE_ARG_END, (TK_DOT,)): (ST_TYPE_ARG_QUALIFIED, AC_TYPE_APPEND),
+        (ST_TYPE_ARG_END, (TK_COMMA,)): (ST_TYPE_ARG, AC_TYPE_APPEND),
+        (ST_TYPE_ARG_END, (TK_CLOSE_ANGLE,)): (ST_TYPE_ARG_END, AC_TYPE_CLOSE),
+        (ST_TYPE_ARG_QUALIFIED, (TK_NAME, TK_KEY, TK_STATIC)): (ST_TYPE_ARG_END, AC_TYPE_APPEND),
+        (ST_STATIC, (TK_COMMA,)): (ST_COLUMN_NAME, AC_COLUMN_END),
+        (ST_STATIC, (TK_CLOSE_BRACKET,)): (ST_DONE, AC_TABLE_END),
+        (ST_INLINE_PRIMARY, (TK_KEY,)): (ST_INLINE_KEY, AC_INLINE_KEY),
+        (ST_INLINE_KEY, (TK_COMMA,)): (ST_COLUMN_NAME, AC_COLUMN_END),
+        (ST_INLINE_KEY, (TK_CLOSE_BRACKET,)): (ST_DONE, AC_TABLE_END),
+        (ST_PRIMARY, (TK_KEY,)): (ST_KEY, AC_NONE),
+        (ST_KEY, (TK_OPEN_BRACKET,)): (ST_PRIMARY_KEY, AC_PRIMARY_KEY),
+        (ST_PRIMARY_KEY, (TK_OPEN_BRACKET,)): (ST_PARTITION_NAME, AC_NONE),
+        (ST_PRIMARY_KEY, (TK_NAME, TK_KEY, TK_STATIC)): (ST_PARTITION_END, AC_PARTITION_KEY),
+        (ST_PARTITION_NAME, (TK_NAME, TK_KEY, TK_STATIC)): (ST_PARTITION_NAME_END, AC_PARTITION_KEY),
+        (ST_PARTITION_NAME_END, (TK_COMMA,)): (ST_PARTITION_NAME, AC_NONE),
+        (ST_PARTITION_NAME_END, (TK_CLOSE_BRACKET,)): (ST_PARTITION_END, AC_NONE),
+        (ST_PARTITION_END, (TK_COMMA,)): (ST_CLUSTERING_NAME, AC_NONE),
+        (ST_PARTITION_END, (TK_CLOSE_BRACKET,)): (ST_KEY_END, AC_NONE),
+        (ST_CLUSTERING_NAME, (TK_NAME, TK_KEY, TK_STATIC)): (ST_CLUSTERING_END, AC_CLUSTERING_KEY),
+        (ST_CLUSTERING_END, (TK_COMMA,)): (ST_CLUSTERING_NAME, AC_NONE),
+        (ST_CLUSTERING_END, (TK_CLOSE_BRACKET,)): (ST_KEY_END, AC_NONE),
+        (ST_KEY_END, (TK_COMMA,)): (ST_COLUMN_NAME, AC_NONE),
+        (ST_KEY_END, (TK_CLOSE_BRACKET,)): (ST_DONE, AC_NONE),
+    }
+
+    # Flattens the transition rules into a list indexed by state * TOKEN_CLASS_COUNT + token class, so that each term
+    # takes a single list lookup.
+    @staticmethod
+    def build_column_transitions(transition_rules, state_count, token_class_count):
+        column_transitions = [(SchemaParser.ST_ERROR, SchemaParser.AC_UNEXPECTED)] * (state_count * token_class_count)
+        for (state, token_classes), transition in transition_rules.items():
+            for token_class in token_classes:
+                column_transitions[state * token_class_count + token_class] = transition
+        return column_transitions
+
+    # Builds the sets of keyspaces to ignore and select from the options given to a parse; None when no keyspaces are
+    # ignored or selected. The reserved keyspaces are only filtered along with the keyspaces that are: they are ignored
+    # along with the ignored keyspaces unless parse_reserved_keyspaces is set, and selected along with the selected
+    # keyspaces only when it is set. The system_schema export loader filters keyspaces in the same way.
+    @staticmethod
+    def get_keyspace_filters(ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False):
+        ignore_keyspaces = None
+        select_keyspaces = None
+        if ignore_keyspace:
+            ignore_keyspaces = set(ignore_keyspace)
+            if not parse_reserved_keyspaces:
+                ignore_keyspaces = ignore_keyspaces.union(SchemaParser.reserved_keyspaces)
+        if select_keyspace:
+            select_keyspaces = set(select_keyspace)
+            if parse_reserved_keyspaces:
+                select_keyspaces = select_keyspaces.union(SchemaParser.reserved_keyspaces)
+
+        return ignore_keyspaces, select_keyspaces
+
+    # Returns whether the tables of a keyspace are parsed, given the filters built by get_keyspace_filters(). Selecting
+    # keyspaces takes precedence over ignoring them.
+    @staticmethod
+    def get_keyspace_status(keyspace, ignore_keyspaces, select_keyspaces):
+        if select_keyspaces:
+            if keyspace not in select_keyspaces:
+                return SchemaParser.KS_UNSELECTED
+        elif ignore_keyspaces:
+            if keyspace in ignore_keyspaces:
+                return SchemaParser.KS_IGNORED
+
+        return SchemaParser.KS_OK
+
+    # The number of distinct WITH clauses whose properties a session keeps. Most schemas only have a few, but a comment
+    # or id in every clause makes each one distinct, so the least recently used are dropped beyond this.
+    table_properties_cache_size = 1024
+
+    # A parser holds only what stays the same while schemas are parsed: the lexer and the column transition table. The
+    # state of each parse lives in the ParseSession created for it, so a parser can be used for any number of schemas,
+    # one after another or at the same time from several threads.
     def __init__(self):
+        self.lexer = cql_lexer.CqlLexer()
+
+        self.column_transitions = self.build_column_transitions(
+            SchemaParser.column_transition_rules,
+            SchemaParser.ST_DONE,
+            SchemaParser.TOKEN_CLASS_COUNT
+        )
+
+        self.logger = logging.getLogger(__name__)
+
+    # Yields a TableDefinition for each table as soon as its CREATE TABLE statement has been parsed. Nothing is retained
+    # by the parser once an object has been yielded, so memory use stays flat regardless of the size of the schema file.
+    #
+    # When a statement cache is supplied, tables whose statement text was parsed in the same keyspace context before are
+    # taken from the cache without being tokenised. When a ProcessingStats object is supplied, the time spent in each
+    # parsing stage is recorded in it along with statement, token and skipped table counts. Time spent by the caller
+    # between yielded tables is not included.
+    #
+    # Skipped tables, keyspace definitions and malformed statements are recorded in the supplied DiagnosticsCollector,
+    # which the caller is expected to summarise. Without one, the parser uses its own and logs its summary once the
+    # schema file has been parsed.
+    #
+    # The schema can be a path to a plain, gzip, xz or bzip2 compressed file, or a text stream that is already open such
+    # as a member of a diagnostic tarball. In the latter case the source_name is used when logging. A plain file is
+    # memory-mapped, and the objects parsed from it hold a StatementRef to their statement in the mapped file rather
+    # than a copy of its text. Compressed files and streams are read in chunks rather than all at once, and the objects
+    # parsed from them hold the text of their statements.
+    #
+    # User defined types, materialized views and indexes are always parsed, but are only yielded, as TypeDefinition,
+    # ViewDefinition and IndexDefinition objects, when include_dependent_objects is set. The names of the columns and
+    # key columns of each table are only kept when keep_column_names is set, and should not be asked for along with a
+    # statement cache, whose tables may have been parsed without them.
+    #
+    # A chunk made by iter_schema_chunks() is parsed by passing it along with its keyspace_context: the file and the
+    # chunk's byte offsets as chunk_bounds for a memory-mapped file, or the chunk's text as a stream otherwise. The
+    # keyspaces in the context are taken to have been defined before the chunk, without recording them again.
+    def iter_schema(self, cql_file_path, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                    statement_cache=None, stats=None, diagnostics_collector=None, source_name=None,
+                    include_dependent_objects=False, keyspace_context=None, chunk_bounds=None, keep_column_names=False):
+        parse_session = ParseSession(
+            self,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            stats=stats,
+            diagnostics_collector=diagnostics_collector,
+            include_dependent_objects=include_dependent_objects,
+            keyspace_context=keyspace_context,
+            keep_column_names=keep_column_names
+        )
+
+        if source_name is None:
+            source_name = getattr(cql_file_path, 'name', cql_file_path)
+
+        self.logger.info('Parsing CQL schema file "{}"'.format(source_name))
+        try:
+            schema_map = self.__map_schema(cql_file_path)
+            if schema_map is not None:
+                yield from parse_session.iter_mapped_schema(schema_map, statement_cache, chunk_bounds)
+            elif chunk_bounds is not None:
+                raise ValueError('Schema file "{}" can not be memory-mapped to parse a chunk of it.'.format(
+                    source_name
+                ))
+            else:
+                with self.__open_schema(cql_file_path) as in_cql:
+                    yield from parse_session.iter_stream_schema(in_cql, statement_cache)
+        finally:
+            if diagnostics_collector is None:
+                parse_session.diagnostics.log_summary()
+
+    # Splits a schema into chunks of whole statements, of roughly chunk_size characters each, so that the chunks can
+    # be parsed independently of each other, e.g. in separate processes. Yields a (keyspace_context, chunk) pair for
+    # each chunk, in the order of the statements in the schema. The keyspace context holds the keyspace in use at the
+    # start of the chunk and the names of the keyspaces defined before it, and is passed to iter_schema() along with
+    # the chunk. A chunk of a plain file that can be memory-mapped is the (start, end) pair of its byte offsets in the
+    # file, so that it is parsed from the file without its text being copied, and its size is counted in bytes. A
+    # chunk of any other schema is the text of its statements.
+    #
+    # Only the CREATE KEYSPACE and USE statements are tokenised, so splitting costs little more than reading the schema.
+    # Any problems with them are left to be recorded when the chunk they are in is parsed.
+    def iter_schema_chunks(self, cql_file_path, chunk_size=1 << 22):
+        schema_map = self.__map_schema(cql_file_path)
+        if schema_map is not None:
+            yield from ParseSession(self).iter_mapped_chunks(schema_map, chunk_size)
+            return
+
+        with self.__open_schema(cql_file_path) as in_cql:
+            yield from ParseSession(self).iter_stream_chunks(in_cql, chunk_size)
+
+    @staticmethod
+    def __map_schema(cql_file_path):
+        if isinstance(cql_file_path, (str, os.PathLike)):
+            return schema_sources.SchemaSources().map_schema_file(cql_file_path)
+        return None
+
+    @staticmethod
+    def __open_schema(cql_file_path):
+        if isinstance(cql_file_path, (str, os.PathLike)):
+            return schema_sources.SchemaSources().open_schema_file(cql_file_path)
+        return contextlib.nullcontext(cql_file_path)
+
+    def parse_schema(self, cql_file_path, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                     diagnostics_collector=None, include_dependent_objects=False):
+        return list(self.iter_schema(
+            cql_file_path,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            diagnostics_collector=diagnostics_collector,
+            include_dependent_objects=include_dependent_objects
+        ))
+
+
+class ParseSession:
+    # The state of a single parse of a schema by a SchemaParser: the keyspaces defined so far, the keyspace in use, and
+    # the statement and table being parsed. A session is created for each call to SchemaParser.iter_schema() and
+    # SchemaParser.iter_schema_chunks(), and is only used by that call, so calls never share any state other than that
+    # of the parser itself.
+    def __init__(self, parser, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False, stats=None,
+                 diagnostics_collector=None, include_dependent_objects=False, keyspace_context=None,
+                 keep_column_names=False):
+        self.lexer = parser.lexer
+        self.column_transitions = parser.column_transitions
+
+        # The properties of the most recently used WITH clauses, keyed on the terms of the clause. Tables with the same
+        # clause share the same dict, which must not be modified.
+        self.table_properties = collections.OrderedDict()
+
         self.current_keyspace = ''
         self.parsed_keyspaces = {}
-        self.ignore_keyspace = None
-        self.select_keyspace = None
-        self.parse_reserved_keyspaces = False
+        self.ignore_keyspace, self.select_keyspace = SchemaParser.get_keyspace_filters(
+            ignore_keyspace,
+            select_keyspace,
+            parse_reserved_keyspaces
+        )
+
+        if keyspace_context is not None:
+            self.current_keyspace, keyspace_names = keyspace_context
+            self.parsed_keyspaces = {
+                keyspace_name: self.__get_keyspace_status(keyspace_name) for keyspace_name in keyspace_names
+            }
+
+        # Tables are only ever skipped for their keyspace when keyspaces are selected or ignored, so the head of CREATE
+        # TABLE statements is only checked ahead of tokenising them when one of the two is set.
+        self.prescan_tables = bool(self.select_keyspace or self.ignore_keyspace)
+
+        self.include_dependent_objects = include_dependent_objects
+        self.keep_column_names = keep_column_names
         self.statement_raw = ''
+        self.statement_ref = ''
         self.statement_terms = []
-        self.dom = []
 
-        self.scope = ''
-        self.scope_stack = 0
-        self.column_def_stack = 0
         self.column_name = ''
-        self.column_type = ''
+        self.column_type = []
+        self.column_type_depth = 0
         self.column_type_lookup = {}
+        self.table_columns = []
+        self.table_column_names = []
+        self.table_partition_key = []
+        self.table_partition_names = []
+        self.table_clustering_key = []
+        self.table_clustering_names = []
+
+        self.stats = stats
+        self.diagnostics = diagnostics_collector
+        if diagnostics_collector is None:
+            self.diagnostics = diagnostics.DiagnosticsCollector()
+
+        self.column_actions = [
+            None,
+            self.__set_column_name,
+            self.__start_column_type,
+            self.__append_column_type,
+            self.__open_column_type,
+            self.__close_column_type,
+            self.__end_column,
+            self.__end_table_columns,
+            self.__set_inline_primary_key,
+            self.__start_primary_key,
+            self.__add_partition_key,
+            self.__add_clustering_key,
+            self.__raise_unexpected_term,
+        ]
 
         self.parse_statement_callback = {
             'create': self.__parse_create_statement,
@@ -94,44 +541,52 @@ class SchemaParser:
         self.parse_create_statement_callback = {
             'keyspace': self.__parse_create_keyspace_statement,
             'table': self.__parse_create_table_statement,
+            'type': self.__parse_create_type_statement,
+            'materialized': self.__parse_create_view_statement,
+            'index': self.__parse_create_index_statement,
+            'custom': self.__parse_create_custom_index_statement,
+            'search': self.__parse_create_search_index_statement,
         }
 
-        self.logger = logging.getLogger(__name__)
-        logging.basicConfig(format='[%(levelname)s] %(message)s', level=logging.INFO)
+    def __get_keyspace_status(self, keyspace):
+        return SchemaParser.get_keyspace_status(keyspace, self.ignore_keyspace, self.select_keyspace)
 
-    def __reset_parser_state(self):
-        self.current_keyspace = ''
-        self.parsed_keyspaces = set()
-        self.ignore_keyspace = None
-        self.select_keyspace = None
-        self.statement_raw = ''
-        self.statement_terms = []
-        self.dom = []
+    def __is_table_keyspace_ok(self, keyspace_name, table_name):
+        return self.__is_object_keyspace_ok(keyspace_name, table_name, SchemaParser.OBJ_TABLE)
 
-        self.scope = ''
-        self.scope_stack = 0
-        self.column_def_stack = 0
-        self.column_name = ''
-        self.column_type = ''
-        self.column_type_lookup = {}
+    def __is_object_keyspace_ok(self, keyspace_name, object_name, object_kind):
+        ignored_event, unselected_event, undefined_event = SchemaParser.skipped_object_events[object_kind]
 
-    def __get_keyspace_status(self, keyspace):
-        if self.select_keyspace:
-            if keyspace not in self.select_keyspace:
-                return SchemaParser.KS_UNSELECTED
-        elif self.ignore_keyspace:
-            if keyspace in self.ignore_keyspace:
-                return SchemaParser.KS_IGNORED
+        if keyspace_name in self.parsed_keyspaces:
+            keyspace_status = self.parsed_keyspaces[keyspace_name]
+            if keyspace_status == SchemaParser.KS_OK:
+                return True
+            else:
+                if self.stats is not None:
+                    self.stats.incr('parser.{}_skipped.{}'.format(
+                        object_kind,
+                        'ignored' if keyspace_status == SchemaParser.KS_IGNORED else 'unselected'
+                    ))
 
-        return SchemaParser.KS_OK
+                if keyspace_status == SchemaParser.KS_IGNORED:
+                    self.diagnostics.record(ignored_event, keyspace_name, object_name)
+                elif keyspace_status == SchemaParser.KS_UNSELECTED:
+                    self.diagnostics.record(unselected_event, keyspace_name, object_name)
+        else:
+            if self.stats is not None:
+                self.stats.incr('parser.{}_skipped.undefined_keyspace'.format(object_kind))
+
+            self.diagnostics.record(undefined_event, keyspace_name, object_name)
+
+        return False
 
     def __resolve_table_name(self):
-        term_item = self.statement_terms.pop()
+        term_item = cql_lexer.CqlLexer.unquote(self.statement_terms.pop())
 
         if self.statement_terms[-1] == '.':
             keyspace_name = term_item
             self.statement_terms.pop()
-            table_name = self.statement_terms.pop()
+            table_name = cql_lexer.CqlLexer.unquote(self.statement_terms.pop())
         elif self.statement_terms[-1] == '(':
             keyspace_name = self.current_keyspace
             table_name = term_item
@@ -146,25 +601,54 @@ class SchemaParser:
             raise ValueError('Malformed "CREATE TABLE" statement found. Expecting table name to begin with an'
                              'alphanumeric character. Found table name "{}". Skipping.'.format(table_name))
 
-        if keyspace_name in self.parsed_keyspaces:
-            keyspace_status = self.parsed_keyspaces[keyspace_name]
-            if keyspace_status == SchemaParser.KS_OK:
-                return keyspace_name, table_name
-            else:
-                if keyspace_status == SchemaParser.KS_IGNORED:
-                    self.logger.info('Table "{}.{}" defined in CREATE statement. Table is in an ignored keyspace '
-                                     'and will be ignored.'.format(keyspace_name, table_name))
-                elif keyspace_status == SchemaParser.KS_UNSELECTED:
-                    self.logger.info('Table "{}.{}" defined in CREATE statement. Table is in an unselected keyspace'
-                                     'and will be ignored.'.format(keyspace_name, table_name))
-        else:
-            self.logger.warn('Table "{}.{}" is in an undefined keyspace. Ignoring CREATE statement.'.format(
-                keyspace_name,
-                table_name
-            ))
+        if self.__is_table_keyspace_ok(keyspace_name, table_name):
+            return keyspace_name, table_name
 
         return None
 
+    # Returns True when a statement is a CREATE TABLE statement for a table in a skipped keyspace, tokenising no more of
+    # it than the terms up to the first "(", so that the column definitions are never tokenised. The skipped table is
+    # recorded in the same way as by __resolve_table_name(). A statement whose head is not in the format that
+    # __resolve_table_name() expects is left to be parsed in full, so that it is reported in the same way.
+    #
+    # Cutting the statement short can only split a quoted identifier or a comment that holds the "(". Every term before
+    # it is the same as in the full statement, and the split one is read as terms that start with a quote or slash,
+    # which are never taken as a keyspace or table name.
+    def __is_skipped_table_statement(self, statement_raw):
+        head_end = statement_raw.find('(')
+        head_terms = cql_lexer.CqlLexer.token_pattern.findall(
+            statement_raw,
+            0,
+            head_end + 1 if head_end >= 0 else len(statement_raw)
+        )
+        if len(head_terms) < 4 or head_terms[0].lower() != 'create' or head_terms[1].lower() != 'table':
+            return False
+
+        name_idx = 2
+        if head_terms[name_idx] == 'IF':
+            if head_terms[3:5] != ['NOT', 'EXISTS']:
+                return False
+            name_idx = 5
+
+        name_terms = head_terms[name_idx:name_idx + 3]
+        if len(name_terms) == 3 and name_terms[1] == '.':
+            keyspace_name = cql_lexer.CqlLexer.unquote(name_terms[0])
+            table_name = cql_lexer.CqlLexer.unquote(name_terms[2])
+        elif len(name_terms) >= 2 and name_terms[1] == '(':
+            keyspace_name = self.current_keyspace
+            table_name = cql_lexer.CqlLexer.unquote(name_terms[0])
+        else:
+            return False
+
+        if not table_name or not table_name[0].isalnum():
+            return False
+
+        if self.parsed_keyspaces.get(keyspace_name) == SchemaParser.KS_OK:
+            return False
+
+        self.__is_table_keyspace_ok(keyspace_name, table_name)
+        return True
+
     def __parser_lwt_statement(self):
         lwt_clauses = ['IF', 'NOT', 'EXISTS']
         for idx, val in enumerate(lwt_clauses):
@@ -176,27 +660,31 @@ class SchemaParser:
 
     def __parse_create_statement(self):
         if len(self.statement_terms) < 2:
-            self.logger.error('Incomplete "CREATE" statement found. Ignoring.')
+            self.diagnostics.record(SchemaParser.INCOMPLETE_CREATE_STATEMENT)
             return
 
         create_statement = self.statement_terms.pop().lower()
 
         try:
-            self.parse_create_statement_callback[create_statement]()
+            parse_create_callback = self.parse_create_statement_callback[create_statement]
         except KeyError:
-            self.logger.error('Unsupported CREATE statement "{}" found. Ignoring.'.format(create_statement))
+            self.diagnostics.record(SchemaParser.UNSUPPORTED_CREATE_STATEMENT, create_statement)
+            return
+
+        return parse_create_callback()
 
     def __parse_use_statement(self):
-        term_item = self.statement_terms.pop()
+        term_item = cql_lexer.CqlLexer.unquote(self.statement_terms.pop())
         if term_item[0].isalnum():
             if term_item in self.parsed_keyspaces:
                 self.current_keyspace = term_item
-                self.logger.info('Keyspace "{}" selected in USE statement. {}'.format(
+                self.diagnostics.record(
+                    SchemaParser.KEYSPACE_SELECTED,
                     term_item,
-                    self.keyspace_status_messages[self.parsed_keyspaces[term_item]]
-                ))
+                    SchemaParser.keyspace_status_messages[self.parsed_keyspaces[term_item]]
+                )
             else:
-                self.logger.warning('Keyspace "{}" is undefined. Ignoring USE statement.'.format(term_item))
+                self.diagnostics.record(SchemaParser.UNDEFINED_USE_KEYSPACE, term_item)
         else:
             raise ValueError('Malformed USE KEYSPACE statement. Expecting keyspace name; found "{}".'.format(term_item))
 
@@ -205,10 +693,10 @@ class SchemaParser:
             try:
                 self.__parser_lwt_statement()
             except ValueError as e:
-                self.logger.error(e)
+                self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
                 return
 
-        term_item = self.statement_terms.pop()
+        term_item = cql_lexer.CqlLexer.unquote(self.statement_terms.pop())
         if term_item[0].isalnum() and term_item.lower() != 'with':
             if term_item in self.parsed_keyspaces:
                 raise ValueError('Keyspace "{}" already defined. Skipping.'.format(term_item))
@@ -216,204 +704,677 @@ class SchemaParser:
             process_rtn_val = self.__get_keyspace_status(term_item)
             self.parsed_keyspaces[term_item] = process_rtn_val
             self.current_keyspace = term_item
-            self.logger.info('Keyspace "{}" defined in CREATE statement. {}'.format(
+            self.diagnostics.record(
+                SchemaParser.KEYSPACE_DEFINED,
                 term_item,
-                self.keyspace_status_messages[process_rtn_val]
-            ))
+                SchemaParser.keyspace_status_messages[process_rtn_val]
+            )
         else:
             raise ValueError('Malformed CREATE KEYSPACE statement. Expecting keyspace name; found "{}".'.format(
                 term_item
             ))
 
-    def __parse_create_table_statement_column_def(self, current_state, previous_state, term_item, dom_object):
-        if current_state == 'START_SCOPE_TABLE_DEF':
-            self.scope_stack += 1
-            if previous_state == 'KEY_CLAUSE':
-                if len(dom_object['attributes']['key']['partition']):
-                    raise ValueError('Multiple primary keys found. Skipping.')
-                else:
-                    self.scope = 'PARTITION_KEY_DEF'
-        elif current_state == 'COLUMN_NAME_DEF':
-            self.column_name = term_item
-        elif current_state == 'COLUMN_TYPE_DEF':
-            if previous_state == 'COLUMN_NAME_DEF':
-                self.column_type = term_item
-            elif previous_state in ['TERM_SEPARATOR', 'START_SCOPE_COLUMN_TYPE_DEF']:
-                self.column_type += term_item
-        elif current_state == 'START_SCOPE_COLUMN_TYPE_DEF':
-            self.column_def_stack += 1
-            self.column_type += term_item
-        elif current_state == 'END_SCOPE_COLUMN_TYPE_DEF':
-            self.column_def_stack -= 1
-            self.column_type += term_item
-        elif current_state == 'TERM_SEPARATOR':
-            if previous_state == 'COLUMN_TYPE_DEF' and self.column_def_stack > 0:
-                self.column_type += term_item
-            else:
-                self.column_type_lookup[self.column_name] = self.column_type
-                dom_object['attributes']['columns'].append(self.column_type)
-                if previous_state == 'KEY_CLAUSE':
-                    if len(dom_object['attributes']['key']['partition']):
-                        raise ValueError('Multiple primary keys found. Skipping.')
-                    else:
-                        dom_object['attributes']['key']['partition'].append(self.column_type)
-        elif current_state == 'PRIMARY_CLAUSE':
-            pass
-        elif current_state == 'KEY_CLAUSE':
-            if previous_state != 'PRIMARY_CLAUSE':
-                raise ValueError('Unexpected "KEY" clause found. Skipping.')
-        elif current_state == 'END_SCOPE_TABLE_DEF':
-            self.scope_stack -= 1
-            dom_object['attributes']['columns'].append(self.column_type)
-            if self.scope_stack == 0:
-                if not len(dom_object['attributes']['key']['partition']):
-                    raise ValueError('No primary key found. Skipping.')
-
-    def __parse_create_table_statement_partition_def(self, current_state, previous_state, term_item, dom_object):
-        if current_state == 'COLUMN_NAME_DEF':
-            self.column_name = term_item
-        elif current_state == 'START_SCOPE_TABLE_DEF':
-            self.scope_stack += 1
-            if self.scope_stack > 3:
-                raise ValueError('Unexpected "(" found. Skipping.')
-        elif current_state == 'TERM_SEPARATOR':
-            dom_object['attributes']['key']['partition'].append(self.column_type_lookup[self.column_name])
-            if self.scope_stack == 2:
-                self.scope = 'CLUSTERING_KEY_DEF'
-        elif current_state == 'END_SCOPE_TABLE_DEF':
-            dom_object['attributes']['key']['partition'].append(self.column_type_lookup[self.column_name])
-            self.scope_stack -= 1
-            if self.scope_stack == 1:
-                self.scope = 'TABLE_COLUMN_DEF'
-            elif self.scope_stack == 2:
-                self.scope = 'CLUSTERING_KEY_DEF'
-
-    def __parse_create_table_statement_clustering_def(self, current_state, previous_state, term_item, dom_object):
-        if current_state == 'COLUMN_NAME_DEF':
-            self.column_name = term_item
-        elif current_state == 'TERM_SEPARATOR':
-            if previous_state == 'COLUMN_NAME_DEF':
-                dom_object['attributes']['key']['clustering'].append(self.column_type_lookup[self.column_name])
-        elif current_state == 'END_SCOPE_TABLE_DEF':
-            self.scope_stack -= 1
-            if self.scope_stack == 1:
-                dom_object['attributes']['key']['clustering'].append(self.column_type_lookup[self.column_name])
-                self.scope = 'TABLE_COLUMN_DEF'
-            else:
-                raise ValueError('Unexpected ")" found. Skipping.')
+    def __lookup_column_type(self, column_name):
+        try:
+            return self.column_type_lookup[column_name]
+        except KeyError:
+            raise ValueError('Key column "{}" is not defined in the table. Skipping.'.format(column_name))
 
-    def __parse_create_table_statement_columns(self, dom_object):
-        term_item = self.statement_terms.pop()
-        if term_item == '(':
-            current_state = None
-            previous_state = None
-            self.scope = 'TABLE_COLUMN_DEF'
-            self.scope_stack = 1
-        else:
-            print('Malformed "CREATE TABLE" statement found. Expecting table definition to be in the format '
-                  '("<field_name> <field_type>, ..."). Skipping.')
+    # Column definition actions. Each is given the term that caused the transition and the next state, and returns the
+    # state to move to.
+    def __set_column_name(self, term_item, next_state):
+        self.column_name = term_item
+        return next_state
+
+    def __start_column_type(self, term_item, next_state):
+        self.column_type = [term_item]
+        return next_state
+
+    def __append_column_type(self, term_item, next_state):
+        self.column_type.append(term_item)
+        return next_state
+
+    def __open_column_type(self, term_item, next_state):
+        self.column_type_depth += 1
+        self.column_type.append(term_item)
+        return next_state
+
+    def __close_column_type(self, term_item, next_state):
+        self.column_type_depth -= 1
+        self.column_type.append(term_item)
+        if self.column_type_depth == 0:
+            return SchemaParser.ST_TYPE_END
+        return next_state
+
+    def __end_column(self, term_item, next_state):
+        column_type = ''.join(self.column_type)
+        self.column_type_lookup[self.column_name] = column_type
+        self.table_columns.append(column_type)
+        self.table_column_names.append(self.column_name)
+        return next_state
+
+    def __end_table_columns(self, term_item, next_state):
+        self.__end_column(term_item, next_state)
+        return next_state
+
+    def __set_inline_primary_key(self, term_item, next_state):
+        if self.table_partition_key:
+            raise ValueError('Multiple primary keys found. Skipping.')
+        self.table_partition_key.append(''.join(self.column_type))
+        self.table_partition_names.append(self.column_name)
+        return next_state
+
+    def __start_primary_key(self, term_item, next_state):
+        if self.table_partition_key:
+            raise ValueError('Multiple primary keys found. Skipping.')
+        return next_state
+
+    def __add_partition_key(self, term_item, next_state):
+        self.table_partition_key.append(self.__lookup_column_type(term_item))
+        self.table_partition_names.append(term_item)
+        return next_state
+
+    def __add_clustering_key(self, term_item, next_state):
+        self.table_clustering_key.append(self.__lookup_column_type(term_item))
+        self.table_clustering_names.append(term_item)
+        return next_state
+
+    @staticmethod
+    def __raise_unexpected_term(term_item, next_state):
+        raise ValueError('Unexpected "{}" found. Skipping.'.format(term_item))
+
+    # Runs the column definitions through the transition table, from the opening "(" up to and including the closing
+    # ")". Terms are read from the end of statement_terms by index, and the terms that were read are dropped once the
+    # closing ")" is found.
+    def __parse_create_table_statement_columns(self):
+        statement_terms = self.statement_terms
+        term_idx = len(statement_terms) - 1
+        if term_idx < 0 or statement_terms[term_idx] != '(':
+            self.diagnostics.record(
+                SchemaParser.MALFORMED_STATEMENT,
+                'Malformed "CREATE TABLE" statement found. Expecting table definition to be in the format '
+                '("<field_name> <field_type>, ..."). Skipping.'
+            )
             return
+        term_idx -= 1
 
-        while len(self.statement_terms) > 0 and self.scope_stack > 0:
-            term_item = self.statement_terms.pop()
+        column_transitions = self.column_transitions
+        column_actions = self.column_actions
+        get_token_class = SchemaParser.column_token_classes.get
+        token_class_count = SchemaParser.TOKEN_CLASS_COUNT
+        state_done = SchemaParser.ST_DONE
+        token_name = SchemaParser.TK_NAME
 
-            try:
-                current_state = SchemaParser.column_grammar_to_state_mapping[term_item]
-            except KeyError as e:
-                current_state = 'COLUMN_NAME_DEF'
+        self.column_type_depth = 0
+        state = SchemaParser.ST_COLUMN_NAME
+        while state != state_done:
+            if term_idx < 0:
+                raise ValueError('Incomplete table definition found. Skipping.')
+
+            term_item = statement_terms[term_idx]
+            term_idx -= 1
+
+            next_state, action = column_transitions[state * token_class_count + get_token_class(term_item, token_name)]
+            if action:
+                next_state = column_actions[action](term_item, next_state)
+
+            state = next_state
+
+        del statement_terms[term_idx + 1:]
 
-            if self.scope == 'TABLE_COLUMN_DEF':
-                self.__parse_create_table_statement_column_def(current_state, previous_state, term_item, dom_object)
-            elif self.scope == 'PARTITION_KEY_DEF':
-                self.__parse_create_table_statement_partition_def(current_state, previous_state, term_item, dom_object)
-            elif self.scope == 'CLUSTERING_KEY_DEF':
-                self.__parse_create_table_statement_clustering_def(current_state, previous_state, term_item, dom_object)
+        if not self.table_partition_key:
+            raise ValueError('No primary key found. Skipping.')
 
-            previous_state = current_state
+    # Checks a WITH CLUSTERING ORDER BY (<column> ASC|DESC, ...) clause against the clustering key. The columns must be
+    # clustering columns, given in the same order as in the clustering key.
+    def __parse_clustering_order(self):
+        for keyword in ['CLUSTERING', 'ORDER', 'BY', '(']:
+            term_item = self.statement_terms.pop() if len(self.statement_terms) > 1 else ';'
+            if term_item.upper() != keyword:
+                raise ValueError('Malformed "CLUSTERING ORDER BY" clause found. Expecting "{}"; found "{}". '
+                                 'Skipping.'.format(keyword, term_item))
+
+        for clustering_name in self.table_clustering_names:
+            term_item = self.statement_terms.pop() if len(self.statement_terms) > 1 else ';'
+            if term_item != clustering_name:
+                raise ValueError('Column "{}" in "CLUSTERING ORDER BY" clause is not clustering column "{}". '
+                                 'Skipping.'.format(term_item, clustering_name))
+
+            term_item = self.statement_terms.pop() if len(self.statement_terms) > 1 else ';'
+            if term_item.upper() not in ['ASC', 'DESC']:
+                raise ValueError('Expecting "ASC" or "DESC" after column "{}" in "CLUSTERING ORDER BY" clause; '
+                                 'found "{}". Skipping.'.format(clustering_name, term_item))
+
+            term_item = self.statement_terms.pop() if len(self.statement_terms) > 1 else ';'
+            if term_item == ')':
+                return
+            if term_item != ',':
+                break
+
+        raise ValueError('Malformed "CLUSTERING ORDER BY" clause found. Expecting ")" after the clustering columns. '
+                         'Skipping.')
 
     def __parse_create_table_statement(self):
         if self.statement_terms[-1] == 'IF':
             try:
                 self.__parser_lwt_statement()
             except ValueError as e:
-                self.logger.error(e)
+                self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
                 return
 
         try:
             table_name_parts = self.__resolve_table_name()
         except ValueError as e:
-            self.logger.error(e)
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
             return
 
         if not table_name_parts:
             return
 
-        dom_object = {
-            'name': '{}.{}'.format(table_name_parts[0], table_name_parts[1]),
-            'attributes': {
-                'columns': [],
-                'key': {
-                    'partition': [],
-                    'clustering': []
-                },
-                'properties': {},
-            },
-            'statement': self.statement_raw
-        }
+        self.column_type_lookup = {}
+        self.table_columns = []
+        self.table_column_names = []
+        self.table_partition_key = []
+        self.table_partition_names = []
+        self.table_clustering_key = []
+        self.table_clustering_names = []
 
+        column_states_start = time.perf_counter()
+        column_terms_count = len(self.statement_terms)
         try:
-            self.__parse_create_table_statement_columns(dom_object)
+            self.__parse_create_table_statement_columns()
         except ValueError as e:
-            self.logger.error(e)
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
             return
+        finally:
+            if self.stats is not None:
+                self.stats.add_time('parser.column_states', time.perf_counter() - column_states_start)
+                self.stats.incr('parser.column_state_transitions', column_terms_count - len(self.statement_terms))
 
         term_item = self.statement_terms.pop()
 
-        if term_item.lower() in ['with', ';']:
-            self.dom.append(dom_object)
+        if term_item.lower() == 'with':
+            try:
+                table_properties = self.__parse_table_properties()
+            except ValueError as e:
+                self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+                return
+        elif term_item == ';':
+            table_properties = {}
         else:
-            self.logger.error('Malformed "CREATE TABLE" statement found. Expecting table properties to be in the '
-                              'format CREATE TABLE ... (...) WITH (<property>, ...); or CREATE TABLE ... (...);. '
-                              'Ignoring.')
+            self.diagnostics.record(
+                SchemaParser.MALFORMED_STATEMENT,
+                'Malformed "CREATE TABLE" statement found. Expecting table properties to be in the format CREATE '
+                'TABLE ... (...) WITH (<property>, ...); or CREATE TABLE ... (...);. Ignoring.'
+            )
+            return
 
-    def parse_schema(self, cql_file_path, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False):
-        if ignore_keyspace:
-            self.ignore_keyspace = set(ignore_keyspace)
-            if not parse_reserved_keyspaces:
-                self.ignore_keyspace = self.ignore_keyspace.union(SchemaParser.reserved_keyspaces)
-        if select_keyspace:
-            self.select_keyspace = set(select_keyspace)
-            if parse_reserved_keyspaces:
-                self.select_keyspace = self.select_keyspace.union(SchemaParser.reserved_keyspaces)
+        table_definition = schema_definitions.TableDefinition.from_type_names(
+            table_name_parts[0],
+            table_name_parts[1],
+            columns=self.table_columns,
+            partition_key=self.table_partition_key,
+            clustering_key=self.table_clustering_key,
+            properties=table_properties,
+            statement=self.statement_ref
+        )
+        if self.keep_column_names:
+            table_definition.column_names = tuple(self.table_column_names)
+            table_definition.partition_key_names = tuple(self.table_partition_names)
+            table_definition.clustering_key_names = tuple(self.table_clustering_names)
+
+        return table_definition
+
+    # Pops a property value literal. Strings are unquoted and booleans are lower cased, so that values are in the same
+    # form as those loaded from a system_schema export. Literals that the lexer splits into several terms, such as
+    # signed numbers and UUIDs, are joined back together.
+    def __pop_property_literal(self):
+        literal_terms = [self.__pop_statement_term('TABLE')]
+        while self.statement_terms[-1].upper() not in SchemaParser.property_delimiters:
+            literal_terms.append(self.__pop_statement_term('TABLE'))
+
+        if len(literal_terms) > 1:
+            return ''.join(literal_terms).lstrip('+')
+
+        term_item = literal_terms[0]
+        term_kind = cql_lexer.CqlLexer.token_kind(term_item)
+        if term_kind == cql_lexer.CqlLexer.STRING:
+            return cql_lexer.CqlLexer.unquote(term_item)
+        if term_kind == cql_lexer.CqlLexer.IDENTIFIER and term_item.lower() in ['true', 'false']:
+            return term_item.lower()
+        if term_kind == cql_lexer.CqlLexer.SYMBOL:
+            raise ValueError('Malformed table property found. Expecting a value; found "{}". Ignoring.'.format(
+                term_item
+            ))
+        return term_item
+
+    # Pops a property value, which is either a literal or a map literal of the form {<key>: <value>, ...}.
+    def __pop_property_value(self):
+        if self.statement_terms[-1] != '{':
+            return self.__pop_property_literal()
+
+        self.statement_terms.pop()
+        property_map = {}
+        if self.statement_terms[-1] == '}':
+            self.statement_terms.pop()
+            return property_map
+
+        while True:
+            map_key = self.__pop_property_literal()
+            self.__pop_expected_term(':', 'TABLE')
+            property_map[map_key] = self.__pop_property_literal()
+
+            term_item = self.__pop_statement_term('TABLE')
+            if term_item == '}':
+                return property_map
+            if term_item != ',':
+                raise ValueError('Malformed table property map found. Expecting "," or "}}"; found "{}". '
+                                 'Ignoring.'.format(term_item))
+
+    # Parses the table properties that follow WITH, in the format <property> = <value> [AND <property> = <value> ...].
+    # CLUSTERING ORDER BY is checked against the clustering key, and COMPACT STORAGE and the properties that are not
+    # kept in system_schema.tables are skipped. Most tables share a few WITH clauses, so the properties of each clause
+    # are usually parsed once per session and tables with the same clause share the same properties dict, which must
+    # not be modified.
+    def __parse_table_properties(self):
+        if self.statement_terms[-1].upper() == 'CLUSTERING':
+            self.__parse_clustering_order()
+            term_item = self.statement_terms.pop()
+            if term_item == ';':
+                return {}
+            if term_item.upper() != 'AND':
+                raise ValueError('Malformed "CREATE TABLE" statement found. Expecting "AND" or ";" after the '
+                                 '"CLUSTERING ORDER BY" clause; found "{}". Ignoring.'.format(term_item))
+
+        property_terms = tuple(self.statement_terms)
+        try:
+            table_properties = self.table_properties[property_terms]
+            self.table_properties.move_to_end(property_terms)
+            self.statement_terms.clear()
+            return table_properties
+        except KeyError:
+            pass
+
+        table_properties = {}
+        while True:
+            property_keyword = self.statement_terms[-1].upper()
+            if property_keyword == 'CLUSTERING':
+                self.__parse_clustering_order()
+            elif property_keyword == 'COMPACT':
+                self.statement_terms.pop()
+                self.__pop_expected_term('STORAGE', 'TABLE')
+            else:
+                property_name = cql_lexer.CqlLexer.unquote(self.__pop_statement_term('TABLE')).lower()
+                self.__pop_expected_term('=', 'TABLE')
+                property_value = self.__pop_property_value()
+                if property_name not in SchemaParser.non_property_names:
+                    table_properties[property_name] = property_value
+
+            term_item = self.statement_terms.pop()
+            if term_item == ';':
+                break
+            if term_item.upper() != 'AND':
+                raise ValueError('Malformed "CREATE TABLE" statement found. Expecting "AND" or ";" after a table '
+                                 'property; found "{}". Ignoring.'.format(term_item))
+
+        self.table_properties[property_terms] = table_properties
+        if len(self.table_properties) > SchemaParser.table_properties_cache_size:
+            self.table_properties.popitem(last=False)
+        return table_properties
+
+    def __pop_statement_term(self, create_statement):
+        if len(self.statement_terms) < 2:
+            raise ValueError('Incomplete "CREATE {}" statement found. Ignoring.'.format(create_statement))
+        return self.statement_terms.pop()
+
+    def __pop_expected_term(self, expected_term, create_statement):
+        term_item = self.__pop_statement_term(create_statement)
+        if term_item.upper() != expected_term:
+            raise ValueError('Malformed "CREATE {}" statement found. Expecting "{}"; found "{}". Ignoring.'.format(
+                create_statement,
+                expected_term,
+                term_item
+            ))
+
+    # Pops an optionally keyspace qualified name. Names without a keyspace are in the current keyspace.
+    def __pop_qualified_name(self, create_statement):
+        term_item = cql_lexer.CqlLexer.unquote(self.__pop_statement_term(create_statement))
+        if self.statement_terms[-1] == '.':
+            self.statement_terms.pop()
+            return term_item, cql_lexer.CqlLexer.unquote(self.__pop_statement_term(create_statement))
+
+        return self.current_keyspace, term_item
+
+    # Pops the terms up to the ")" that closes a bracket that has already been popped, and returns a list of the terms
+    # between each top level ",".
+    def __pop_bracketed_terms(self, create_statement):
+        bracketed_terms = []
+        current_terms = []
+        bracket_stack = 0
+        while True:
+            term_item = self.__pop_statement_term(create_statement)
+            if term_item in ['(', '<']:
+                bracket_stack += 1
+            elif term_item in [')', '>'] and bracket_stack > 0:
+                bracket_stack -= 1
+            elif term_item in [',', ')']:
+                bracketed_terms.append(current_terms)
+                if term_item == ')':
+                    return bracketed_terms
+                current_terms = []
+                continue
+
+            current_terms.append(term_item)
+
+    def __parse_create_type_statement(self):
+        try:
+            if self.statement_terms[-1] == 'IF':
+                self.__parser_lwt_statement()
+
+            keyspace_name, type_name = self.__pop_qualified_name('TYPE')
+            self.__pop_expected_term('(', 'TYPE')
+            type_fields = self.__pop_bracketed_terms('TYPE')
+        except ValueError as e:
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+            return
+
+        if not self.__is_object_keyspace_ok(keyspace_name, type_name, SchemaParser.OBJ_TYPE):
+            return
+
+        # Each field is its name followed by its type. The type terms are joined in the same way as column types.
+        return schema_definitions.TypeDefinition(
+            keyspace_name,
+            type_name,
+            field_types=[''.join(type_field[1:]) for type_field in type_fields],
+            statement=self.statement_ref
+        )
+
+    def __parse_create_view_statement(self):
+        try:
+            self.__pop_expected_term('VIEW', 'MATERIALIZED VIEW')
+            if self.statement_terms[-1] == 'IF':
+                self.__parser_lwt_statement()
 
-        self.logger.info('Parsing CQL schema file "{}"'.format(cql_file_path))
-        with open(cql_file_path, 'r') as in_cql:
-            for raw_line in in_cql:
-                statement_part = raw_line.strip()
-                if len(statement_part) == 0:
+            keyspace_name, view_name = self.__pop_qualified_name('MATERIALIZED VIEW')
+            self.__pop_expected_term('AS', 'MATERIALIZED VIEW')
+            while self.__pop_statement_term('MATERIALIZED VIEW').upper() != 'FROM':
+                pass
+
+            base_keyspace_name, base_table_name = self.__pop_qualified_name('MATERIALIZED VIEW')
+        except ValueError as e:
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+            return
+
+        if not self.__is_object_keyspace_ok(keyspace_name, view_name, SchemaParser.OBJ_VIEW):
+            return
+
+        return schema_definitions.ViewDefinition(
+            keyspace_name,
+            view_name,
+            base_keyspace_name,
+            base_table_name,
+            statement=self.statement_ref
+        )
+
+    @staticmethod
+    def __get_index_kind(index_class, custom_index):
+        if index_class is None:
+            if custom_index:
+                return schema_definitions.IndexDefinition.CUSTOM
+            return schema_definitions.IndexDefinition.SECONDARY
+
+        index_class = index_class.lower()
+        if index_class == 'sai' or 'storageattachedindex' in index_class:
+            return schema_definitions.IndexDefinition.SAI
+        if 'sasiindex' in index_class:
+            return schema_definitions.IndexDefinition.SASI
+        if 'solr' in index_class or 'search' in index_class:
+            return schema_definitions.IndexDefinition.SEARCH
+        if index_class == 'legacy_local_table':
+            return schema_definitions.IndexDefinition.SECONDARY
+        return schema_definitions.IndexDefinition.CUSTOM
+
+    # Parses CREATE [CUSTOM] INDEX [IF NOT EXISTS] [<index>] ON [<keyspace>.]<table> (<target>) [USING '<class>'] ...
+    def __parse_create_index_statement(self, custom_index=False):
+        create_statement = 'CUSTOM INDEX' if custom_index else 'INDEX'
+        try:
+            if self.statement_terms[-1] == 'IF':
+                self.__parser_lwt_statement()
+
+            index_name = None
+            if self.statement_terms[-1].upper() != 'ON':
+                index_name = cql_lexer.CqlLexer.unquote(self.__pop_statement_term(create_statement))
+
+            self.__pop_expected_term('ON', create_statement)
+            keyspace_name, table_name = self.__pop_qualified_name(create_statement)
+            self.__pop_expected_term('(', create_statement)
+            target_terms = self.__pop_bracketed_terms(create_statement)
+            index_target = ','.join(''.join(target_term) for target_term in target_terms)
+
+            # Unnamed indexes are named <table>_<column>_idx by Cassandra.
+            if index_name is None:
+                target_names = [term_item for term_item in target_terms[0] if term_item not in '()']
+                index_name = '{}_{}_idx'.format(table_name, cql_lexer.CqlLexer.unquote(target_names[-1]))
+
+            index_class = None
+            if self.statement_terms[-1].upper() == 'USING':
+                self.statement_terms.pop()
+                index_class = cql_lexer.CqlLexer.unquote(self.__pop_statement_term(create_statement))
+        except ValueError as e:
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+            return
+
+        if not self.__is_object_keyspace_ok(keyspace_name, index_name, SchemaParser.OBJ_INDEX):
+            return
+
+        return schema_definitions.IndexDefinition(
+            keyspace_name,
+            index_name,
+            table_name,
+            target=index_target,
+            kind=self.__get_index_kind(index_class, custom_index),
+            statement=self.statement_ref
+        )
+
+    def __parse_create_custom_index_statement(self):
+        try:
+            self.__pop_expected_term('INDEX', 'CUSTOM INDEX')
+        except ValueError as e:
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+            return
+
+        return self.__parse_create_index_statement(custom_index=True)
+
+    # Parses the DSE CREATE SEARCH INDEX [IF NOT EXISTS] ON [<keyspace>.]<table> ... statement. Search indexes are not
+    # named, and index the whole table.
+    def __parse_create_search_index_statement(self):
+        try:
+            self.__pop_expected_term('INDEX', 'SEARCH INDEX')
+            if self.statement_terms[-1] == 'IF':
+                self.__parser_lwt_statement()
+
+            self.__pop_expected_term('ON', 'SEARCH INDEX')
+            keyspace_name, table_name = self.__pop_qualified_name('SEARCH INDEX')
+        except ValueError as e:
+            self.diagnostics.record(SchemaParser.MALFORMED_STATEMENT, e)
+            return
+
+        if not self.__is_object_keyspace_ok(keyspace_name, table_name, SchemaParser.OBJ_SEARCH_INDEX):
+            return
+
+        return schema_definitions.IndexDefinition(
+            keyspace_name,
+            None,
+            table_name,
+            kind=schema_definitions.IndexDefinition.SEARCH,
+            statement=self.statement_ref
+        )
+
+    # Returns True when a statement is a CREATE KEYSPACE or USE statement, looking at no more than its first two terms.
+    def __is_keyspace_statement(self, cql_buffer, statement_start):
+        token_match = cql_lexer.CqlLexer.token_pattern.match(cql_buffer, statement_start)
+        cql_operation = token_match.group(1).lower()
+        if cql_operation == 'use':
+            return True
+        if cql_operation != 'create':
+            return False
+
+        token_match = cql_lexer.CqlLexer.token_pattern.match(cql_buffer, token_match.end())
+        return token_match is not None and token_match.group(1).lower() == 'keyspace'
+
+    # Tracks the keyspaces defined and used while a schema is split into chunks.
+    def __split_keyspace_statement(self, cql_buffer, statement_start, statement_end):
+        if self.__is_keyspace_statement(cql_buffer, statement_start):
+            self.statement_terms = self.lexer.token_values(cql_buffer, statement_start, statement_end)
+            self.statement_terms.reverse()
+            try:
+                self.parse_statement_callback[self.statement_terms.pop().lower()]()
+            except ValueError:
+                pass
+
+    # Splits a text stream into chunks of statements, as described in SchemaParser.iter_schema_chunks().
+    def iter_stream_chunks(self, in_cql, chunk_size):
+        keyspace_context = (self.current_keyspace, ())
+        chunk_statements = []
+        chunk_length = 0
+        for cql_buffer, statement_start, statement_end in self.lexer.iter_stream_statement_bounds(in_cql):
+            chunk_statements.append(cql_buffer[statement_start:statement_end])
+            chunk_length += statement_end - statement_start
+            self.__split_keyspace_statement(cql_buffer, statement_start, statement_end)
+
+            if chunk_length >= chunk_size:
+                yield keyspace_context, '\n'.join(chunk_statements)
+                keyspace_context = (self.current_keyspace, tuple(self.parsed_keyspaces))
+                chunk_statements = []
+                chunk_length = 0
+
+        if chunk_statements:
+            yield keyspace_context, '\n'.join(chunk_statements)
+
+    # Splits a memory-mapped schema file into chunks of byte offsets, as described in SchemaParser.iter_schema_chunks().
+    # Each statement is decoded to check whether it is a keyspace statement, but none of them are kept.
+    def iter_mapped_chunks(self, schema_map, chunk_size):
+        keyspace_context = (self.current_keyspace, ())
+        chunk_start = None
+        statement_end = 0
+        for statement_start, statement_end in self.lexer.iter_mapped_statement_bounds(schema_map):
+            if chunk_start is None:
+                chunk_start = statement_start
+
+            statement_raw = schema_definitions.StatementRef.decode(schema_map[statement_start:statement_end])
+            self.__split_keyspace_statement(statement_raw, 0, len(statement_raw))
+
+            if statement_end - chunk_start >= chunk_size:
+                yield keyspace_context, (chunk_start, statement_end)
+                keyspace_context = (self.current_keyspace, tuple(self.parsed_keyspaces))
+                chunk_start = None
+
+        if chunk_start is not None:
+            yield keyspace_context, (chunk_start, statement_end)
+
+    # Yields the schema objects parsed from a text stream, as described in SchemaParser.iter_schema(). Reading and
+    # decompressing the stream is included in the parser.statement_scan time, as chunks are read as statements are
+    # scanned for.
+    def iter_stream_schema(self, in_cql, statement_cache=None):
+        return self.__iter_statements_schema(self.__iter_stream_statements(in_cql), statement_cache)
+
+    # Yields the schema objects parsed from a memory-mapped schema file, as described in SchemaParser.iter_schema().
+    # Decoding each statement is included in the parser.statement_scan time. When chunk_bounds are given, only the
+    # statements between the two byte offsets are parsed.
+    def iter_mapped_schema(self, schema_map, statement_cache=None, chunk_bounds=None):
+        return self.__iter_statements_schema(
+            self.__iter_mapped_statements(schema_map, *(chunk_bounds or ())),
+            statement_cache
+        )
+
+    # Yields a (statement_raw, statement_ref) pair for every statement in a text stream. The statement text is its own
+    # reference.
+    def __iter_stream_statements(self, in_cql):
+        for cql_buffer, statement_start, statement_end in self.lexer.iter_stream_statement_bounds(in_cql):
+            statement_raw = cql_buffer[statement_start:statement_end]
+            yield statement_raw, statement_raw
+
+    # Yields a (statement_raw, statement_ref) pair for every statement in a memory-mapped schema file. The text is only
+    # decoded to be tokenised, and the parsed objects keep a StatementRef to the statement in the file instead.
+    def __iter_mapped_statements(self, schema_map, start=0, end=None):
+        for statement_start, statement_end in self.lexer.iter_mapped_statement_bounds(schema_map, start, end):
+            yield (
+                schema_definitions.StatementRef.decode(schema_map[statement_start:statement_end]),
+                schema_definitions.StatementRef(schema_map, statement_start, statement_end)
+            )
+
+    def __iter_statements_schema(self, statements, statement_cache):
+        stats = self.stats
+        scan_start = time.perf_counter()
+        for statement_raw, statement_ref in statements:
+            tokenise_start = time.perf_counter()
+            if stats is not None:
+                stats.add_time('parser.statement_scan', tokenise_start - scan_start)
+                stats.incr('parser.statements')
+
+            self.statement_raw = statement_raw
+            self.statement_ref = statement_ref
+
+            if self.prescan_tables and self.__is_skipped_table_statement(statement_raw):
+                if stats is not None:
+                    stats.add_time('parser.prescan', time.perf_counter() - tokenise_start)
+                    stats.incr('parser.statements.create_table')
+                    stats.incr('parser.statements_prescanned')
+
+                scan_start = time.perf_counter()
+                continue
+
+            statement_key = None
+            if statement_cache is not None:
+                statement_key = statement_cache.get_statement_key(self.current_keyspace, self.statement_raw)
+                dom_object = statement_cache.get_statement(statement_key)
+                if dom_object is not None:
+                    if stats is not None:
+                        stats.incr('parser.statement_cache_hits')
+
+                    if self.__is_table_keyspace_ok(dom_object.keyspace, dom_object.table):
+                        yield dom_object
+
+                    scan_start = time.perf_counter()
                     continue
 
-                self.statement_raw += raw_line
+            self.statement_terms = self.lexer.token_values(statement_raw, 0, len(statement_raw))
+            self.statement_terms.reverse()
 
-                for term_item in re.split(r'(\W)', raw_line):
-                    term_item = term_item.strip()
-                    if term_item and term_item not in ['\'', '"']:
-                        self.statement_terms.append(term_item)
+            dispatch_start = time.perf_counter()
+            if stats is not None:
+                stats.add_time('parser.tokenise', dispatch_start - tokenise_start)
+                stats.incr('parser.tokens', len(self.statement_terms))
 
-                if len(self.statement_terms) > 0 and self.statement_terms[-1] == ';':
-                    self.statement_terms.reverse()
+            cql_operation = self.statement_terms.pop().lower()
+
+            if stats is not None:
+                statement_type = cql_operation
+                if cql_operation == 'create' and self.statement_terms:
+                    statement_type = 'create_{}'.format(self.statement_terms[-1].lower())
+                stats.incr('parser.statements.{}'.format(statement_type))
+
+            try:
+                parse_callback = self.parse_statement_callback[cql_operation]
+            except KeyError:
+                self.diagnostics.record(SchemaParser.UNSUPPORTED_OPERATION, cql_operation)
+                parse_callback = None
 
-                    cql_operation = self.statement_terms.pop().lower()
+            dom_object = parse_callback() if parse_callback else None
 
-                    try:
-                        self.parse_statement_callback[cql_operation]()
-                    except KeyError:
-                        self.logger.error('Unsupported CQL operation "{}" found. Skipping.'.format(cql_operation))
+            self.statement_raw = ''
+            self.statement_ref = ''
+            self.statement_terms = []
 
-                    self.statement_raw = ''
-                    self.statement_terms = []
+            if stats is not None:
+                stats.add_time('parser.dispatch', time.perf_counter() - dispatch_start)
 
-        rtn_dom = copy.deepcopy(self.dom)
-        self.__reset_parser_state()
+            # Only tables are cached, so that a cached statement is always a table.
+            if isinstance(dom_object, schema_definitions.TableDefinition):
+                if statement_cache is not None:
+                    statement_cache.put_statement(statement_key, dom_object)
+                yield dom_object
+            elif dom_object and self.include_dependent_objects:
+                yield dom_object
 
-        return rtn_dom
+            scan_start = time.perf_counter()
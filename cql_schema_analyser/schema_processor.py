@@ -1,42 +1,718 @@
 #!/usr/bin/env python
 
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import cProfile
+import functools
+import glob
+import io
+import itertools
+import logging
 import os
 import sys
 
 try:
+    import cql_schema_analyser.analysis_daemon as analysis_daemon
+    import cql_schema_analyser.cost_models as cost_models
+    import cql_schema_analyser.diagnostics as diagnostics
+    import cql_schema_analyser.fingerprint as fingerprint
+    import cql_schema_analyser.parse_cache as parse_cache
+    import cql_schema_analyser.processing_stats as processing_stats
+    import cql_schema_analyser.property_drift as property_drift
+    import cql_schema_analyser.report_writers as report_writers
+    import cql_schema_analyser.schema_comparator as schema_comparator
+    import cql_schema_analyser.schema_definitions as schema_definitions
     import cql_schema_analyser.schema_parser as schema_parser
+    import cql_schema_analyser.schema_rules as schema_rules
+    import cql_schema_analyser.schema_sources as schema_sources
+    import cql_schema_analyser.system_schema_loader as system_schema_loader
     import cql_schema_analyser.table_template_analyser as table_template_analyser
+    import cql_schema_analyser.write_amplification as write_amplification
 except ModuleNotFoundError:
     # Catch the case where we are calling the process.py directly from the parent directory.
     # In this case add the parent directory to the system path so that we can import the redactor modules.
     sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    import cql_schema_analyser.analysis_daemon as analysis_daemon
+    import cql_schema_analyser.cost_models as cost_models
+    import cql_schema_analyser.diagnostics as diagnostics
+    import cql_schema_analyser.fingerprint as fingerprint
+    import cql_schema_analyser.parse_cache as parse_cache
+    import cql_schema_analyser.processing_stats as processing_stats
+    import cql_schema_analyser.property_drift as property_drift
+    import cql_schema_analyser.report_writers as report_writers
+    import cql_schema_analyser.schema_comparator as schema_comparator
+    import cql_schema_analyser.schema_definitions as schema_definitions
     import cql_schema_analyser.schema_parser as schema_parser
+    import cql_schema_analyser.schema_rules as schema_rules
+    import cql_schema_analyser.schema_sources as schema_sources
+    import cql_schema_analyser.system_schema_loader as system_schema_loader
     import cql_schema_analyser.table_template_analyser as table_template_analyser
+    import cql_schema_analyser.write_amplification as write_amplification
 
 
 class SchemaProcessor:
-    def __init__(self):
+    # Size of each chunk of a schema file that is parsed in worker processes; in bytes for a file that is memory-mapped,
+    # and in characters of statements otherwise.
+    parallel_chunk_size = 1 << 22
+
+    def __init__(self, near_duplicate_threshold=None, stats=None, verbosity=diagnostics.DiagnosticsCollector.SUMMARY,
+                 report_format='text', report_granularity='template', report_file=None, member_patterns=None,
+                 cost_model=None, node_count=1):
         self.cql_schema_paser = schema_parser.SchemaParser()
-        self.cql_table_template_analyser = table_template_analyser.TableTemplateAnalyser()
+        self.schema_sources = schema_sources.SchemaSources(member_patterns=member_patterns)
+        self.cql_table_template_analyser = table_template_analyser.TableTemplateAnalyser(stats=stats)
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.report_format = report_format
+        self.report_granularity = report_granularity
+        self.report_file = report_file
+        self.cost_model = cost_model
+        self.node_count = node_count
+        self.stats = stats
+        self.diagnostics_collector = diagnostics.DiagnosticsCollector(verbosity=verbosity)
+
+    def __timer(self, stage):
+        return self.stats.timer(stage) if self.stats is not None else contextlib.nullcontext()
+
+    # Prints the consolidation report instead of the template report when a cost model is given.
+    def __print_consolidation_report(self, report_file):
+        if self.report_format == 'text':
+            self.cql_table_template_analyser.print_consolidation_report(
+                self.cost_model,
+                node_count=self.node_count,
+                out_file=report_file
+            )
+        else:
+            consolidation_records, _ = self.cql_table_template_analyser.get_consolidation_report(
+                self.cost_model,
+                node_count=self.node_count
+            )
+            report_writers.report_writers[self.report_format](
+                report_file,
+                self.cql_table_template_analyser.consolidation_record_fields
+            ).write_records(consolidation_records)
+
+    def __print_report(self):
+        report_file = self.report_file if self.report_file is not None else sys.stdout
+        if self.cost_model is not None:
+            with self.__timer('report.consolidation'):
+                self.__print_consolidation_report(report_file)
+            self.diagnostics_collector.log_summary()
+            return
+
+        near_duplicates = None
+        if self.near_duplicate_threshold:
+            with self.__timer('report.near_duplicates'):
+                near_duplicates = self.cql_table_template_analyser.find_near_duplicate_templates(
+                    threshold=self.near_duplicate_threshold
+                )
+
+        with self.__timer('report.print'):
+            if self.report_format == 'text':
+                self.cql_table_template_analyser.print_table_definitions(
+                    near_duplicates=near_duplicates,
+                    out_file=report_file
+                )
+            elif self.report_granularity == 'occurrence':
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    self.cql_table_template_analyser.occurrence_record_fields
+                ).write_records(self.cql_table_template_analyser.iter_occurrence_records())
+            else:
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    self.cql_table_template_analyser.template_record_fields
+                ).write_records(self.cql_table_template_analyser.iter_template_records(near_duplicates=near_duplicates))
+
+        self.diagnostics_collector.log_summary()
+
+    # Catalogs a single schema file. When jobs is other than 1, the file is split into chunks of statements that are
+    # parsed in up to that many worker processes; None uses every CPU. Archives, and files parsed with a cache
+    # directory, are always parsed in this process.
+    def catalog_schema(self, schema_file, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                       source=None, cache_dir=None, jobs=1):
+        if self.schema_sources.is_archive(schema_file):
+            self.__catalog_schema_archive(schema_file, ignore_keyspace, select_keyspace, parse_reserved_keyspaces)
+            return
+
+        if cache_dir:
+            self.__catalog_schema_incremental(
+                schema_file,
+                ignore_keyspace,
+                select_keyspace,
+                parse_reserved_keyspaces,
+                source,
+                cache_dir
+            )
+            return
+
+        if jobs != 1:
+            self.__catalog_schema_parallel(
+                schema_file,
+                jobs,
+                ignore_keyspace,
+                select_keyspace,
+                parse_reserved_keyspaces,
+                source
+            )
+            return
+
+        for dom_obj in self.cql_schema_paser.iter_schema(
+                schema_file,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                stats=self.stats,
+                diagnostics_collector=self.diagnostics_collector):
+            self.cql_table_template_analyser.catalog_table_definition(dom_obj, source=source)
+
+    # Runs in a worker process. Parses and hashes the tables in one chunk of a schema file made by
+    # SchemaParser.iter_schema_chunks(), and hands back their templates for the parent process to catalog in statement
+    # order, so that the catalog is the same as when the file is parsed in a single process. The results are returned
+    # as a (table_templates, chunk_tables, stats, diagnostics) tuple, where table_templates holds each distinct
+    # (columns_hash, props_hash, template) of the chunk and chunk_tables holds a (table_name, template_idx) pair for
+    # each table. Only the first table of a template in the chunk can add a variant to the catalog, so its template is
+    # the only one kept. A chunk of a memory-mapped file is mapped and parsed in place, and the statements of its
+    # templates are handed back as (start, end) byte offsets in the file rather than as text.
+    @staticmethod
+    def catalog_schema_chunk_worker(schema_chunk, ignore_keyspace=None, select_keyspace=None,
+                                    parse_reserved_keyspaces=False, collect_stats=False,
+                                    verbosity=diagnostics.DiagnosticsCollector.SUMMARY):
+        schema_file, source_name, keyspace_context, chunk = schema_chunk
+        schema_processor = SchemaProcessor(
+            stats=processing_stats.ProcessingStats() if collect_stats else None,
+            verbosity=verbosity
+        )
+
+        chunk_bounds = None
+        if isinstance(chunk, tuple):
+            chunk_bounds = chunk
+        else:
+            schema_file = io.StringIO(chunk)
+
+        table_template_analyser = schema_processor.cql_table_template_analyser
+        table_templates = []
+        template_idxs = {}
+        chunk_tables = []
+        for dom_obj in schema_processor.cql_schema_paser.iter_schema(
+                schema_file,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                stats=schema_processor.stats,
+                diagnostics_collector=schema_processor.diagnostics_collector,
+                source_name=source_name,
+                keyspace_context=keyspace_context,
+                chunk_bounds=chunk_bounds):
+            template, columns_hash, props_hash = table_template_analyser.get_table_template(dom_obj)
+            template_idx = template_idxs.get((columns_hash, props_hash))
+            if template_idx is None:
+                if isinstance(template['statement'], schema_definitions.StatementRef):
+                    template['statement'] = (template['statement'].start, template['statement'].end)
+                template_idx = template_idxs[(columns_hash, props_hash)] = len(table_templates)
+                table_templates.append((columns_hash, props_hash, template))
+            chunk_tables.append((dom_obj.name, template_idx))
+
+        stats_dict = schema_processor.stats.as_dict() if collect_stats else None
+        return table_templates, chunk_tables, stats_dict, schema_processor.diagnostics_collector.as_dict()
+
+    # Catalogs the tables handed back by catalog_schema_chunk_worker() for each chunk, in the order of the chunks.
+    # Statements handed back as byte offsets are referenced in the parent's own mapping of the schema file.
+    def __catalog_chunk_results(self, schema_file, chunk_results, source):
+        schema_map = None
+        for table_templates, chunk_tables, stats_dict, diagnostics_dict in chunk_results:
+            with self.__timer('catalog.merge'):
+                for _, _, template in table_templates:
+                    if isinstance(template['statement'], tuple):
+                        if schema_map is None:
+                            schema_map = schema_sources.SchemaSources().map_schema_file(schema_file)
+                        template['statement'] = schema_definitions.StatementRef(schema_map, *template['statement'])
+
+                for table_name, template_idx in chunk_tables:
+                    columns_hash, props_hash, template = table_templates[template_idx]
+                    self.cql_table_template_analyser.catalog_table_template(
+                        table_name,
+                        template,
+                        columns_hash,
+                        props_hash,
+                        source=source
+                    )
+
+            if stats_dict is not None:
+                self.stats.merge(stats_dict)
+            self.diagnostics_collector.merge(diagnostics_dict)
+
+    # Yields the results of running the worker on each work item, in the order of the work items. No more than
+    # max_pending items are submitted ahead of the result being waited on, so that the work items are read no faster
+    # than they are processed.
+    @staticmethod
+    def __iter_ordered_results(executor, worker, work_items, max_pending):
+        pending_results = collections.deque()
+        for work_item in work_items:
+            pending_results.append(executor.submit(worker, work_item))
+            if len(pending_results) >= max_pending:
+                yield pending_results.popleft().result()
+
+        while pending_results:
+            yield pending_results.popleft().result()
+
+    # Splits a schema file into chunks of statements and parses the chunks in worker processes while the file is still
+    # being read. The tables of each chunk are catalogued in this process in the order of the chunks, so the catalog is
+    # the same as when the file is parsed in a single process. A file that fits in a single chunk is parsed in this
+    # process, in the same way as with a single job, without starting any workers.
+    def __catalog_schema_parallel(self, schema_file, jobs, ignore_keyspace, select_keyspace, parse_reserved_keyspaces,
+                                  source):
+        schema_chunks = (
+            (schema_file, '{} [chunk {}]'.format(schema_file, chunk_idx), keyspace_context, chunk)
+            for chunk_idx, (keyspace_context, chunk) in enumerate(
+                schema_parser.SchemaParser().iter_schema_chunks(schema_file, chunk_size=self.parallel_chunk_size)
+            )
+        )
+        first_chunks = list(itertools.islice(schema_chunks, 2))
+        if len(first_chunks) < 2:
+            self.catalog_schema(
+                schema_file,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                source=source
+            )
+            return
+
+        chunk_worker = functools.partial(
+            SchemaProcessor.catalog_schema_chunk_worker,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            collect_stats=self.stats is not None,
+            verbosity=self.diagnostics_collector.verbosity
+        )
+
+        max_workers = jobs or os.cpu_count()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            self.__catalog_chunk_results(
+                schema_file,
+                self.__iter_ordered_results(
+                    executor,
+                    chunk_worker,
+                    itertools.chain(first_chunks, schema_chunks),
+                    max_workers * 2
+                ),
+                source
+            )
+
+    # Catalogs each schema in a tar archive as it is read from the archive, tagging each occurrence with the archive
+    # member it came from. Archives are not cached, as their members can not be read independently of each other.
+    def __catalog_schema_archive(self, schema_file, ignore_keyspace, select_keyspace, parse_reserved_keyspaces):
+        for source_name, cql_stream in self.schema_sources.iter_sources(schema_file):
+            for dom_obj in schema_parser.SchemaParser().iter_schema(
+                    cql_stream,
+                    ignore_keyspace=ignore_keyspace,
+                    select_keyspace=select_keyspace,
+                    parse_reserved_keyspaces=parse_reserved_keyspaces,
+                    stats=self.stats,
+                    diagnostics_collector=self.diagnostics_collector,
+                    source_name=source_name):
+                self.cql_table_template_analyser.catalog_table_definition(dom_obj, source=source_name)
+
+    # Catalogs a schema file against the catalog saved by the previous run. If the file is unchanged the saved catalog
+    # is used as is. Otherwise the catalog is rebuilt in the order of the statements, so that it is the same as when the
+    # file is catalogued without a cache, but statements seen before are not re-parsed and tables whose statements are
+    # unchanged are not re-hashed.
+    def __catalog_schema_incremental(self, schema_file, ignore_keyspace, select_keyspace, parse_reserved_keyspaces,
+                                     source, cache_dir):
+        schema_cache = parse_cache.ParseCache(cache_dir)
+        schema_cache.load(schema_file, ignore_keyspace, select_keyspace, parse_reserved_keyspaces, source)
+        file_digest = schema_cache.get_file_digest(schema_file)
+
+        if schema_cache.file_digest == file_digest:
+            self.cql_table_template_analyser.merge(schema_cache.template_definitions)
+            return
+
+        schema_analyser = table_template_analyser.TableTemplateAnalyser(stats=self.stats)
+        catalogued_tables = {}
+        table_ordinals = collections.Counter()
+        for dom_obj in self.cql_schema_paser.iter_schema(
+                schema_file,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                statement_cache=schema_cache,
+                stats=self.stats,
+                diagnostics_collector=self.diagnostics_collector):
+            table_key = (dom_obj.name, table_ordinals[dom_obj.name])
+            table_ordinals[dom_obj.name] += 1
+
+            statement_digest = schema_cache.get_digest(dom_obj.statement)
+            cached_table = schema_cache.tables.get(table_key)
+            if cached_table and cached_table[0] == statement_digest:
+                _, columns_hash, props_hash = cached_table
+                template = schema_analyser.build_table_template(dom_obj)
+            else:
+                template, columns_hash, props_hash = schema_analyser.get_table_template(dom_obj)
+
+            schema_analyser.catalog_table_template(dom_obj.name, template, columns_hash, props_hash, source=source)
+            catalogued_tables[table_key] = (statement_digest, columns_hash, props_hash)
+
+        schema_cache.save(file_digest, catalogued_tables, schema_analyser.template_definitions)
+        self.cql_table_template_analyser.merge(schema_analyser.template_definitions)
+
+    def catalog_system_schema(self, export_dir, ignore_keyspace=None, select_keyspace=None,
+                              parse_reserved_keyspaces=False, source=None):
+        for dom_obj in system_schema_loader.SystemSchemaLoader().iter_schema(
+                export_dir,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                stats=self.stats,
+                diagnostics_collector=self.diagnostics_collector):
+            self.cql_table_template_analyser.catalog_table_definition(dom_obj, source=source)
+
+    # Catalogs one or more directories of system_schema exports. When there is more than one, each occurrence is tagged
+    # with the directory it came from.
+    def process_system_schemas(self, export_dirs, ignore_keyspace=None, select_keyspace=None,
+                               parse_reserved_keyspaces=False):
+        for export_dir in export_dirs:
+            self.catalog_system_schema(
+                export_dir,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces,
+                source=export_dir if len(export_dirs) > 1 else None
+            )
+
+        self.__print_report()
 
-    def process_schema(self, schema_file, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False):
-        cql_schema_dom = self.cql_schema_paser.parse_schema(
+    def process_schema(self, schema_file, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                       cache_dir=None, jobs=1):
+        self.catalog_schema(
             schema_file,
             ignore_keyspace=ignore_keyspace,
             select_keyspace=select_keyspace,
-            parse_reserved_keyspaces=parse_reserved_keyspaces
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            cache_dir=cache_dir,
+            jobs=jobs
         )
 
-        for dom_obj in cql_schema_dom:
-            self.cql_table_template_analyser.catalog_table_definition(dom_obj)
+        self.__print_report()
 
-        self.cql_table_template_analyser.print_table_definitions()
+    # Runs in a worker process. Each worker builds its own catalog for a single schema file and hands back the
+    # template definitions and diagnostics, along with its processing stats when asked for, so that they can be merged
+    # by the parent process.
+    @staticmethod
+    def catalog_schema_worker(schema_file, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                              cache_dir=None, collect_stats=False, verbosity=diagnostics.DiagnosticsCollector.SUMMARY,
+                              member_patterns=None):
+        schema_processor = SchemaProcessor(
+            stats=processing_stats.ProcessingStats() if collect_stats else None,
+            verbosity=verbosity,
+            member_patterns=member_patterns
+        )
+        schema_processor.catalog_schema(
+            schema_file,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            source=schema_file,
+            cache_dir=cache_dir
+        )
+
+        stats_dict = schema_processor.stats.as_dict() if collect_stats else None
+        return (
+            schema_processor.cql_table_template_analyser.template_definitions,
+            stats_dict,
+            schema_processor.diagnostics_collector.as_dict()
+        )
+
+    # Expands directories (recursively) and glob patterns into a sorted list of schema files. Paths that are neither
+    # are passed through as is. Duplicates are dropped.
+    @staticmethod
+    def expand_schema_paths(schema_paths):
+        schema_files = []
+        for schema_path in schema_paths:
+            if os.path.isdir(schema_path):
+                for dir_path, _, file_names in os.walk(schema_path):
+                    schema_files.extend(os.path.join(dir_path, file_name) for file_name in file_names)
+            elif any(glob_char in schema_path for glob_char in '*?['):
+                schema_files.extend(
+                    file_path for file_path in glob.glob(schema_path, recursive=True) if os.path.isfile(file_path)
+                )
+            else:
+                schema_files.append(schema_path)
+
+        return sorted(set(schema_files))
+
+    def __merge_worker_results(self, worker_results):
+        for template_definitions, stats_dict, diagnostics_dict in worker_results:
+            with self.__timer('catalog.merge'):
+                self.cql_table_template_analyser.merge(template_definitions)
+            if stats_dict is not None:
+                self.stats.merge(stats_dict)
+            self.diagnostics_collector.merge(diagnostics_dict)
+
+    def process_schemas(self, schema_paths, jobs=1, ignore_keyspace=None, select_keyspace=None,
+                        parse_reserved_keyspaces=False, cache_dir=None):
+        schema_files = self.expand_schema_paths(schema_paths)
+
+        catalog_worker = functools.partial(
+            SchemaProcessor.catalog_schema_worker,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            cache_dir=cache_dir,
+            collect_stats=self.stats is not None,
+            verbosity=self.diagnostics_collector.verbosity,
+            member_patterns=self.schema_sources.member_patterns
+        )
+
+        if jobs == 1 or len(schema_files) == 1:
+            self.__merge_worker_results(map(catalog_worker, schema_files))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                self.__merge_worker_results(executor.map(catalog_worker, schema_files))
+
+        self.__print_report()
+
+    # Catalogs the schema files once and keeps the catalog in memory, answering queries about it over a Unix socket or
+    # TCP address until the process is stopped. Each file is catalogued in its own worker process so that it can be
+    # re-loaded on its own.
+    def serve_schemas(self, schema_paths, address, jobs=None, ignore_keyspace=None, select_keyspace=None,
+                      parse_reserved_keyspaces=False, cache_dir=None, allow_remote=False):
+        catalog_worker = functools.partial(
+            SchemaProcessor.catalog_schema_worker,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            cache_dir=cache_dir,
+            verbosity=self.diagnostics_collector.verbosity,
+            member_patterns=self.schema_sources.member_patterns
+        )
+
+        analysis_daemon.AnalysisDaemon(
+            catalog_worker,
+            self.expand_schema_paths(schema_paths),
+            jobs=jobs,
+            verbosity=self.diagnostics_collector.verbosity,
+            allow_remote=allow_remote
+        ).run(address)
+
+    # Runs in a worker process. Fingerprints every table in a schema file and hands back the fingerprints and
+    # diagnostics so that they can be compared by the parent process. A schema file holds the schema of a single node,
+    # unless it is a diagnostic tarball, which holds one schema per node. The fingerprints are returned as a list of
+    # (source_name, table_fingerprints) pairs, one per node.
+    @staticmethod
+    def fingerprint_schema_worker(schema_file, ignore_keyspace=None, select_keyspace=None,
+                                  parse_reserved_keyspaces=False, verbosity=diagnostics.DiagnosticsCollector.SUMMARY,
+                                  member_patterns=None):
+        diagnostics_collector = diagnostics.DiagnosticsCollector(verbosity=verbosity)
+        template_fingerprinter = fingerprint.TemplateFingerprinter()
+
+        node_fingerprints = []
+        for source_name, cql_stream in schema_sources.SchemaSources(member_patterns=member_patterns).iter_sources(
+                schema_file):
+            node_fingerprints.append((source_name, schema_comparator.SchemaComparator.get_table_fingerprints(
+                schema_parser.SchemaParser().iter_schema(
+                    cql_stream,
+                    ignore_keyspace=ignore_keyspace,
+                    select_keyspace=select_keyspace,
+                    parse_reserved_keyspaces=parse_reserved_keyspaces,
+                    diagnostics_collector=diagnostics_collector,
+                    source_name=source_name,
+                    keep_column_names=True
+                ),
+                template_fingerprinter
+            )))
+
+        return node_fingerprints, diagnostics_collector.as_dict()
+
+    # Treats each schema file as the schema of one node and reports the tables that are not identical on every node.
+    # Nodes are named after their schema files, relative to the directory that the files have in common. Each schema in
+    # a diagnostic tarball is treated as a node of its own, named <tarball>:<member>.
+    def compare_schemas(self, schema_paths, jobs=None, ignore_keyspace=None, select_keyspace=None,
+                        parse_reserved_keyspaces=False):
+        schema_files = self.expand_schema_paths(schema_paths)
+        common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in schema_files])
+
+        fingerprint_worker = functools.partial(
+            SchemaProcessor.fingerprint_schema_worker,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            verbosity=self.diagnostics_collector.verbosity,
+            member_patterns=self.schema_sources.member_patterns
+        )
+
+        node_comparator = schema_comparator.SchemaComparator()
+        with contextlib.ExitStack() as worker_stack:
+            if jobs == 1 or len(schema_files) == 1:
+                worker_results = map(fingerprint_worker, schema_files)
+            else:
+                executor = worker_stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=jobs))
+                worker_results = executor.map(fingerprint_worker, schema_files)
+
+            for schema_file, (node_fingerprints, diagnostics_dict) in zip(schema_files, worker_results):
+                node_path = os.path.relpath(os.path.abspath(schema_file), common_dir)
+                for source_name, table_fingerprints in node_fingerprints:
+                    node_comparator.add_node(node_path + source_name[len(schema_file):], table_fingerprints)
+                self.diagnostics_collector.merge(diagnostics_dict)
+
+        report_file = self.report_file if self.report_file is not None else sys.stdout
+        with self.__timer('report.print'):
+            if self.report_format == 'text':
+                node_comparator.print_disagreement_matrix(out_file=report_file)
+            else:
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    node_comparator.get_record_fields()
+                ).write_records(node_comparator.iter_disagreement_records())
+
+        self.diagnostics_collector.log_summary()
+
+    # Reports how many writes each mutation of a table turns into because of its materialized views and indexes, along
+    # with the user defined types that it uses. All of the schema files are parsed in this process, and objects that
+    # are defined in more than one file are counted once.
+    def report_write_amplification(self, schema_paths, ignore_keyspace=None, select_keyspace=None,
+                                   parse_reserved_keyspaces=False):
+        write_amplification_analyser = write_amplification.WriteAmplificationAnalyser()
+        for schema_file in self.expand_schema_paths(schema_paths):
+            for source_name, cql_stream in self.schema_sources.iter_sources(schema_file):
+                for dom_obj in schema_parser.SchemaParser().iter_schema(
+                        cql_stream,
+                        ignore_keyspace=ignore_keyspace,
+                        select_keyspace=select_keyspace,
+                        parse_reserved_keyspaces=parse_reserved_keyspaces,
+                        stats=self.stats,
+                        diagnostics_collector=self.diagnostics_collector,
+                        source_name=source_name,
+                        include_dependent_objects=True):
+                    write_amplification_analyser.add_schema_object(dom_obj)
+
+        report_file = self.report_file if self.report_file is not None else sys.stdout
+        with self.__timer('report.print'):
+            if self.report_format == 'text':
+                write_amplification_analyser.print_write_amplification_report(out_file=report_file)
+            else:
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    write_amplification_analyser.record_fields
+                ).write_records(write_amplification_analyser.iter_write_amplification_records())
+
+        self.diagnostics_collector.log_summary()
+
+    # Yields a (source, table_definition) pair for every table parsed from the schema files, or loaded from the
+    # system_schema export directories, as it is parsed or loaded. When more than one schema file or export directory
+    # is given, or a schema file is an archive, the source is the file, directory or archive member the table came from.
+    # Otherwise it is None.
+    def __iter_table_definitions(self, schema_paths, system_schema=False, ignore_keyspace=None, select_keyspace=None,
+                                 parse_reserved_keyspaces=False):
+        schema_files = schema_paths if system_schema else self.expand_schema_paths(schema_paths)
+        for schema_file in schema_files:
+            if system_schema:
+                schema_sources_iter = [(schema_file, schema_file)]
+            else:
+                schema_sources_iter = self.schema_sources.iter_sources(schema_file)
+
+            for source_name, schema_source in schema_sources_iter:
+                if system_schema:
+                    schema_loader = system_schema_loader.SystemSchemaLoader()
+                else:
+                    schema_loader = schema_parser.SchemaParser()
+
+                tag_source = len(schema_files) > 1 or source_name != schema_file
+                for dom_obj in schema_loader.iter_schema(
+                        schema_source,
+                        ignore_keyspace=ignore_keyspace,
+                        select_keyspace=select_keyspace,
+                        parse_reserved_keyspaces=parse_reserved_keyspaces,
+                        stats=self.stats,
+                        diagnostics_collector=self.diagnostics_collector):
+                    yield source_name if tag_source else None, dom_obj
+
+    # Runs the rules of a SchemaRuleEngine against every table, as each table is parsed or loaded, and reports the
+    # tables that break them. Returns the number of findings.
+    def check_schemas(self, schema_paths, rule_engine, system_schema=False, ignore_keyspace=None, select_keyspace=None,
+                      parse_reserved_keyspaces=False):
+        for source, dom_obj in self.__iter_table_definitions(
+                schema_paths,
+                system_schema=system_schema,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces):
+            with self.__timer('rules.check'):
+                rule_engine.check_table_definition(dom_obj, source=source)
+
+        report_file = self.report_file if self.report_file is not None else sys.stdout
+        with self.__timer('report.print'):
+            if self.report_format == 'text':
+                rule_engine.print_findings(out_file=report_file)
+            else:
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    rule_engine.record_fields
+                ).write_records(rule_engine.iter_finding_records())
+
+        self.diagnostics_collector.log_summary()
+        return rule_engine.get_finding_count()
+
+    # Reports the tables whose performance related properties, such as compaction and caching, differ from those of
+    # most tables with the same template.
+    def report_property_drift(self, schema_paths, system_schema=False, ignore_keyspace=None, select_keyspace=None,
+                              parse_reserved_keyspaces=False):
+        drift_analyser = property_drift.PropertyDriftAnalyser()
+        for source, dom_obj in self.__iter_table_definitions(
+                schema_paths,
+                system_schema=system_schema,
+                ignore_keyspace=ignore_keyspace,
+                select_keyspace=select_keyspace,
+                parse_reserved_keyspaces=parse_reserved_keyspaces):
+            with self.__timer('drift.add'):
+                drift_analyser.add_table_definition(dom_obj, source=source)
+
+        report_file = self.report_file if self.report_file is not None else sys.stdout
+        with self.__timer('report.print'):
+            if self.report_format == 'text':
+                drift_analyser.print_drift_report(out_file=report_file)
+            else:
+                report_writers.report_writers[self.report_format](
+                    report_file,
+                    drift_analyser.record_fields
+                ).write_records(drift_analyser.iter_drift_records())
+
+        self.diagnostics_collector.log_summary()
 
     @staticmethod
     def main_cli():
         arg_parser = argparse.ArgumentParser(description='Process a CQL schema file and output the table definitions.')
-        arg_parser.add_argument('schema_file', help='The CQL schema file to process.')
+        arg_parser.add_argument(
+            'schema_files',
+            nargs='*',
+            metavar='schema_file',
+            help='One or more CQL schema files to process. Directories are searched recursively and glob patterns are '
+                 'expanded. When more than one file is given, each occurrence is tagged with the file it came from.'
+        )
+        arg_parser.add_argument(
+            '-S',
+            '--system-schema',
+            dest='system_schema_dirs',
+            nargs='+',
+            default=[],
+            help='One or more directories holding exports of the system_schema tables, columns and, optionally, '
+                 'keyspaces tables to process instead of CQL schema files. Exports are read from <table>.csv files '
+                 'written by cqlsh COPY ... TO with HEADER = true, or from <table>.json or <table>.jsonl files of '
+                 'rows. The tables are loaded directly from the exports without parsing any CQL.'
+        )
+        arg_parser.add_argument(
+            '--archive-member',
+            dest='member_patterns',
+            nargs='+',
+            default=None,
+            help='Glob patterns of the tar archive members to read schemas from. Schema files that are tar archives, '
+                 'such as DSE and OpsCenter diagnostic tarballs, are read as a stream without being extracted, and '
+                 'each matching member is processed as a separate schema. Defaults to "*/cqlsh/describe_schema" and '
+                 '"*.cql". Schema files and members compressed with gzip, xz or bzip2 are decompressed as they are '
+                 'read.'
+        )
         arg_parser.add_argument(
             '-i',
             '--ignore-keyspace',
@@ -67,16 +743,342 @@ class SchemaProcessor:
             help='Parse the reserved dse*, OpsCenter, solr, and system* keyspaces. '
                  'By default, these keyspaces are ignored.'
         )
+        arg_parser.add_argument(
+            '--compare',
+            dest='compare',
+            action='store_true',
+            help='Treat each schema file as the schema dump of one node, and report the tables that differ between '
+                 'nodes instead of the table templates. Each table that differs is listed with a label for the '
+                 'version held by each node; "A" is the version held by the most nodes and "-" means the node does '
+                 'not have the table.'
+        )
+        arg_parser.add_argument(
+            '--serve',
+            dest='serve_address',
+            default=None,
+            help='Catalog the schema files once and keep running, answering queries about the catalog instead of '
+                 'printing a report. The address is either the path of a Unix socket or [<host>]:<port> to listen on '
+                 'TCP, where the host defaults to 127.0.0.1. Requests and responses are JSON objects, one per line; '
+                 'e.g. {"op": "duplicates", "table": "ks.tbl"}, {"op": "templates", "min_occurrences": 10}, '
+                 '{"op": "reload", "path": "schema.cql"} or {"op": "status"}. Only the schema files given can be '
+                 'reloaded.'
+        )
+        arg_parser.add_argument(
+            '--allow-remote',
+            dest='allow_remote',
+            action='store_true',
+            help='Allow --serve to listen on a TCP host other than a loopback address. The daemon has no '
+                 'authentication, so anyone who can reach the address can query the catalog and reload it.'
+        )
+        arg_parser.add_argument(
+            '--write-amplification',
+            dest='write_amplification',
+            action='store_true',
+            help='Report the number of writes each mutation of a table turns into because of its materialized views '
+                 'and indexes, and the depth to which the user defined types used by the table are nested, instead of '
+                 'the table templates.'
+        )
+        arg_parser.add_argument(
+            '--check',
+            dest='check',
+            action='store_true',
+            help='Check every table for partition key hotspots and other schema anti-patterns, and report the tables '
+                 'that break a rule instead of the table templates. The built-in rules flag low cardinality partition '
+                 'keys, unbucketed time series, non-frozen collections, counters mixed with regular columns and '
+                 'tables with more than 100 columns. Exits with status 1 when any table breaks a rule.'
+        )
+        arg_parser.add_argument(
+            '--rules',
+            dest='rules_files',
+            nargs='+',
+            default=[],
+            help='Python files of user defined rules to check along with the built-in rules. Each file must define a '
+                 'list of cql_schema_analyser.schema_rules.SchemaRule instances named "rules". A rule with the same '
+                 'code as a built-in rule replaces it.'
+        )
+        arg_parser.add_argument(
+            '--property-drift',
+            dest='property_drift',
+            action='store_true',
+            help='Report the tables whose compaction, compression, caching, gc_grace_seconds, default_time_to_live, '
+                 'speculative_retry and other performance related properties differ from those of most tables with '
+                 'the same template, instead of the table templates. Map properties are compared key by key, e.g. '
+                 'compaction.class.'
+        )
+        arg_parser.add_argument(
+            '--consolidation',
+            dest='cost_model',
+            nargs='?',
+            const='',
+            default=None,
+            help='Report what merging the tables of each template into one table would save, instead of the table '
+                 'templates. Templates are ranked by the heap they would save, and the cluster-wide totals are '
+                 'reported first. The savings are estimated from fixed per-table costs, which can be given as a JSON '
+                 'file with any of the keys: {}. Costs that are not given are left at their defaults.'.format(
+                    ', '.join(cost_models.TableCostModel.default_costs)
+                 )
+        )
+        arg_parser.add_argument(
+            '--cluster-nodes',
+            dest='node_count',
+            type=int,
+            default=1,
+            help='Number of nodes in the cluster, each of which holds every table, used to total the consolidation '
+                 'savings. Defaults to 1.'
+        )
+        arg_parser.add_argument(
+            '-j',
+            '--jobs',
+            dest='jobs',
+            type=int,
+            default=None,
+            help='Number of worker processes used to parse multiple schema files, or the chunks of a single large '
+                 'schema file. Defaults to the number of CPUs. Use 1 to parse everything in a single process.'
+        )
+        arg_parser.add_argument(
+            '-n',
+            '--near-duplicate-threshold',
+            dest='near_duplicate_threshold',
+            type=float,
+            default=None,
+            help='Report templates whose column types and keys are near duplicates of each other. The value is the '
+                 'minimum Jaccard similarity, between 0 and 1, for two templates to be reported; e.g. 0.8. Near '
+                 'duplicates are found with a MinHash LSH index so the search stays fast on large catalogs.'
+        )
+        arg_parser.add_argument(
+            '-c',
+            '--cache-dir',
+            dest='cache_dir',
+            default=None,
+            help='Directory used to cache parsed statements and catalogs between runs. Unchanged schema files are not '
+                 're-parsed, and only added or changed tables are parsed and hashed again for files that have changed.'
+        )
+        arg_parser.add_argument(
+            '--stats',
+            dest='stats_file',
+            default=None,
+            help='Write timings and counters for each processing stage to this file as JSON. Use "-" to write them '
+                 'to stderr.'
+        )
+        arg_parser.add_argument(
+            '--profile',
+            dest='profile_file',
+            default=None,
+            help='Profile the run with cProfile and write the profile to this file. It can be read with pstats, e.g. '
+                 '"python -m pstats <file>". Only the parent process is profiled when multiple files are processed.'
+        )
+        arg_parser.add_argument(
+            '-v',
+            '--verbosity',
+            dest='verbosity',
+            type=int,
+            choices=[
+                diagnostics.DiagnosticsCollector.QUIET,
+                diagnostics.DiagnosticsCollector.SUMMARY,
+                diagnostics.DiagnosticsCollector.VERBOSE
+            ],
+            default=diagnostics.DiagnosticsCollector.SUMMARY,
+            help='How much to log about keyspaces, skipped tables and malformed statements. 0 only summarises '
+                 'warnings and errors, 1 summarises everything at the end of the run, and 2 also logs every event as '
+                 'it happens. Defaults to 1.'
+        )
+        arg_parser.add_argument(
+            '-f',
+            '--output-format',
+            dest='output_format',
+            choices=['text'] + sorted(report_writers.report_writers),
+            default='text',
+            help='Format of the report. "text" is the human readable report. "jsonl" writes one JSON object per line '
+                 'and "csv" writes one row per record, for loading into other tools. Defaults to text.'
+        )
+        arg_parser.add_argument(
+            '-g',
+            '--granularity',
+            dest='granularity',
+            choices=['template', 'occurrence'],
+            default=None,
+            help='Whether the jsonl and csv reports have one record per template or one record per catalogued table. '
+                 'Defaults to template.'
+        )
+        arg_parser.add_argument(
+            '-o',
+            '--output',
+            dest='output_file',
+            default=None,
+            help='File to write the report to. Defaults to stdout.'
+        )
         schema_proc_args = arg_parser.parse_args()
 
-        schema_processor = SchemaProcessor()
-        schema_processor.process_schema(
-            schema_proc_args.schema_file,
-            ignore_keyspace=schema_proc_args.ignore_keyspace,
-            select_keyspace=schema_proc_args.select_keyspace,
-            parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+        if bool(schema_proc_args.schema_files) == bool(schema_proc_args.system_schema_dirs):
+            arg_parser.error('either schema files or --system-schema directories must be given, but not both')
+        if schema_proc_args.compare and not schema_proc_args.schema_files:
+            arg_parser.error('--compare requires schema files')
+        if schema_proc_args.serve_address and (schema_proc_args.compare or not schema_proc_args.schema_files):
+            arg_parser.error('--serve requires schema files and cannot be used with --compare')
+        if schema_proc_args.allow_remote and not schema_proc_args.serve_address:
+            arg_parser.error('--allow-remote requires --serve')
+        serve_address = schema_proc_args.serve_address and analysis_daemon.AnalysisDaemon.parse_address(
+            schema_proc_args.serve_address
+        )
+        if serve_address and not schema_proc_args.allow_remote and (
+                not analysis_daemon.AnalysisDaemon.is_loopback_host(serve_address[0])):
+            arg_parser.error('--serve on the non-loopback host {} requires --allow-remote'.format(serve_address[0]))
+        if schema_proc_args.cost_model is not None and (schema_proc_args.compare or schema_proc_args.serve_address):
+            arg_parser.error('--consolidation cannot be used with --compare or --serve')
+        if schema_proc_args.cost_model is not None and (
+                schema_proc_args.near_duplicate_threshold is not None or schema_proc_args.granularity is not None):
+            arg_parser.error('--consolidation cannot be used with --near-duplicate-threshold or --granularity')
+        if schema_proc_args.write_amplification and (
+                schema_proc_args.compare or schema_proc_args.serve_address or schema_proc_args.cost_model is not None or
+                not schema_proc_args.schema_files):
+            arg_parser.error('--write-amplification requires schema files and cannot be used with --compare, --serve '
+                             'or --consolidation')
+
+        if (schema_proc_args.check or schema_proc_args.rules_files) and (
+                schema_proc_args.compare or schema_proc_args.serve_address or schema_proc_args.cost_model is not None or
+                schema_proc_args.write_amplification):
+            arg_parser.error('--check and --rules cannot be used with --compare, --serve, --consolidation or '
+                             '--write-amplification')
+
+        if schema_proc_args.property_drift and (
+                schema_proc_args.compare or schema_proc_args.serve_address or schema_proc_args.cost_model is not None or
+                schema_proc_args.write_amplification or schema_proc_args.check or schema_proc_args.rules_files):
+            arg_parser.error('--property-drift cannot be used with --compare, --serve, --consolidation, '
+                             '--write-amplification, --check or --rules')
+
+        rule_engine = None
+        if schema_proc_args.check or schema_proc_args.rules_files:
+            rule_engine = schema_rules.SchemaRuleEngine()
+            for rules_file in schema_proc_args.rules_files:
+                try:
+                    rule_engine.add_rules(schema_rules.SchemaRuleEngine.load_rules(rules_file))
+                except (OSError, ImportError) as rules_error:
+                    arg_parser.error('invalid --rules file: {}'.format(rules_error))
+
+        cost_model = None
+        if schema_proc_args.cost_model is not None:
+            try:
+                if schema_proc_args.cost_model:
+                    cost_model = cost_models.TableCostModel.from_json_file(schema_proc_args.cost_model)
+                else:
+                    cost_model = cost_models.TableCostModel()
+            except (OSError, ValueError, TypeError) as cost_model_error:
+                arg_parser.error('invalid --consolidation cost model: {}'.format(cost_model_error))
+
+        logging.basicConfig(
+            format='[%(levelname)s] %(message)s',
+            level=logging.WARNING if schema_proc_args.verbosity == diagnostics.DiagnosticsCollector.QUIET else
+            logging.INFO
         )
 
+        schema_processor = SchemaProcessor(
+            near_duplicate_threshold=schema_proc_args.near_duplicate_threshold,
+            stats=processing_stats.ProcessingStats() if schema_proc_args.stats_file else None,
+            verbosity=schema_proc_args.verbosity,
+            report_format=schema_proc_args.output_format,
+            report_granularity=schema_proc_args.granularity or 'template',
+            member_patterns=schema_proc_args.member_patterns,
+            cost_model=cost_model,
+            node_count=schema_proc_args.node_count
+        )
+
+        profiler = None
+        if schema_proc_args.profile_file:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        # The run fails when a checked table breaks a rule, so that --check can gate a deployment.
+        finding_count = 0
+
+        # The csv module expects files to be opened with newline='' so that it controls the line endings itself.
+        report_file_context = contextlib.nullcontext()
+        if schema_proc_args.output_file:
+            report_file_context = open(schema_proc_args.output_file, 'w', newline='')
+
+        with report_file_context as report_file:
+            schema_processor.report_file = report_file
+
+            if schema_proc_args.serve_address:
+                schema_processor.serve_schemas(
+                    schema_proc_args.schema_files,
+                    schema_proc_args.serve_address,
+                    jobs=schema_proc_args.jobs,
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces,
+                    cache_dir=schema_proc_args.cache_dir,
+                    allow_remote=schema_proc_args.allow_remote
+                )
+            elif rule_engine is not None:
+                finding_count = schema_processor.check_schemas(
+                    schema_proc_args.schema_files or schema_proc_args.system_schema_dirs,
+                    rule_engine,
+                    system_schema=bool(schema_proc_args.system_schema_dirs),
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+                )
+            elif schema_proc_args.property_drift:
+                schema_processor.report_property_drift(
+                    schema_proc_args.schema_files or schema_proc_args.system_schema_dirs,
+                    system_schema=bool(schema_proc_args.system_schema_dirs),
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+                )
+            elif schema_proc_args.write_amplification:
+                schema_processor.report_write_amplification(
+                    schema_proc_args.schema_files,
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+                )
+            elif schema_proc_args.compare:
+                schema_processor.compare_schemas(
+                    schema_proc_args.schema_files,
+                    jobs=schema_proc_args.jobs,
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+                )
+            elif schema_proc_args.system_schema_dirs:
+                schema_processor.process_system_schemas(
+                    schema_proc_args.system_schema_dirs,
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces
+                )
+            elif len(schema_proc_args.schema_files) == 1 and os.path.isfile(schema_proc_args.schema_files[0]):
+                schema_processor.process_schema(
+                    schema_proc_args.schema_files[0],
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces,
+                    cache_dir=schema_proc_args.cache_dir,
+                    jobs=schema_proc_args.jobs
+                )
+            else:
+                schema_processor.process_schemas(
+                    schema_proc_args.schema_files,
+                    jobs=schema_proc_args.jobs,
+                    ignore_keyspace=schema_proc_args.ignore_keyspace,
+                    select_keyspace=schema_proc_args.select_keyspace,
+                    parse_reserved_keyspaces=schema_proc_args.parse_reserved_keyspaces,
+                    cache_dir=schema_proc_args.cache_dir
+                )
+
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(schema_proc_args.profile_file)
+
+        if schema_proc_args.stats_file == '-':
+            schema_processor.stats.write_json(sys.stderr)
+        elif schema_proc_args.stats_file:
+            with open(schema_proc_args.stats_file, 'w') as out_stats:
+                schema_processor.stats.write_json(out_stats)
+
+        return 1 if finding_count else 0
+
 
 if __name__ == '__main__':
     sys.exit(SchemaProcessor.main_cli())
\ No newline at end of file
@@ -0,0 +1,211 @@
+import importlib.util
+import logging
+import sys
+
+
+class SchemaRule:
+    # A check run against every table. Subclasses set a code, a severity (a logging level) and a description, and
+    # implement check(), which returns a message describing the problem with a table or None when there is none.
+    code = None
+    severity = logging.WARNING
+    description = ''
+
+    def check(self, table_definition):
+        raise NotImplementedError
+
+
+class LowCardinalityPartitionKeyRule(SchemaRule):
+    code = 'low_cardinality_partition_key'
+    severity = logging.ERROR
+    description = 'Partition keys made only of low cardinality types put all of the data in a handful of partitions.'
+
+    low_cardinality_types = frozenset(['boolean', 'date', 'tinyint'])
+
+    def check(self, table_definition):
+        partition_key = table_definition.partition_key
+        if all(key_type.lower() in self.low_cardinality_types for key_type in partition_key):
+            return 'Partition key is ({}).'.format(', '.join(partition_key))
+        return None
+
+
+class UnbucketedTimeSeriesRule(SchemaRule):
+    code = 'unbucketed_time_series'
+    severity = logging.WARNING
+    description = 'Time series tables with a single column partition key and no time bucket grow without bound.'
+
+    time_types = frozenset(['timestamp', 'timeuuid', 'date', 'time'])
+
+    def check(self, table_definition):
+        partition_key = table_definition.partition_key
+        clustering_key = table_definition.clustering_key
+        if len(partition_key) != 1 or partition_key[0].lower() in self.time_types:
+            return None
+
+        if clustering_key and clustering_key[0].lower() in self.time_types:
+            return 'Partition key is ({}) and the first clustering column is a {}.'.format(
+                partition_key[0],
+                clustering_key[0]
+            )
+        return None
+
+
+class UnboundedCollectionRule(SchemaRule):
+    code = 'unbounded_collection'
+    severity = logging.WARNING
+    description = 'Non-frozen collections can grow without bound, and are read whole.'
+
+    collection_prefixes = ('list<', 'set<', 'map<')
+
+    def check(self, table_definition):
+        collection_types = [
+            column_type for column_type in table_definition.columns
+            if column_type.lower().startswith(self.collection_prefixes)
+        ]
+        if collection_types:
+            return '{} non-frozen collection column{}: {}.'.format(
+                len(collection_types),
+                '' if len(collection_types) == 1 else 's',
+                ', '.join(collection_types)
+            )
+        return None
+
+
+class MixedCounterColumnsRule(SchemaRule):
+    code = 'mixed_counter_columns'
+    severity = logging.ERROR
+    description = 'Counter columns can only be mixed with primary key columns.'
+
+    def check(self, table_definition):
+        column_types = [column_type.lower() for column_type in table_definition.columns]
+        counter_count = column_types.count('counter')
+        key_count = len(table_definition.partition_key) + len(table_definition.clustering_key)
+        regular_count = len(column_types) - counter_count - key_count
+        if counter_count and regular_count > 0:
+            return '{} counter and {} regular column{}.'.format(
+                counter_count,
+                regular_count,
+                '' if regular_count == 1 else 's'
+            )
+        return None
+
+
+class WideTableRule(SchemaRule):
+    code = 'wide_table'
+    severity = logging.WARNING
+    description = 'Tables with very many columns are costly to read, write and compact.'
+
+    def __init__(self, max_columns=100):
+        self.max_columns = max_columns
+
+    def check(self, table_definition):
+        if len(table_definition.columns) > self.max_columns:
+            return '{} columns, more than the {} allowed.'.format(len(table_definition.columns), self.max_columns)
+        return None
+
+
+default_rules = [
+    LowCardinalityPartitionKeyRule(),
+    UnbucketedTimeSeriesRule(),
+    UnboundedCollectionRule(),
+    MixedCounterColumnsRule(),
+    WideTableRule(),
+]
+
+
+class SchemaRuleEngine:
+    record_fields = ['rule', 'severity', 'table', 'source', 'message']
+
+    def __init__(self, rules=None):
+        self.rules = list(default_rules if rules is None else rules)
+
+        # Stores the findings of each rule, keyed on the rule code, in the following format:
+        #
+        #   '<rule_code>': [{'table': '<keyspace.table>', 'source': <schema_file>, 'message': '<message>'}, ...]
+        #
+        self.findings = {rule.code: [] for rule in self.rules}
+        self.tables_checked = 0
+
+    # Loads user defined rules from a Python file. The file must define a list of SchemaRule instances named "rules".
+    @staticmethod
+    def load_rules(rules_file):
+        module_spec = importlib.util.spec_from_file_location('cql_schema_analyser_user_rules', rules_file)
+        if module_spec is None:
+            raise ImportError('Unable to load rules from "{}".'.format(rules_file))
+
+        rules_module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(rules_module)
+
+        user_rules = getattr(rules_module, 'rules', None)
+        if not isinstance(user_rules, (list, tuple)) or not all(isinstance(rule, SchemaRule) for rule in user_rules):
+            raise ImportError('Rules file "{}" must define a list of SchemaRule instances named "rules".'.format(
+                rules_file
+            ))
+
+        return list(user_rules)
+
+    # Adds rules to the engine. A rule with the same code as one that is already in the engine replaces it, so that the
+    # built-in rules can be reconfigured, e.g. with WideTableRule(max_columns=50).
+    def add_rules(self, rules):
+        for rule in rules:
+            self.rules = [engine_rule for engine_rule in self.rules if engine_rule.code != rule.code]
+            self.rules.append(rule)
+            self.findings[rule.code] = []
+
+    # Runs every rule against a table. Tables are checked as they are parsed, so the schema is only read once.
+    def check_table_definition(self, table_definition, source=None):
+        self.tables_checked += 1
+        for rule in self.rules:
+            message = rule.check(table_definition)
+            if message:
+                self.findings[rule.code].append({
+                    'table': table_definition.name,
+                    'source': source,
+                    'message': message,
+                })
+
+    def get_finding_count(self):
+        return sum(len(rule_findings) for rule_findings in self.findings.values())
+
+    # Rules are ordered from the most to the least severe.
+    def __get_rules_by_severity(self):
+        return sorted(self.rules, key=lambda rule: (-rule.severity, rule.code))
+
+    def iter_finding_records(self):
+        for rule in self.__get_rules_by_severity():
+            for finding in self.findings[rule.code]:
+                yield {
+                    'rule': rule.code,
+                    'severity': logging.getLevelName(rule.severity),
+                    'table': finding['table'],
+                    'source': finding['source'],
+                    'message': finding['message'],
+                }
+
+    def print_findings(self, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
+
+        out_file.write('Checked {} tables against {} rules. {} findings.\n'.format(
+            self.tables_checked,
+            len(self.rules),
+            self.get_finding_count()
+        ))
+
+        for rule in self.__get_rules_by_severity():
+            rule_findings = self.findings[rule.code]
+            if not rule_findings:
+                continue
+
+            out_file.write('\n')
+            out_file.write('[{}] {}: {} table{}\n'.format(
+                logging.getLevelName(rule.severity),
+                rule.code,
+                len(rule_findings),
+                '' if len(rule_findings) == 1 else 's'
+            ))
+            out_file.write('{}\n'.format(rule.description))
+            for finding in rule_findings:
+                if finding['source']:
+                    out_file.write('    {} [{}] - {}\n'.format(finding['table'], finding['source'], finding['message']))
+                else:
+                    out_file.write('    {} - {}\n'.format(finding['table'], finding['message']))
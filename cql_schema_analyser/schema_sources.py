@@ -0,0 +1,101 @@
+import bz2
+import codecs
+import fnmatch
+import gzip
+import lzma
+import mmap
+import os
+import tarfile
+
+
+class SchemaSources:
+    # Magic numbers of the compression formats that schema files and archives are decompressed from as they are read.
+    compression_formats = [
+        (b'\x1f\x8b', gzip),
+        (b'\xfd7zXZ\x00', lzma),
+        (b'BZh', bz2),
+    ]
+    compression_extensions = ('.gz', '.xz', '.bz2')
+
+    # Archive members that hold a schema. DSE and OpsCenter diagnostic tarballs keep the output of cqlsh DESCRIBE
+    # SCHEMA for each node in nodes/<node>/cqlsh/describe_schema.
+    default_member_patterns = ['*/cqlsh/describe_schema', '*.cql']
+
+    def __init__(self, member_patterns=None, encoding='utf-8'):
+        self.member_patterns = member_patterns or SchemaSources.default_member_patterns
+        self.encoding = encoding
+
+    @staticmethod
+    def get_compression_module(magic):
+        for magic_prefix, compression_module in SchemaSources.compression_formats:
+            if magic.startswith(magic_prefix):
+                return compression_module
+        return None
+
+    # Wraps a binary stream in a decompressor when it starts with a known magic number. The stream needs to support
+    # peek() so that the magic number can be read without consuming it.
+    @staticmethod
+    def open_binary_stream(binary_stream):
+        compression_module = SchemaSources.get_compression_module(binary_stream.peek(6))
+        if compression_module:
+            return compression_module.open(binary_stream, 'rb')
+        return binary_stream
+
+    @staticmethod
+    def is_archive(schema_path):
+        return os.path.isfile(schema_path) and tarfile.is_tarfile(schema_path)
+
+    def is_schema_member(self, member_name):
+        for extension in SchemaSources.compression_extensions:
+            if member_name.endswith(extension):
+                member_name = member_name[:-len(extension)]
+                break
+
+        return any(fnmatch.fnmatch(member_name, member_pattern) for member_pattern in self.member_patterns)
+
+    # Decodes a binary stream as it is read. A codecs reader is used rather than io.TextIOWrapper, as the streams that
+    # tarfile returns for members of an archive opened as a stream are not seekable and can not be wrapped by it.
+    def open_text_stream(self, binary_stream):
+        return codecs.getreader(self.encoding)(self.open_binary_stream(binary_stream))
+
+    # Opens a schema file for reading as text, decompressing it as it is read if it is compressed.
+    def open_schema_file(self, schema_file):
+        with open(schema_file, 'rb') as in_schema:
+            compression_module = self.get_compression_module(in_schema.read(6))
+
+        if compression_module:
+            return compression_module.open(schema_file, 'rt', encoding=self.encoding)
+        return open(schema_file, 'r', encoding=self.encoding)
+
+    # Memory-maps a plain UTF-8 schema file so that its statements can be parsed in place. Returns None when the file
+    # can not be mapped, as is the case for compressed and empty files, and the file then has to be read as a stream.
+    def map_schema_file(self, schema_file):
+        if codecs.lookup(self.encoding).name != 'utf-8':
+            return None
+
+        with open(schema_file, 'rb') as in_schema:
+            if self.get_compression_module(in_schema.read(6)):
+                return None
+
+            try:
+                return mmap.mmap(in_schema.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+
+    # Yields a (source_name, text_stream) pair for every schema in the file. A plain or compressed schema file is a
+    # single source named after the file. A tar archive, compressed or not, is read as a stream and yields one source
+    # for each member matching the member patterns, named <archive>:<member>. Members are never extracted to disk, and
+    # each stream has to be read before asking for the next one.
+    def iter_sources(self, schema_path):
+        if not self.is_archive(schema_path):
+            with self.open_schema_file(schema_path) as text_stream:
+                yield schema_path, text_stream
+            return
+
+        with tarfile.open(schema_path, 'r|*') as schema_archive:
+            for archive_member in schema_archive:
+                if not archive_member.isfile() or not self.is_schema_member(archive_member.name):
+                    continue
+
+                with self.open_text_stream(schema_archive.extractfile(archive_member)) as text_stream:
+                    yield '{}:{}'.format(schema_path, archive_member.name), text_stream
@@ -0,0 +1,353 @@
+import ast
+import collections
+import csv
+import json
+import logging
+import operator
+import os
+import re
+import time
+
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.schema_definitions as schema_definitions
+import cql_schema_analyser.schema_parser as schema_parser
+
+
+class SystemSchemaLoader:
+    # Base names of the exports read from an export directory. Each may be prefixed with "system_schema." and may be a
+    # .csv file written by cqlsh COPY TO with HEADER = true, a .json file holding an array of rows, or a .jsonl file
+    # holding one row per line.
+    export_names = ['keyspaces', 'tables', 'columns']
+    export_extensions = ['.csv', '.json', '.jsonl']
+
+    column_fields = ['keyspace_name', 'table_name', 'column_name', 'kind', 'position', 'type', 'clustering_order']
+
+    # Table columns that identify a table rather than describe it, or that cannot be set in a CREATE TABLE statement.
+    non_property_fields = {'keyspace_name', 'table_name', 'id', 'flags', 'extensions'}
+
+    # Table properties that hold maps. cqlsh exports these as CQL map literals, e.g. {'keys': 'ALL'}.
+    map_properties = {'caching', 'compaction', 'compression'}
+
+    # Table properties that hold booleans. cqlsh exports these as True or False, whereas CQL writes them in lower case.
+    boolean_properties = {'cdc'}
+
+    # The order in which the kinds of column are listed in a table definition.
+    column_kind_order = {'partition_key': 0, 'clustering': 1, 'static': 2, 'regular': 3}
+
+    unquoted_name_pattern = re.compile(r'[a-z][a-z0-9_]*\Z')
+    unquoted_value_pattern = re.compile(r'-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?\Z|true\Z|false\Z')
+
+    TABLE_IN_IGNORED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'loader.table_in_ignored_keyspace',
+        logging.INFO,
+        'Table "{}.{}" is in an ignored keyspace and will be ignored.'
+    )
+    TABLE_IN_UNSELECTED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'loader.table_in_unselected_keyspace',
+        logging.INFO,
+        'Table "{}.{}" is in an unselected keyspace and will be ignored.'
+    )
+    TABLE_IN_UNDEFINED_KEYSPACE = diagnostics.DiagnosticEvent(
+        'loader.table_in_undefined_keyspace',
+        logging.WARNING,
+        'Table "{}.{}" is in a keyspace missing from the keyspaces export. Skipping.'
+    )
+    MISSING_PARTITION_KEY = diagnostics.DiagnosticEvent(
+        'loader.missing_partition_key',
+        logging.ERROR,
+        'Table "{}.{}" has no partition key columns in the columns export. Skipping.'
+    )
+
+    def __init__(self):
+        # The properties of each distinct set of exported property values, along with their WITH clause. Most tables
+        # share a few sets of properties, so each set is only converted and formatted once. Tables with the same
+        # properties share the same properties dict, which must therefore not be modified.
+        self.table_properties = {}
+
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def find_export_files(export_dir):
+        export_files = {}
+        for export_name in SystemSchemaLoader.export_names:
+            for file_prefix in ['', 'system_schema.']:
+                for file_extension in SystemSchemaLoader.export_extensions:
+                    export_path = os.path.join(export_dir, '{}{}{}'.format(file_prefix, export_name, file_extension))
+                    if export_name not in export_files and os.path.isfile(export_path):
+                        export_files[export_name] = export_path
+
+        for export_name in ['tables', 'columns']:
+            if export_name not in export_files:
+                raise FileNotFoundError('No system_schema.{} export found in "{}".'.format(export_name, export_dir))
+
+        return export_files
+
+    # Yields each row of an export as a dict of field name to value.
+    @staticmethod
+    def iter_export_records(export_path):
+        with open(export_path, 'r', newline='') as in_export:
+            if export_path.endswith('.csv'):
+                yield from csv.DictReader(in_export)
+            elif export_path.endswith('.jsonl'):
+                for export_line in in_export:
+                    if export_line.strip():
+                        yield json.loads(export_line)
+            else:
+                yield from json.load(in_export)
+
+    # Yields each row of an export as a tuple holding the values of the given fields only. CSV rows are picked apart by
+    # position rather than being turned into dicts, since the columns export is by far the largest.
+    @staticmethod
+    def iter_export_rows(export_path, field_names):
+        if not export_path.endswith('.csv'):
+            for export_record in SystemSchemaLoader.iter_export_records(export_path):
+                yield tuple(export_record.get(field_name) for field_name in field_names)
+            return
+
+        with open(export_path, 'r', newline='') as in_export:
+            csv_reader = csv.reader(in_export)
+            header = next(csv_reader, [])
+            try:
+                field_idxs = [header.index(field_name) for field_name in field_names]
+            except ValueError:
+                raise ValueError('Export "{}" is missing one of the {} fields. Exports must be written with a '
+                                 'header.'.format(export_path, ', '.join(field_names)))
+
+            if len(field_idxs) == 1:
+                for export_row in csv_reader:
+                    yield export_row[field_idxs[0]],
+            else:
+                yield from map(operator.itemgetter(*field_idxs), csv_reader)
+
+    # Converts an exported property value to the form used in a TableDefinition: maps become dicts of strings, and
+    # everything else becomes a string written as it would be in CQL.
+    @staticmethod
+    def get_property_value(property_name, property_value):
+        if isinstance(property_value, str) and property_name in SystemSchemaLoader.map_properties:
+            try:
+                property_value = ast.literal_eval(property_value)
+            except (ValueError, SyntaxError):
+                return property_value
+
+        if isinstance(property_value, dict):
+            return {str(key): str(value) for key, value in property_value.items()}
+        if property_value is None:
+            return ''
+        if isinstance(property_value, bool) or property_name in SystemSchemaLoader.boolean_properties:
+            return str(property_value).lower()
+        return str(property_value)
+
+    @staticmethod
+    def __get_cql_name(name):
+        if SystemSchemaLoader.unquoted_name_pattern.match(name):
+            return name
+        return '"{}"'.format(name.replace('"', '""'))
+
+    @staticmethod
+    def __get_cql_value(property_value):
+        if isinstance(property_value, dict):
+            return '{{{}}}'.format(', '.join(
+                "'{}': '{}'".format(key, value) for key, value in property_value.items()
+            ))
+        if SystemSchemaLoader.unquoted_value_pattern.match(property_value):
+            return property_value
+        return "'{}'".format(property_value.replace("'", "''"))
+
+    @staticmethod
+    def __build_table_properties(property_items):
+        properties = {
+            property_name: SystemSchemaLoader.get_property_value(property_name, property_value)
+            for property_name, property_value in property_items
+        }
+        properties_clause = '\n    AND '.join(
+            '{} = {}'.format(property_name, SystemSchemaLoader.__get_cql_value(property_value))
+            for property_name, property_value in sorted(properties.items())
+        )
+        return properties, properties_clause
+
+    def __get_table_properties(self, table_record):
+        property_items = tuple(
+            property_item for property_item in table_record.items()
+            if property_item[0] not in SystemSchemaLoader.non_property_fields
+        )
+
+        try:
+            return self.table_properties[property_items]
+        except KeyError:
+            pass
+        except TypeError:
+            # JSON exports hold maps as objects, which cannot be used as a key.
+            return self.__build_table_properties(property_items)
+
+        table_properties = self.__build_table_properties(property_items)
+        self.table_properties[property_items] = table_properties
+        return table_properties
+
+    # Rebuilds the CREATE TABLE statement for a table, in the form produced by DESCRIBE, so that templates loaded from
+    # an export carry an example statement in the same way as templates parsed from CQL.
+    @staticmethod
+    def get_table_statement(keyspace_name, table_name, table_columns, properties_clause):
+        column_lines = []
+        partition_names = []
+        clustering_names = []
+        clustering_orders = []
+        for _, _, column_name, kind, column_type, clustering_order in table_columns:
+            cql_name = SystemSchemaLoader.__get_cql_name(column_name)
+            column_lines.append('    {} {}{}'.format(cql_name, column_type, ' static' if kind == 'static' else ''))
+            if kind == 'partition_key':
+                partition_names.append(cql_name)
+            elif kind == 'clustering':
+                clustering_names.append(cql_name)
+                clustering_orders.append('{} {}'.format(cql_name, clustering_order.upper()))
+
+        partition_key = partition_names[0] if len(partition_names) == 1 else '({})'.format(', '.join(partition_names))
+        column_lines.append('    PRIMARY KEY ({})'.format(', '.join([partition_key] + clustering_names)))
+
+        property_clauses = []
+        if clustering_orders:
+            property_clauses.append('CLUSTERING ORDER BY ({})'.format(', '.join(clustering_orders)))
+        if properties_clause:
+            property_clauses.append(properties_clause)
+
+        return 'CREATE TABLE {}.{} (\n{}\n){};'.format(
+            SystemSchemaLoader.__get_cql_name(keyspace_name),
+            SystemSchemaLoader.__get_cql_name(table_name),
+            ',\n'.join(column_lines),
+            ' WITH ' + '\n    AND '.join(property_clauses) if property_clauses else ''
+        )
+
+    # Groups the rows of the columns export by table, and orders the columns of each table in the way that they are
+    # listed in its definition: partition key and clustering columns by position, then the static and regular columns
+    # by name.
+    def __get_table_columns(self, columns_path, stats):
+        column_kind_order = SystemSchemaLoader.column_kind_order
+        table_columns = collections.defaultdict(list)
+        for keyspace_name, table_name, column_name, kind, position, column_type, clustering_order in \
+                self.iter_export_rows(columns_path, SystemSchemaLoader.column_fields):
+            # Each column starts with its sort key, so that the columns of a table can be sorted as plain tuples.
+            # Column types are written with a space after each comma in exports, but without one by the CQL parser.
+            kind_rank = column_kind_order.get(kind, len(column_kind_order))
+            table_columns[(keyspace_name, table_name)].append((
+                kind_rank,
+                int(position) if kind_rank < 2 else 0,
+                column_name,
+                kind,
+                column_type.replace(', ', ','),
+                clustering_order
+            ))
+
+        for columns in table_columns.values():
+            columns.sort()
+
+        if stats is not None:
+            stats.incr('loader.columns', sum(len(columns) for columns in table_columns.values()))
+
+        return table_columns
+
+    # Yields a TableDefinition for each table in a directory of system_schema exports. Keyspaces are filtered by the
+    # same SchemaParser helpers that SchemaParser.iter_schema uses, and skipped tables are recorded in the diagnostics
+    # collector. When a keyspaces export is present, tables in keyspaces that it does not list are skipped as being in
+    # an undefined keyspace.
+    def iter_schema(self, export_dir, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                    stats=None, diagnostics_collector=None):
+        ignore_keyspaces, select_keyspaces = schema_parser.SchemaParser.get_keyspace_filters(
+            ignore_keyspace,
+            select_keyspace,
+            parse_reserved_keyspaces
+        )
+
+        local_diagnostics = diagnostics_collector is None
+        if local_diagnostics:
+            diagnostics_collector = diagnostics.DiagnosticsCollector()
+
+        self.logger.info('Loading system_schema exports from "{}"'.format(export_dir))
+        try:
+            export_files = self.find_export_files(export_dir)
+
+            defined_keyspaces = None
+            if 'keyspaces' in export_files:
+                defined_keyspaces = {
+                    keyspace_name for keyspace_name, in self.iter_export_rows(export_files['keyspaces'],
+                                                                               ['keyspace_name'])
+                }
+
+            columns_start = time.perf_counter()
+            table_columns = self.__get_table_columns(export_files['columns'], stats)
+            if stats is not None:
+                stats.add_time('loader.columns', time.perf_counter() - columns_start)
+
+            keyspace_statuses = {}
+            for table_record in self.iter_export_records(export_files['tables']):
+                table_start = time.perf_counter()
+                keyspace_name = table_record['keyspace_name']
+                table_name = table_record['table_name']
+                columns = table_columns.pop((keyspace_name, table_name), [])
+
+                if defined_keyspaces is not None and keyspace_name not in defined_keyspaces:
+                    diagnostics_collector.record(
+                        SystemSchemaLoader.TABLE_IN_UNDEFINED_KEYSPACE,
+                        keyspace_name,
+                        table_name
+                    )
+                    continue
+
+                try:
+                    keyspace_status = keyspace_statuses[keyspace_name]
+                except KeyError:
+                    keyspace_status = schema_parser.SchemaParser.get_keyspace_status(
+                        keyspace_name,
+                        ignore_keyspaces,
+                        select_keyspaces
+                    )
+                    keyspace_statuses[keyspace_name] = keyspace_status
+
+                if keyspace_status == schema_parser.SchemaParser.KS_IGNORED:
+                    diagnostics_collector.record(
+                        SystemSchemaLoader.TABLE_IN_IGNORED_KEYSPACE,
+                        keyspace_name,
+                        table_name
+                    )
+                    continue
+                elif keyspace_status == schema_parser.SchemaParser.KS_UNSELECTED:
+                    diagnostics_collector.record(
+                        SystemSchemaLoader.TABLE_IN_UNSELECTED_KEYSPACE,
+                        keyspace_name,
+                        table_name
+                    )
+                    continue
+
+                partition_key = [column[4] for column in columns if column[3] == 'partition_key']
+                if not partition_key:
+                    diagnostics_collector.record(SystemSchemaLoader.MISSING_PARTITION_KEY, keyspace_name, table_name)
+                    continue
+
+                properties, properties_clause = self.__get_table_properties(table_record)
+
+                table_definition = schema_definitions.TableDefinition.from_type_names(
+                    keyspace_name,
+                    table_name,
+                    columns=[column[4] for column in columns],
+                    partition_key=partition_key,
+                    clustering_key=[column[4] for column in columns if column[3] == 'clustering'],
+                    properties=properties,
+                    statement=self.get_table_statement(keyspace_name, table_name, columns, properties_clause)
+                )
+
+                if stats is not None:
+                    stats.add_time('loader.tables', time.perf_counter() - table_start)
+                    stats.incr('loader.tables')
+
+                yield table_definition
+        finally:
+            if local_diagnostics:
+                diagnostics_collector.log_summary()
+
+    def load_schema(self, export_dir, ignore_keyspace=None, select_keyspace=None, parse_reserved_keyspaces=False,
+                    diagnostics_collector=None):
+        return list(self.iter_schema(
+            export_dir,
+            ignore_keyspace=ignore_keyspace,
+            select_keyspace=select_keyspace,
+            parse_reserved_keyspaces=parse_reserved_keyspaces,
+            diagnostics_collector=diagnostics_collector
+        ))
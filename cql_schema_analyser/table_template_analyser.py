@@ -1,10 +1,23 @@
-import copy
-import hashlib
 import json
+import sys
+import time
+
+import cql_schema_analyser.fingerprint as fingerprint
+import cql_schema_analyser.template_similarity as template_similarity
 
 
 class TableTemplateAnalyser:
-    def __init__(self):
+    # Fields of the records yielded by iter_template_records and iter_occurrence_records, in the order they are written.
+    template_record_fields = [
+        'hash', 'variants', 'occurrences', 'columns', 'partition_key', 'clustering_key', 'near_duplicates', 'statement'
+    ]
+    occurrence_record_fields = ['hash', 'variant', 'name', 'source', 'match']
+    consolidation_record_fields = [
+        'rank', 'hash', 'tables', 'projected_tables', 'tables_saved', 'heap_bytes_saved', 'offheap_bytes_saved',
+        'metrics_objects_saved', 'sstables_saved'
+    ]
+
+    def __init__(self, stats=None):
         # Stores the various table templates we find as we parse the CQL. Store entries in dict in the following format:
         #
         #   '<field_hash>': {
@@ -18,106 +31,343 @@ class TableTemplateAnalyser:
         #               'property_name': 'property_value',
         #               ...
         #           },
-        #           statement: '<formatted_cql>',
-        #           occurrences: [{'name': '<keyspace.table>', 'match': <match_percentage>},  ...]
+        #           statement: '<formatted_cql>' or <StatementRef>,
+        #           occurrences: [
+        #               {'name': '<keyspace.table>', 'match': <match_percentage>, 'source': <schema_file>},
+        #               ...
+        #           ]
         #       }
         #   }
         #
         self.template_definitions = {}
+        self.stats = stats
+        self.fingerprinter = fingerprint.TemplateFingerprinter()
 
     def __str__(self):
-        return json.dumps(self.template_definitions, indent=4)
+        return json.dumps(self.template_definitions, indent=4, default=str)
+
+    @staticmethod
+    def __get_properties_match(ref_props, new_props):
+        ref_props = dict(ref_props)
+
+        matches = 0
+        differences = 0
+
+        for new_key, new_val in new_props.items():
+            if ref_props.pop(new_key, None) == new_val:
+                matches += 1
+            else:
+                differences += 1
+
+        differences += len(ref_props)
+
+        assert (differences + matches) > 0
+
+        return round(float(matches) / float(differences + matches), 3)
 
     @staticmethod
-    def __get_field_hash(columns_list, key_dict):
-        columns_hash = hashlib.md5()
-        columns_list.sort()
-        encoded = json.dumps(columns_list).encode()
-        columns_hash.update(encoded)
-
-        key_dict['partition'].sort()
-        key_dict['clustering'].sort()
-        encoded = json.dumps(key_dict, sort_keys=True).encode()
-        columns_hash.update(encoded)
-        return columns_hash.hexdigest()
+    def __get_matched_occurrences(occurrences, match_percent):
+        return [
+            dict(occurrence, match=min(occurrence['match'], match_percent)) for occurrence in occurrences
+        ]
 
+    # The first occurrence of a variant records how closely the variant matches the closest existing variant. Any
+    # further occurrences record how closely they match the variant itself, so they are left as they are.
     @staticmethod
-    def __get_properties_hash(options_dict):
-        options_hash = hashlib.md5()
-        encoded = json.dumps(options_dict, sort_keys=True).encode()
-        options_hash.update(encoded)
-        return options_hash.hexdigest()
+    def __get_variant_occurrences(occurrences, match_percent):
+        return [dict(occurrences[0], match=min(occurrences[0]['match'], match_percent))] + occurrences[1:]
 
-    def __add_table_template_definition(self, dom_object, columns_hash, props_hash, match_percent):
+    def __add_table_template_definition(self, template, columns_hash, props_hash, occurrences):
         self.template_definitions[columns_hash]['variants'].append(props_hash)
         self.template_definitions[columns_hash][props_hash] = {
-            'columns': dom_object['attributes']['columns'],
-            'key': dom_object['attributes']['key'],
-            'properties': dom_object['attributes']['properties'],
-            'statement': dom_object['statement'],
-            'occurrences': [{'name': dom_object['name'], 'match': match_percent}]
+            'columns': template['columns'],
+            'key': template['key'],
+            'properties': template['properties'],
+            'statement': template['statement'],
+            'occurrences': occurrences
         }
 
     # Hash columns first
     #  - if match hash options
     #    - if match append with 100% match
-    #    - if mismatch compare option values and calculate percentage match
-    #      - if percentage match over 90% append with exact percentage match
-    def catalog_table_definition(self, dom_object):
-        columns_hash = self.__get_field_hash(dom_object['attributes']['columns'], dom_object['attributes']['key'])
-        props_hash = self.__get_properties_hash(dom_object['attributes']['properties'])
-
+    #    - if mismatch compare option values with those of every variant and calculate percentage match
+    #      - if the closest variant matches over 50% append to it with exact percentage match
+    #      - otherwise add as a new variant of the template
+    def __catalog_template(self, template, columns_hash, props_hash, occurrences):
         if columns_hash in self.template_definitions:
-            if props_hash in self.template_definitions[columns_hash]:
-                self.template_definitions[columns_hash][props_hash]['occurrences'].append({
-                    'name': dom_object['name'],
-                    'match': 1
-                })
-            else:
-                ref_props_hash = self.template_definitions[columns_hash]['variants'][0]
-                ref_props = copy.deepcopy(self.template_definitions[columns_hash][ref_props_hash]['properties'])
-                new_props = copy.deepcopy(dom_object['attributes']['properties'])
+            if self.stats is not None:
+                self.stats.incr('catalog.columns_hash_hits')
 
-                matches = 0
-                differences = 0
-
-                for new_key, new_val in new_props.items():
-                    if ref_props.pop(new_key, None) == new_val:
-                        matches += 1
-                    else:
-                        differences += 1
-
-                differences += len(ref_props)
+            if props_hash in self.template_definitions[columns_hash]:
+                if self.stats is not None:
+                    self.stats.incr('catalog.properties_hash_hits')
 
-                assert (differences + matches) > 0
+                self.template_definitions[columns_hash][props_hash]['occurrences'].extend(occurrences)
+            else:
+                if self.stats is not None:
+                    self.stats.incr('catalog.variant_comparisons')
 
-                match_percent = round(float(matches) / float(differences + matches), 3)
+                # The first variant is kept on a tie, so a template with a single variant matches as it always has.
+                template_variants = self.template_definitions[columns_hash]
+                ref_props_hash, match_percent = max(
+                    (
+                        (variant_hash, self.__get_properties_match(
+                            template_variants[variant_hash]['properties'],
+                            template['properties']
+                        ))
+                        for variant_hash in template_variants['variants']
+                    ),
+                    key=lambda variant_match: variant_match[1]
+                )
 
                 if match_percent > 0.5:
-                    self.template_definitions[columns_hash][ref_props_hash]['occurrences'].append({
-                        'name': dom_object['name'],
-                        'match': match_percent
-                    })
+                    self.template_definitions[columns_hash][ref_props_hash]['occurrences'].extend(
+                        self.__get_matched_occurrences(occurrences, match_percent)
+                    )
                 else:
-                    self.__add_table_template_definition(dom_object, columns_hash, props_hash, match_percent)
+                    if self.stats is not None:
+                        self.stats.incr('catalog.new_variants')
+
+                    self.__add_table_template_definition(
+                        template,
+                        columns_hash,
+                        props_hash,
+                        self.__get_variant_occurrences(occurrences, match_percent)
+                    )
         else:
+            if self.stats is not None:
+                self.stats.incr('catalog.new_templates')
+
             self.template_definitions[columns_hash] = {
                 'variants': [],
             }
-            self.__add_table_template_definition(dom_object, columns_hash, props_hash, 1)
+            self.__add_table_template_definition(template, columns_hash, props_hash, occurrences)
+
+    # Returns the template of a table without hashing it, for a table whose hashes are already known, e.g. from a
+    # previous run.
+    @staticmethod
+    def build_table_template(table_definition):
+        return {
+            'columns': table_definition.columns,
+            'key': {
+                'partition': table_definition.partition_key,
+                'clustering': table_definition.clustering_key
+            },
+            'properties': table_definition.properties,
+            'statement': table_definition.statement_ref,
+        }
+
+    # Returns the template of a table along with its columns and properties hashes. Hashing is most of the cost of
+    # cataloguing a table, so this can be done apart from catalog_table_template(), e.g. in a worker process, as long
+    # as the tables are then catalogued in the order of their statements.
+    def get_table_template(self, table_definition):
+        template = self.build_table_template(table_definition)
+
+        hash_start = time.perf_counter()
+        columns_hash, props_hash = self.fingerprinter.get_table_fingerprints(table_definition)
+
+        if self.stats is not None:
+            self.stats.add_time('catalog.hash', time.perf_counter() - hash_start)
+
+        return template, columns_hash, props_hash
+
+    def catalog_table_template(self, table_name, template, columns_hash, props_hash, source=None):
+        if self.stats is not None:
+            catalog_start = time.perf_counter()
+            self.stats.incr('catalog.tables')
+
+        self.__catalog_template(template, columns_hash, props_hash, [{
+            'name': table_name,
+            'match': 1,
+            'source': source
+        }])
+
+        if self.stats is not None:
+            self.stats.add_time('catalog.match', time.perf_counter() - catalog_start)
+
+    def catalog_table_definition(self, table_definition, source=None):
+        template, columns_hash, props_hash = self.get_table_template(table_definition)
+        self.catalog_table_template(table_definition.name, template, columns_hash, props_hash, source=source)
+        return columns_hash, props_hash
+
+    # Combines the template definitions catalogued by another analyser into this one. Variants and occurrences are kept,
+    # and variants that are new to this catalog are matched against its variants in the same way a single table would
+    # be. The occurrence lists are copied, so the merged template definitions are left unchanged and can be merged
+    # again later.
+    def merge(self, template_definitions):
+        for columns_hash, template_variants in template_definitions.items():
+            for props_hash in template_variants['variants']:
+                template = template_variants[props_hash]
+                self.__catalog_template(template, columns_hash, props_hash, list(template['occurrences']))
+
+    # Finds templates whose column types and keys are similar, but not identical, to another template. Returns a dict
+    # mapping each such template hash to a list of (template_hash, similarity) pairs.
+    def find_near_duplicate_templates(self, threshold=0.8, num_perm=128):
+        similarity_index = template_similarity.TemplateSimilarityIndex(threshold=threshold, num_perm=num_perm)
+        for tbl_key, tbl_value in self.template_definitions.items():
+            template = tbl_value[tbl_value['variants'][0]]
+            similarity_index.add(tbl_key, template['columns'], template['key'])
+
+        return similarity_index.find_near_duplicates()
+
+    # Yields one record per template, built from its reference variant. Records are built as they are requested so that
+    # they can be written out without holding the whole report in memory.
+    def iter_template_records(self, near_duplicates=None):
+        for tbl_key, tbl_value in self.template_definitions.items():
+            template = tbl_value[tbl_value['variants'][0]]
+
+            template_near_duplicates = None
+            if near_duplicates is not None:
+                template_near_duplicates = [
+                    {'hash': near_key, 'similarity': similarity}
+                    for near_key, similarity in near_duplicates.get(tbl_key, [])
+                ]
+
+            yield {
+                'hash': tbl_key,
+                'variants': list(tbl_value['variants']),
+                'occurrences': sum(len(tbl_value[prop_key]['occurrences']) for prop_key in tbl_value['variants']),
+                'columns': list(template['columns']),
+                'partition_key': list(template['key']['partition']),
+                'clustering_key': list(template['key']['clustering']),
+                'near_duplicates': template_near_duplicates,
+                'statement': str(template['statement']),
+            }
+
+    # Yields one record per catalogued table, along with the template and variant it was catalogued under.
+    def iter_occurrence_records(self):
+        for tbl_key, tbl_value in self.template_definitions.items():
+            for prop_key in tbl_value['variants']:
+                for table_inst in tbl_value[prop_key]['occurrences']:
+                    yield {
+                        'hash': tbl_key,
+                        'variant': prop_key,
+                        'name': table_inst['name'],
+                        'source': table_inst['source'],
+                        'match': table_inst['match'],
+                    }
+
+    # Estimates what would be saved by merging the tables of each template into one table per variant, as tables whose
+    # properties differ can not share a table. A table is counted once however many schema files it occurs in, and its
+    # savings are multiplied by the number of nodes in the cluster. The records and the cluster-wide totals are built in
+    # a single pass over the catalog. Returns the records, ranked by the heap they would save, and the totals.
+    def get_consolidation_report(self, cost_model, node_count=1):
+        consolidation_records = []
+        total_tables = 0
+        total_projected_tables = 0
+        for tbl_key, tbl_value in self.template_definitions.items():
+            tables = len({
+                table_inst['name']
+                for prop_key in tbl_value['variants']
+                for table_inst in tbl_value[prop_key]['occurrences']
+            })
+            projected_tables = min(tables, len(tbl_value['variants']))
+            total_tables += tables
+            total_projected_tables += projected_tables
+
+            if tables > projected_tables:
+                consolidation_records.append(dict(
+                    {
+                        'hash': tbl_key,
+                        'tables': tables,
+                        'projected_tables': projected_tables,
+                        'tables_saved': tables - projected_tables,
+                    },
+                    **cost_model.get_savings((tables - projected_tables) * node_count)
+                ))
+
+        consolidation_records.sort(key=lambda record: (-record['heap_bytes_saved'], record['hash']))
+        for rank, record in enumerate(consolidation_records, 1):
+            record['rank'] = rank
+
+        consolidation_totals = dict(
+            {
+                'nodes': node_count,
+                'templates': len(self.template_definitions),
+                'tables': total_tables,
+                'projected_tables': total_projected_tables,
+                'tables_saved': total_tables - total_projected_tables,
+            },
+            **cost_model.get_savings((total_tables - total_projected_tables) * node_count)
+        )
+
+        return consolidation_records, consolidation_totals
+
+    @staticmethod
+    def __format_bytes(byte_count):
+        for unit in ['B', 'KiB', 'MiB', 'GiB']:
+            if byte_count < 1024:
+                return '{:.1f} {}'.format(byte_count, unit)
+            byte_count /= 1024
+        return '{:.1f} TiB'.format(byte_count)
+
+    def print_consolidation_report(self, cost_model, node_count=1, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
+
+        consolidation_records, consolidation_totals = self.get_consolidation_report(cost_model, node_count=node_count)
+
+        out_file.write(
+            '{} tables in {} templates could be consolidated into {} tables, saving {} tables on each of {} nodes.\n'
+            .format(
+                consolidation_totals['tables'],
+                consolidation_totals['templates'],
+                consolidation_totals['projected_tables'],
+                consolidation_totals['tables_saved'],
+                node_count
+            )
+        )
+        out_file.write('Cluster-wide savings: {} heap, {} off heap, {} metrics objects, {} SSTables.\n'.format(
+            self.__format_bytes(consolidation_totals['heap_bytes_saved']),
+            self.__format_bytes(consolidation_totals['offheap_bytes_saved']),
+            consolidation_totals['metrics_objects_saved'],
+            consolidation_totals['sstables_saved']
+        ))
+
+        for record in consolidation_records:
+            out_file.write('\n')
+            out_file.write('rank: {}\n'.format(record['rank']))
+            out_file.write('hash: {}\n'.format(record['hash']))
+            out_file.write('tables: {} -> {}\n'.format(record['tables'], record['projected_tables']))
+            out_file.write('saves: {} heap, {} off heap, {} metrics objects, {} SSTables\n'.format(
+                self.__format_bytes(record['heap_bytes_saved']),
+                self.__format_bytes(record['offheap_bytes_saved']),
+                record['metrics_objects_saved'],
+                record['sstables_saved']
+            ))
+
+    # Writes each part of the report as it is formatted rather than joining all of the occurrences of a template first.
+    def print_table_definitions(self, near_duplicates=None, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
 
-    def print_table_definitions(self):
         for tbl_key, tbl_value in self.template_definitions.items():
             properties_hash = tbl_value['variants'][0]
 
-            print('\n')
-            print('hash: {}'.format(tbl_key))
-            print('variants: [{}] - {}'.format(len(tbl_value['variants']), ', '.join(tbl_value['variants'])))
-            template_occurrences = 0
-            template_occurrences_list = []
+            out_file.write('\n\n')
+            out_file.write('hash: {}\n'.format(tbl_key))
+            out_file.write('variants: [{}] - {}\n'.format(len(tbl_value['variants']), ', '.join(tbl_value['variants'])))
+
+            template_occurrences = sum(len(tbl_value[prop_key]['occurrences']) for prop_key in tbl_value['variants'])
+            out_file.write('occurrences: [{}] - '.format(template_occurrences))
+            separator = ''
             for prop_key in tbl_value['variants']:
-                template_occurrences += len(tbl_value[prop_key]['occurrences'])
                 for table_inst in tbl_value[prop_key]['occurrences']:
-                    template_occurrences_list.append('{} ({}%)'.format(table_inst['name'], table_inst['match'] * 100))
-            print('occurrences: [{}] - {}'.format(template_occurrences, ', '.join(template_occurrences_list)))
-            print('example cql:\n{}'.format(tbl_value[properties_hash]['statement']))
+                    out_file.write(separator)
+                    if table_inst['source']:
+                        out_file.write('{} [{}] ({}%)'.format(
+                            table_inst['name'],
+                            table_inst['source'],
+                            table_inst['match'] * 100
+                        ))
+                    else:
+                        out_file.write('{} ({}%)'.format(table_inst['name'], table_inst['match'] * 100))
+                    separator = ', '
+            out_file.write('\n')
+
+            if near_duplicates is not None:
+                template_near_duplicates = near_duplicates.get(tbl_key, [])
+                out_file.write('near duplicates: [{}] - {}\n'.format(len(template_near_duplicates), ', '.join(
+                    '{} ({}%)'.format(near_key, similarity * 100) for near_key, similarity in template_near_duplicates
+                )))
+            out_file.write('example cql:\n{}\n'.format(tbl_value[properties_hash]['statement']))
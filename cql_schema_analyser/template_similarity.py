@@ -0,0 +1,128 @@
+import collections
+import hashlib
+import random
+
+
+class TemplateSimilarityIndex:
+    MERSENNE_PRIME = (1 << 61) - 1
+    MAX_HASH = (1 << 32) - 1
+
+    def __init__(self, threshold=0.8, num_perm=128, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError('Similarity threshold must be greater than 0 and at most 1; found {}.'.format(threshold))
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = self.__get_band_layout(threshold, num_perm)
+
+        perm_random = random.Random(seed)
+        self.permutations = [
+            (perm_random.randrange(1, TemplateSimilarityIndex.MERSENNE_PRIME),
+             perm_random.randrange(0, TemplateSimilarityIndex.MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        # Maps each shingle to its hash value under every permutation. Templates are made up of a small vocabulary of
+        # column types, so most shingles are seen many times.
+        self.shingle_hash_values = {}
+
+        self.template_shingles = {}
+        self.band_buckets = [collections.defaultdict(list) for _ in range(self.bands)]
+
+    # Picks the number of bands and rows per band whose LSH threshold, (1 / bands) ^ (1 / rows), is closest to the
+    # requested similarity threshold.
+    @staticmethod
+    def __get_band_layout(threshold, num_perm):
+        best_layout = None
+        best_error = None
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+            if best_error is None or error < best_error:
+                best_layout = (bands, rows)
+                best_error = error
+
+        return best_layout
+
+    # Shingles are position-independent for regular columns, with repeated types numbered so that a table with two
+    # text columns differs from one with a single text column. Key columns keep their position.
+    @staticmethod
+    def get_shingles(columns, key):
+        shingles = set()
+        type_counts = collections.Counter()
+        for column_type in columns:
+            type_counts[column_type] += 1
+            shingles.add('column:{}:{}'.format(column_type, type_counts[column_type]))
+
+        for key_type in ['partition', 'clustering']:
+            for position, column_type in enumerate(key[key_type]):
+                shingles.add('{}:{}:{}'.format(key_type, position, column_type))
+
+        return frozenset(shingles)
+
+    @staticmethod
+    def jaccard_similarity(shingles_a, shingles_b):
+        union_size = len(shingles_a | shingles_b)
+        if not union_size:
+            return 1.0
+
+        return float(len(shingles_a & shingles_b)) / union_size
+
+    def __get_shingle_hash_values(self, shingle):
+        try:
+            return self.shingle_hash_values[shingle]
+        except KeyError:
+            pass
+
+        shingle_hash = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        hash_values = tuple(
+            ((a * shingle_hash + b) % TemplateSimilarityIndex.MERSENNE_PRIME) & TemplateSimilarityIndex.MAX_HASH
+            for a, b in self.permutations
+        )
+        self.shingle_hash_values[shingle] = hash_values
+        return hash_values
+
+    def get_signature(self, shingles):
+        if not shingles:
+            return (TemplateSimilarityIndex.MAX_HASH,) * self.num_perm
+
+        return tuple(map(min, zip(*[self.__get_shingle_hash_values(shingle) for shingle in shingles])))
+
+    def add(self, template_key, columns, key):
+        shingles = self.get_shingles(columns, key)
+        self.template_shingles[template_key] = shingles
+
+        signature = self.get_signature(shingles)
+        for band_idx in range(self.bands):
+            band = signature[band_idx * self.rows:(band_idx + 1) * self.rows]
+            self.band_buckets[band_idx][band].append(template_key)
+
+    # Returns every indexed template that shares at least one band with the given template and whose exact Jaccard
+    # similarity reaches the threshold, as a list of (template_key, similarity) pairs ordered by similarity.
+    def query(self, template_key):
+        shingles = self.template_shingles[template_key]
+        signature = self.get_signature(shingles)
+
+        candidates = set()
+        for band_idx in range(self.bands):
+            band = signature[band_idx * self.rows:(band_idx + 1) * self.rows]
+            candidates.update(self.band_buckets[band_idx].get(band, []))
+        candidates.discard(template_key)
+
+        near_duplicates = []
+        for candidate_key in candidates:
+            similarity = self.jaccard_similarity(shingles, self.template_shingles[candidate_key])
+            if similarity >= self.threshold:
+                near_duplicates.append((candidate_key, round(similarity, 3)))
+
+        near_duplicates.sort(key=lambda near_duplicate: (-near_duplicate[1], near_duplicate[0]))
+        return near_duplicates
+
+    def find_near_duplicates(self):
+        near_duplicates = {}
+        for template_key in self.template_shingles:
+            template_near_duplicates = self.query(template_key)
+            if template_near_duplicates:
+                near_duplicates[template_key] = template_near_duplicates
+
+        return near_duplicates
@@ -0,0 +1,156 @@
+import re
+import sys
+
+import cql_schema_analyser.schema_definitions as schema_definitions
+import cql_schema_analyser.schema_parser as schema_parser
+
+
+class WriteAmplificationAnalyser:
+    record_fields = ['table', 'writes_per_mutation', 'reads_before_write', 'views', 'indexes', 'udts', 'udt_depth']
+
+    # Extra writes made for every mutation of a base table by each kind of index. Secondary indexes write to a hidden
+    # index table and search indexes to a Solr core. SAI and SASI indexes are built alongside the base table's memtables
+    # and SSTables, so they do not add a separate write.
+    index_write_costs = {
+        schema_definitions.IndexDefinition.SECONDARY: 1,
+        schema_definitions.IndexDefinition.SAI: 0,
+        schema_definitions.IndexDefinition.SASI: 0,
+        schema_definitions.IndexDefinition.SEARCH: 1,
+        schema_definitions.IndexDefinition.CUSTOM: 1,
+    }
+
+    # Matches the type names in a column type, e.g. "map", "text", "ks" "." "address" in map<text,frozen<ks.address>>.
+    type_name_pattern = re.compile(r'"(?:[^"]|"")*"|[^\W\d]\w*|\.')
+
+    def __init__(self):
+        # Schema objects keyed on their names. The same object can be seen more than once, such as when the schemas of
+        # several nodes are analysed, in which case the last definition seen is kept.
+        self.tables = {}
+        self.types = {}
+        self.views = {}
+        self.indexes = {}
+
+        # Nesting depths of the user defined types that have been resolved so far, keyed on their names.
+        self.type_depths = {}
+
+    def add_schema_object(self, schema_object):
+        if isinstance(schema_object, schema_definitions.TableDefinition):
+            self.tables[schema_object.name] = schema_object
+        elif isinstance(schema_object, schema_definitions.TypeDefinition):
+            self.types[schema_object.name] = schema_object
+        elif isinstance(schema_object, schema_definitions.ViewDefinition):
+            self.views[schema_object.name] = schema_object
+        elif isinstance(schema_object, schema_definitions.IndexDefinition):
+            self.indexes[schema_object.name] = schema_object
+
+    # Returns the names of the user defined types used directly by a column or field type. Types without a keyspace are
+    # in the keyspace of the table or type that uses them.
+    def get_type_references(self, column_type, keyspace):
+        type_references = []
+        type_names = self.type_name_pattern.findall(column_type)
+        idx = 0
+        while idx < len(type_names):
+            type_name = type_names[idx]
+            if idx + 2 < len(type_names) and type_names[idx + 1] == '.':
+                type_references.append('{}.{}'.format(type_name.strip('"'), type_names[idx + 2].strip('"')))
+                idx += 3
+                continue
+
+            if type_name != '.' and type_name.lower() not in schema_parser.SchemaParser.native_types:
+                type_references.append('{}.{}'.format(keyspace, type_name.strip('"')))
+            idx += 1
+
+        return type_references
+
+    # The nesting depth of a user defined type is one more than the deepest type among its fields. Types that are not
+    # in the schema, such as those in keyspaces that were not parsed, are taken to have a depth of one.
+    def get_type_depth(self, type_name, resolving=()):
+        try:
+            return self.type_depths[type_name]
+        except KeyError:
+            pass
+
+        type_definition = self.types.get(type_name)
+        if type_definition is None or type_name in resolving:
+            return 1
+
+        type_depth = 1 + max([
+            self.get_type_depth(field_type_name, resolving + (type_name,))
+            for field_type in type_definition.field_types
+            for field_type_name in self.get_type_references(field_type, type_definition.keyspace)
+        ] or [0])
+
+        self.type_depths[type_name] = type_depth
+        return type_depth
+
+    # Yields one record per table with the number of writes each of its mutations turns into, and the views, indexes
+    # and user defined types that cause them. A materialized view adds a write per mutation, and the base table is read
+    # before the views are written, so tables with views also report a read before write.
+    def iter_write_amplification_records(self):
+        table_views = {}
+        for view_definition in self.views.values():
+            table_views.setdefault(view_definition.base_name, []).append(view_definition)
+
+        table_indexes = {}
+        for index_definition in self.indexes.values():
+            table_indexes.setdefault(index_definition.base_name, []).append(index_definition)
+
+        for table_name, table_definition in sorted(self.tables.items()):
+            views = table_views.get(table_name, [])
+            indexes = table_indexes.get(table_name, [])
+            udts = sorted({
+                type_name
+                for column_type in table_definition.columns
+                for type_name in self.get_type_references(column_type, table_definition.keyspace)
+            })
+
+            yield {
+                'table': table_name,
+                'writes_per_mutation': 1 + len(views) + sum(
+                    self.index_write_costs[index_definition.kind] for index_definition in indexes
+                ),
+                'reads_before_write': 1 if views else 0,
+                'views': sorted(view_definition.name for view_definition in views),
+                'indexes': sorted(
+                    '{} ({})'.format(index_definition.name, index_definition.kind) for index_definition in indexes
+                ),
+                'udts': udts,
+                'udt_depth': max([self.get_type_depth(type_name) for type_name in udts] or [0]),
+            }
+
+    # Lists the tables with views, indexes or user defined types, ordered by the writes each mutation turns into.
+    def print_write_amplification_report(self, out_file=None):
+        if out_file is None:
+            out_file = sys.stdout
+
+        amplified_records = sorted(
+            (
+                record for record in self.iter_write_amplification_records()
+                if record['views'] or record['indexes'] or record['udts']
+            ),
+            key=lambda record: (-record['writes_per_mutation'], -record['udt_depth'], record['table'])
+        )
+
+        out_file.write('Analysed {} tables, {} views, {} indexes and {} user defined types. {} tables have views, '
+                       'indexes or user defined types.\n'.format(
+                           len(self.tables),
+                           len(self.views),
+                           len(self.indexes),
+                           len(self.types),
+                           len(amplified_records)
+                       ))
+
+        for record in amplified_records:
+            out_file.write('\n')
+            out_file.write('table: {}\n'.format(record['table']))
+            out_file.write('writes per mutation: {} ({} read before write)\n'.format(
+                record['writes_per_mutation'],
+                record['reads_before_write']
+            ))
+            out_file.write('views: [{}] - {}\n'.format(len(record['views']), ', '.join(record['views'])))
+            out_file.write('indexes: [{}] - {}\n'.format(len(record['indexes']), ', '.join(record['indexes'])))
+            out_file.write('udts: [{}] - {} (depth {})\n'.format(
+                len(record['udts']),
+                ', '.join(record['udts']),
+                record['udt_depth']
+            ))
@@ -0,0 +1,76 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import cql_schema_analyser.analysis_daemon as analysis_daemon
+
+
+SCHEMA_PROCESSOR = os.path.join(os.path.dirname(__file__), '..', 'cql_schema_analyser', 'schema_processor.py')
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    schema_file = tmp_path / 'schema.cql'
+    schema_file.write_text(
+        "CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};\n"
+        "CREATE TABLE app.events (id int PRIMARY KEY, payload text);\n"
+    )
+    socket_path = str(tmp_path / 'daemon.sock')
+    daemon_process = subprocess.Popen(
+        [sys.executable, SCHEMA_PROCESSOR, str(schema_file), '--serve', socket_path, '-j', '1'],
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while not os.path.exists(socket_path):
+            assert daemon_process.poll() is None and time.monotonic() < deadline, 'the daemon did not start'
+            time.sleep(0.05)
+        yield socket_path, str(schema_file)
+    finally:
+        daemon_process.send_signal(signal.SIGTERM)
+        daemon_process.wait(timeout=30)
+
+
+def send_request(socket_path, request):
+    with socket.socket(socket.AF_UNIX) as client_socket:
+        client_socket.connect(socket_path)
+        client_socket.sendall(json.dumps(request).encode() + b'\n')
+        with client_socket.makefile('rb') as response_file:
+            return json.loads(response_file.readline())
+
+
+def test_reload_rejects_files_the_daemon_was_not_started_with(daemon_socket, tmp_path):
+    socket_path, schema_file = daemon_socket
+    other_file = tmp_path / 'other.cql'
+    other_file.write_text('CREATE TABLE app.other (id int PRIMARY KEY);\n')
+
+    for path in [str(other_file), '/etc/passwd']:
+        response = send_request(socket_path, {'op': 'reload', 'path': path})
+        assert not response['ok']
+        assert 'not served by this daemon' in response['error']
+
+    assert send_request(socket_path, {'op': 'status'})['result']['schema_files'] == [schema_file]
+    assert send_request(socket_path, {'op': 'reload', 'path': os.path.join(str(tmp_path), '.', 'schema.cql')})['ok']
+
+
+@pytest.mark.parametrize('address, expected_address', [
+    (':8765', ('127.0.0.1', 8765)),
+    ('localhost:8765', ('localhost', 8765)),
+    ('[::1]:8765', ('::1', 8765)),
+    ('/tmp/daemon.sock', None),
+])
+def test_parse_address(address, expected_address):
+    assert analysis_daemon.AnalysisDaemon.parse_address(address) == expected_address
+
+
+def test_non_loopback_hosts_need_allow_remote():
+    with pytest.raises(ValueError):
+        analysis_daemon.AnalysisDaemon(None, []).check_address('0.0.0.0:8765')
+    analysis_daemon.AnalysisDaemon(None, [], allow_remote=True).check_address('0.0.0.0:8765')
+    analysis_daemon.AnalysisDaemon(None, []).check_address('127.0.0.1:8765')
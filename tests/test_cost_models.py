@@ -0,0 +1,23 @@
+import pytest
+
+import cql_schema_analyser.cost_models as cost_models
+
+
+def test_numeric_strings_are_converted():
+    cost_model = cost_models.TableCostModel(sstables='3', offheap_bytes='1024')
+
+    assert cost_model.get_savings(2)['sstables_saved'] == 6
+    assert cost_model.get_savings(2)['offheap_bytes_saved'] == 2048
+
+
+@pytest.mark.parametrize('costs', [
+    {'sstables': 'three'},
+    {'sstables': -1},
+    {'sstables': 1.5},
+    {'offheap_bytes': None},
+    {'offheap_bytes': float('inf')},
+    {'metadata_heap_bytes': True},
+])
+def test_invalid_costs_are_rejected(costs):
+    with pytest.raises(ValueError):
+        cost_models.TableCostModel(**costs)
@@ -0,0 +1,102 @@
+import io
+
+import pytest
+
+import cql_schema_analyser.schema_processor as schema_processor
+
+
+KEYSPACE_STATEMENT = (
+    "CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};\n"
+)
+
+
+def write_schema(schema_file, *table_statements):
+    schema_file.write_text(KEYSPACE_STATEMENT + '\n'.join(table_statements) + '\n')
+
+
+def get_occurrence_names(schema_file, cache_dir=None):
+    cql_schema_processor = schema_processor.SchemaProcessor()
+    cql_schema_processor.catalog_schema(str(schema_file), cache_dir=cache_dir and str(cache_dir))
+    return sorted(
+        record['name'] for record in cql_schema_processor.cql_table_template_analyser.iter_occurrence_records()
+    )
+
+
+def test_repeated_table_names_are_catalogued_once_per_definition(tmp_path):
+    schema_file = tmp_path / 'schema.cql'
+    cache_dir = tmp_path / 'cache'
+    table_statement = 'CREATE TABLE app.events (id int PRIMARY KEY, payload text);'
+
+    write_schema(schema_file, table_statement, table_statement)
+    assert get_occurrence_names(schema_file, cache_dir) == ['app.events', 'app.events']
+
+    # Each edit changes the file without touching the repeated table, which must not gain an occurrence per run.
+    for other_columns in ['a int', 'a int, b int', 'a int, b int, c int']:
+        write_schema(
+            schema_file,
+            table_statement,
+            'CREATE TABLE app.other (id int PRIMARY KEY, {});'.format(other_columns),
+            table_statement
+        )
+        assert get_occurrence_names(schema_file, cache_dir) == get_occurrence_names(schema_file)
+        assert get_occurrence_names(schema_file, cache_dir).count('app.events') == 2
+
+
+def test_changed_and_removed_repeated_tables(tmp_path):
+    schema_file = tmp_path / 'schema.cql'
+    cache_dir = tmp_path / 'cache'
+    first_statement = 'CREATE TABLE app.events (id int PRIMARY KEY, payload text);'
+    second_statement = 'CREATE TABLE app.events (id bigint PRIMARY KEY, payload text);'
+
+    write_schema(schema_file, first_statement, second_statement, first_statement)
+    assert get_occurrence_names(schema_file, cache_dir) == ['app.events'] * 3
+
+    write_schema(schema_file, second_statement, first_statement)
+    assert get_occurrence_names(schema_file, cache_dir) == get_occurrence_names(schema_file)
+    assert get_occurrence_names(schema_file, cache_dir) == ['app.events'] * 2
+
+    write_schema(schema_file, second_statement)
+    assert get_occurrence_names(schema_file, cache_dir) == ['app.events']
+
+
+def get_report(schema_file, report_format, cache_dir=None):
+    cql_schema_processor = schema_processor.SchemaProcessor(
+        report_format=report_format,
+        report_granularity='occurrence',
+        report_file=io.StringIO()
+    )
+    cql_schema_processor.process_schema(str(schema_file), cache_dir=cache_dir and str(cache_dir))
+    return cql_schema_processor.report_file.getvalue()
+
+
+@pytest.mark.parametrize('report_format', ['text', 'jsonl'])
+def test_cached_report_is_the_same_as_uncached(tmp_path, report_format):
+    schema_file = tmp_path / 'schema.cql'
+    cache_dir = tmp_path / 'cache'
+    table_statements = [
+        "CREATE TABLE app.roles (role text PRIMARY KEY, can_login boolean) WITH comment = 'roles' AND "
+        "gc_grace_seconds = 10;",
+        "CREATE TABLE app.users (role text PRIMARY KEY, can_login boolean) WITH comment = 'users' AND "
+        "gc_grace_seconds = 10;",
+        "CREATE TABLE app.events (id int PRIMARY KEY, payload text) WITH gc_grace_seconds = 10;",
+        "CREATE TABLE app.audit (role text PRIMARY KEY, can_login boolean) WITH comment = 'audit' AND "
+        "gc_grace_seconds = 20 AND default_time_to_live = 5;",
+        "CREATE TABLE app.logins (role text PRIMARY KEY, can_login boolean) WITH comment = 'roles' AND "
+        "gc_grace_seconds = 10;",
+    ]
+
+    # Each edit changes the file under the cache: the reference variant of a template is given other properties, then
+    # renamed, then dropped, and finally a table is moved ahead of the others.
+    schema_edits = [
+        table_statements,
+        [table_statements[0].replace('gc_grace_seconds = 10', 'gc_grace_seconds = 30')] + table_statements[1:],
+        [table_statements[0].replace('app.roles', 'app.roles_v2')] + table_statements[1:],
+        table_statements[1:],
+        table_statements[3:4] + table_statements[1:3] + table_statements[4:],
+    ]
+    for schema_statements in schema_edits:
+        write_schema(schema_file, *schema_statements)
+        assert get_report(schema_file, report_format, cache_dir) == get_report(schema_file, report_format)
+
+    # The catalog saved by the last run is used as is when the file has not changed since.
+    assert get_report(schema_file, report_format, cache_dir) == get_report(schema_file, report_format)
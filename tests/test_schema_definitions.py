@@ -0,0 +1,15 @@
+import concurrent.futures
+
+import cql_schema_analyser.schema_definitions as schema_definitions
+
+
+def test_types_interned_concurrently_get_one_id_each():
+    type_registry = schema_definitions.TypeRegistry()
+    type_names = ['frozen<tuple<int, text, t{}>>'.format(type_index) for type_index in range(2000)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        type_ids = list(executor.map(type_registry.intern_all, [type_names] * 8))
+
+    assert all(thread_type_ids == type_ids[0] for thread_type_ids in type_ids)
+    assert sorted(type_ids[0]) == list(range(len(type_names)))
+    assert type_registry.names(type_ids[0]) == tuple(type_names)
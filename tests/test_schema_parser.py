@@ -0,0 +1,150 @@
+import io
+
+import pytest
+
+import cql_schema_analyser.diagnostics as diagnostics
+import cql_schema_analyser.processing_stats as processing_stats
+import cql_schema_analyser.schema_parser as schema_parser
+
+
+KEYSPACE_STATEMENT = (
+    "CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};\n"
+)
+
+
+def test_table_properties_stay_correct_beyond_the_memo_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema_parser.SchemaParser, 'table_properties_cache_size', 2)
+    schema_file = tmp_path / 'schema.cql'
+    comments = ['first', 'second', 'third', 'first', 'third', 'second']
+    schema_file.write_text(KEYSPACE_STATEMENT + ''.join(
+        "CREATE TABLE app.t{} (id int PRIMARY KEY) WITH comment = '{}' AND gc_grace_seconds = 10;\n".format(
+            table_index,
+            comment
+        )
+        for table_index, comment in enumerate(comments)
+    ))
+
+    cql_parser = schema_parser.SchemaParser()
+    table_definitions = list(cql_parser.iter_schema(str(schema_file)))
+
+    assert [table.properties for table in table_definitions] == [
+        {'comment': comment, 'gc_grace_seconds': '10'} for comment in comments
+    ]
+    # Nothing is kept by the parser between schemas.
+    assert not hasattr(cql_parser, 'table_properties')
+
+
+def test_skipped_objects_are_counted_by_kind(tmp_path):
+    schema_file = tmp_path / 'schema.cql'
+    schema_file.write_text(
+        KEYSPACE_STATEMENT +
+        "CREATE KEYSPACE other WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};\n"
+        "CREATE TABLE other.t (id int PRIMARY KEY, v text);\n"
+        "CREATE TYPE other.address (street text, city text);\n"
+        "CREATE MATERIALIZED VIEW other.t_by_v AS SELECT * FROM other.t WHERE v IS NOT NULL AND id IS NOT NULL "
+        "PRIMARY KEY (v, id);\n"
+        "CREATE INDEX ON other.t (v);\n"
+        "CREATE SEARCH INDEX ON other.t;\n"
+        "CREATE TYPE missing.address (street text);\n"
+        "CREATE TABLE app.t (id int PRIMARY KEY);\n"
+    )
+
+    cql_stats = processing_stats.ProcessingStats()
+    diagnostics_collector = diagnostics.DiagnosticsCollector()
+    table_definitions = list(schema_parser.SchemaParser().iter_schema(
+        str(schema_file),
+        ignore_keyspace=['other'],
+        stats=cql_stats,
+        diagnostics_collector=diagnostics_collector
+    ))
+
+    assert [table.name for table in table_definitions] == ['app.t']
+    assert {
+        counter: count for counter, count in cql_stats.counters.items() if '_skipped.' in counter
+    } == {
+        'parser.tables_skipped.ignored': 1,
+        'parser.types_skipped.ignored': 1,
+        'parser.types_skipped.undefined_keyspace': 1,
+        'parser.views_skipped.ignored': 1,
+        'parser.indexes_skipped.ignored': 1,
+        'parser.search_indexes_skipped.ignored': 1,
+    }
+    assert diagnostics_collector.samples['parser.index_in_ignored_keyspace'] == [('other', 't_v_idx')]
+    assert diagnostics_collector.get_count('parser.table_in_ignored_keyspace') == 1
+    assert diagnostics_collector.get_count('parser.type_in_undefined_keyspace') == 1
+
+
+def parse_table_statement(table_statement, diagnostics_collector):
+    return list(schema_parser.SchemaParser().iter_schema(
+        io.StringIO(KEYSPACE_STATEMENT + table_statement + '\n'),
+        diagnostics_collector=diagnostics_collector,
+        keep_column_names=True
+    ))
+
+
+@pytest.mark.parametrize('table_statement, columns, partition_key, clustering_key', [
+    (
+        'CREATE TABLE app.t (a int, b text, c timestamp, d int, PRIMARY KEY ((a, b), c, d));',
+        [('a', 'int'), ('b', 'text'), ('c', 'timestamp'), ('d', 'int')],
+        [('a', 'int'), ('b', 'text')],
+        [('c', 'timestamp'), ('d', 'int')]
+    ),
+    (
+        'CREATE TABLE app.t (a int, b text, PRIMARY KEY ((a), b));',
+        [('a', 'int'), ('b', 'text')],
+        [('a', 'int')],
+        [('b', 'text')]
+    ),
+    (
+        'CREATE TABLE app.t (a int, b text, s text static, t set<int> STATIC, PRIMARY KEY (a, b));',
+        [('a', 'int'), ('b', 'text'), ('s', 'text'), ('t', 'set<int>')],
+        [('a', 'int')],
+        [('b', 'text')]
+    ),
+    (
+        'CREATE TABLE app.t (a int PRIMARY KEY, f frozen<map<text, frozen<list<int>>>>, g frozen<app.address>, '
+        'h tuple<int, frozen<set<text>>>);',
+        [
+            ('a', 'int'),
+            ('f', 'frozen<map<text,frozen<list<int>>>>'),
+            ('g', 'frozen<app.address>'),
+            ('h', 'tuple<int,frozen<set<text>>>')
+        ],
+        [('a', 'int')],
+        []
+    ),
+    (
+        'CREATE TABLE app.t (key int, static int, PRIMARY KEY (key, static));',
+        [('key', 'int'), ('static', 'int')],
+        [('key', 'int')],
+        [('static', 'int')]
+    ),
+])
+def test_column_definitions(table_statement, columns, partition_key, clustering_key):
+    diagnostics_collector = diagnostics.DiagnosticsCollector()
+    table_definitions = parse_table_statement(table_statement, diagnostics_collector)
+
+    assert diagnostics_collector.get_count('parser.malformed_statement') == 0
+    assert len(table_definitions) == 1
+    table_definition = table_definitions[0]
+    assert list(zip(table_definition.column_names, table_definition.columns)) == columns
+    assert list(zip(table_definition.partition_key_names, table_definition.partition_key)) == partition_key
+    assert list(zip(table_definition.clustering_key_names, table_definition.clustering_key)) == clustering_key
+
+
+@pytest.mark.parametrize('table_statement, message', [
+    ('CREATE TABLE app.t ((a int PRIMARY KEY);', 'Unexpected "(" found. Skipping.'),
+    ('CREATE TABLE app.t (a int, b int);', 'No primary key found. Skipping.'),
+    ('CREATE TABLE app.t (a int PRIMARY KEY, b int PRIMARY KEY);', 'Multiple primary keys found. Skipping.'),
+    ('CREATE TABLE app.t (a int PRIMARY KEY, PRIMARY KEY (a));', 'Multiple primary keys found. Skipping.'),
+    ('CREATE TABLE app.t (a int, PRIMARY KEY (z));', 'Key column "z" is not defined in the table. Skipping.'),
+    ('CREATE TABLE app.t (a int, b int, PRIMARY KEY ((a, b));', 'Unexpected ";" found. Skipping.'),
+    ('CREATE TABLE app.t (a int PRIMARY KEY, b list<int);', 'Unexpected ")" found. Skipping.'),
+    ('CREATE TABLE app.t (a int PRIMARY KEY, b int,);', 'Unexpected ")" found. Skipping.'),
+    ('CREATE TABLE app.t (a int PRIMARY KEY, b int static static);', 'Unexpected "static" found. Skipping.'),
+])
+def test_malformed_column_definitions(table_statement, message):
+    diagnostics_collector = diagnostics.DiagnosticsCollector()
+
+    assert parse_table_statement(table_statement, diagnostics_collector) == []
+    assert [str(sample[0]) for sample in diagnostics_collector.samples['parser.malformed_statement']] == [message]
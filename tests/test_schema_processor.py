@@ -0,0 +1,173 @@
+import io
+import json
+
+import pytest
+
+import cql_schema_analyser.processing_stats as processing_stats
+import cql_schema_analyser.schema_definitions as schema_definitions
+import cql_schema_analyser.schema_parser as schema_parser
+import cql_schema_analyser.schema_processor as schema_processor
+
+
+# Tables with the same columns and a mix of properties, so that the properties of most tables are matched against the
+# variants found before them, across two keyspaces that are switched between with USE.
+def write_schema(schema_file, table_count=400):
+    schema_lines = [
+        "CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};",
+        "CREATE KEYSPACE other WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};",
+    ]
+    for table_idx in range(table_count):
+        if table_idx % 50 == 0:
+            schema_lines.append('USE {};'.format('app' if table_idx % 100 == 0 else 'other'))
+        schema_lines.append(
+            'CREATE TABLE t{} (id int PRIMARY KEY, v{} text) WITH gc_grace_seconds = {} AND default_time_to_live = {} '
+            'AND min_index_interval = {};'.format(
+                table_idx,
+                table_idx % 3,
+                table_idx % 2,
+                table_idx % 5 // 2,
+                table_idx % 7 // 3
+            )
+        )
+    schema_file.write_text('\n'.join(schema_lines) + '\n')
+
+
+def get_report(schema_file, jobs, report_format, chunk_size=schema_processor.SchemaProcessor.parallel_chunk_size):
+    cql_schema_processor = schema_processor.SchemaProcessor(
+        report_format=report_format,
+        report_granularity='occurrence',
+        report_file=io.StringIO()
+    )
+    cql_schema_processor.parallel_chunk_size = chunk_size
+    cql_schema_processor.process_schema(str(schema_file), jobs=jobs)
+    return cql_schema_processor.report_file.getvalue()
+
+
+@pytest.mark.parametrize('report_format', ['text', 'jsonl'])
+@pytest.mark.parametrize('chunk_size', [1 << 22, 2048])
+def test_parallel_report_is_the_same_as_serial(tmp_path, report_format, chunk_size):
+    schema_file = tmp_path / 'schema.cql'
+    write_schema(schema_file)
+
+    serial_report = get_report(schema_file, 1, report_format)
+    assert serial_report
+    assert get_report(schema_file, 2, report_format, chunk_size=chunk_size) == serial_report
+
+
+@pytest.mark.parametrize('chunk_size', [1 << 22, 2048])
+def test_statements_are_referenced_in_the_mapped_file(tmp_path, chunk_size):
+    schema_file = tmp_path / 'schema.cql'
+    write_schema(schema_file)
+
+    cql_schema_processor = schema_processor.SchemaProcessor()
+    cql_schema_processor.parallel_chunk_size = chunk_size
+    cql_schema_processor.catalog_schema(str(schema_file), jobs=None)
+
+    template_variants = [
+        template_definition[props_hash]
+        for template_definition in cql_schema_processor.cql_table_template_analyser.template_definitions.values()
+        for props_hash in template_definition['variants']
+    ]
+    assert template_variants
+    for template in template_variants:
+        assert isinstance(template['statement'], schema_definitions.StatementRef)
+        assert str(template['statement']).startswith('CREATE TABLE ')
+
+
+def test_compare_reports_renamed_and_rekeyed_tables(tmp_path):
+    node_tables = {
+        'node1.cql': [
+            'CREATE TABLE app.renamed (id int PRIMARY KEY, name text);',
+            'CREATE TABLE app.rekeyed (a int, b int, c int, PRIMARY KEY (a, b));',
+            'CREATE TABLE app.same (id int PRIMARY KEY, name text);',
+        ],
+        'node2.cql': [
+            'CREATE TABLE app.renamed (id int PRIMARY KEY, title text);',
+            'CREATE TABLE app.rekeyed (a int, b int, c int, PRIMARY KEY (a, c));',
+            'CREATE TABLE app.same (name text, id int PRIMARY KEY);',
+        ],
+    }
+    for file_name, table_statements in node_tables.items():
+        (tmp_path / file_name).write_text('\n'.join(
+            ["CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};"] +
+            table_statements
+        ) + '\n')
+
+    cql_schema_processor = schema_processor.SchemaProcessor(report_format='jsonl', report_file=io.StringIO())
+    cql_schema_processor.compare_schemas([str(tmp_path / file_name) for file_name in node_tables], jobs=1)
+
+    assert [json.loads(record_line) for record_line in cql_schema_processor.report_file.getvalue().splitlines()] == [
+        {'table': 'app.rekeyed', 'kind': 'columns', 'node1.cql': 'A', 'node2.cql': 'B'},
+        {'table': 'app.renamed', 'kind': 'columns', 'node1.cql': 'A', 'node2.cql': 'B'},
+    ]
+
+
+# Statements whose heads are checked by the prescan of tables in skipped keyspaces, including heads that it must leave
+# to be parsed in full: malformed names, names split by a comment or quoted, and statements cut short.
+PRESCAN_SCHEMA = '''
+CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};
+CREATE KEYSPACE other WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};
+CREATE TABLE app.kept (id int PRIMARY KEY, payload text);
+CREATE TABLE other.skipped (id int PRIMARY KEY, payload text);
+CREATE TABLE IF NOT EXISTS other.skipped_lwt (id int PRIMARY KEY);
+CREATE TABLE IF EXISTS other.bad_lwt (id int PRIMARY KEY);
+CREATE TABLE "other"."Quoted" (id int PRIMARY KEY);
+CREATE TABLE other . spaced(id int PRIMARY KEY);
+CREATE TABLE other /* ( */ .commented (id int PRIMARY KEY);
+CREATE TABLE "other(".odd (id int PRIMARY KEY);
+CREATE TABLE other.t.extra (id int PRIMARY KEY);
+CREATE TABLE other._bad (id int PRIMARY KEY);
+CREATE TABLE other.no_columns;
+CREATE TABLE missing.table (id int PRIMARY KEY);
+CREATE TABLE other.broken (id int PRIMARY KEY, payload list<int);
+USE other;
+CREATE TABLE unqualified (id int PRIMARY KEY);
+CREATE TABLE unqualified_broken (id int, PRIMARY KEY (z));
+USE app;
+CREATE TABLE app_unqualified (id int PRIMARY KEY);
+CREATE TABLE app.last (id int PRIMARY KEY) WITH comment = 'last';
+'''
+
+
+def get_checked_report(schema_file, report_format, ignore_keyspace=None, select_keyspace=None):
+    cql_schema_processor = schema_processor.SchemaProcessor(
+        stats=processing_stats.ProcessingStats(),
+        report_format=report_format,
+        report_granularity='occurrence',
+        report_file=io.StringIO()
+    )
+    cql_schema_processor.process_schema(
+        str(schema_file),
+        ignore_keyspace=ignore_keyspace,
+        select_keyspace=select_keyspace
+    )
+    return (
+        cql_schema_processor.report_file.getvalue(),
+        cql_schema_processor.diagnostics_collector.as_dict(),
+        cql_schema_processor.stats.counters['parser.statements_prescanned']
+    )
+
+
+@pytest.mark.parametrize('report_format', ['text', 'jsonl'])
+@pytest.mark.parametrize('keyspace_filters', [{'ignore_keyspace': ['other']}, {'select_keyspace': ['app']}])
+def test_prescan_gives_the_same_report_and_diagnostics(tmp_path, monkeypatch, report_format, keyspace_filters):
+    schema_file = tmp_path / 'schema.cql'
+    schema_file.write_text(PRESCAN_SCHEMA)
+
+    prescanned_report, prescanned_diagnostics, prescanned_count = get_checked_report(
+        schema_file,
+        report_format,
+        **keyspace_filters
+    )
+    assert prescanned_count > 0
+    assert 'app.kept' in prescanned_report and 'app.last' in prescanned_report
+    assert prescanned_diagnostics['parser.table_in_ignored_keyspace' if 'ignore_keyspace' in keyspace_filters else
+                                  'parser.table_in_unselected_keyspace']['count'] > 0
+    assert prescanned_diagnostics['parser.malformed_statement']['count'] > 0
+
+    monkeypatch.setattr(schema_parser.ParseSession, '_ParseSession__is_skipped_table_statement', lambda *args: False)
+    assert get_checked_report(schema_file, report_format, **keyspace_filters) == (
+        prescanned_report,
+        prescanned_diagnostics,
+        0
+    )
@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cql_schema_analyser.schema_definitions as schema_definitions
+import cql_schema_analyser.schema_rules as schema_rules
+
+
+SCHEMA_PROCESSOR = os.path.join(os.path.dirname(__file__), '..', 'cql_schema_analyser', 'schema_processor.py')
+
+RULES_SOURCE = '''
+import logging
+
+import cql_schema_analyser.schema_rules as schema_rules
+
+
+class NoCommentRule(schema_rules.SchemaRule):
+    code = 'no_comment'
+    severity = logging.ERROR
+    description = 'Tables must have a comment.'
+
+    def check(self, table_definition):
+        if not table_definition.properties.get('comment'):
+            return 'No comment.'
+        return None
+
+
+rules = [NoCommentRule(), schema_rules.WideTableRule(max_columns=2)]
+'''
+
+
+def get_table(columns, partition_key, clustering_key=(), properties=None):
+    return schema_definitions.TableDefinition.from_type_names(
+        'app',
+        'events',
+        columns=columns,
+        partition_key=partition_key,
+        clustering_key=clustering_key,
+        properties=properties
+    )
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    rules_path = tmp_path / 'my_rules.py'
+    rules_path.write_text(RULES_SOURCE)
+    return str(rules_path)
+
+
+@pytest.mark.parametrize('table_definition, rule_codes', [
+    (get_table(['uuid', 'text'], ['uuid']), []),
+    (get_table(['uuid', 'timestamp', 'double'], ['uuid', 'int'], ['timestamp']), []),
+    (get_table(['boolean', 'text'], ['boolean']), ['low_cardinality_partition_key']),
+    (get_table(['text', 'timeuuid', 'text'], ['text'], ['timeuuid']), ['unbucketed_time_series']),
+    (get_table(['uuid', 'list<text>', 'frozen<set<int>>'], ['uuid']), ['unbounded_collection']),
+    (get_table(['uuid', 'counter', 'text'], ['uuid']), ['mixed_counter_columns']),
+    (get_table(['uuid'] + ['int'] * 101, ['uuid']), ['wide_table']),
+])
+def test_default_rules(table_definition, rule_codes):
+    rule_engine = schema_rules.SchemaRuleEngine()
+    rule_engine.check_table_definition(table_definition)
+
+    assert rule_engine.tables_checked == 1
+    assert sorted(record['rule'] for record in rule_engine.iter_finding_records()) == rule_codes
+    assert rule_engine.get_finding_count() == len(rule_codes)
+
+
+def test_loaded_rules_are_added_and_replace_default_rules(rules_file):
+    rule_engine = schema_rules.SchemaRuleEngine()
+    rule_engine.add_rules(schema_rules.SchemaRuleEngine.load_rules(rules_file))
+
+    assert sorted(rule.code for rule in rule_engine.rules) == [
+        'low_cardinality_partition_key', 'mixed_counter_columns', 'no_comment', 'unbounded_collection',
+        'unbucketed_time_series', 'wide_table'
+    ]
+
+    rule_engine.check_table_definition(get_table(['uuid', 'text'], ['uuid'], properties={'comment': 'events'}))
+    rule_engine.check_table_definition(get_table(['uuid', 'text', 'text'], ['uuid']), source='schema.cql')
+
+    # Findings are ordered from the most to the least severe rule.
+    assert list(rule_engine.iter_finding_records()) == [
+        {
+            'rule': 'no_comment',
+            'severity': 'ERROR',
+            'table': 'app.events',
+            'source': 'schema.cql',
+            'message': 'No comment.',
+        },
+        {
+            'rule': 'wide_table',
+            'severity': 'WARNING',
+            'table': 'app.events',
+            'source': 'schema.cql',
+            'message': '3 columns, more than the 2 allowed.',
+        },
+    ]
+
+
+def test_rules_file_without_rules_is_rejected(tmp_path):
+    rules_path = tmp_path / 'my_rules.py'
+    rules_path.write_text('rules = ["not a rule"]\n')
+
+    with pytest.raises(ImportError):
+        schema_rules.SchemaRuleEngine.load_rules(str(rules_path))
+
+
+@pytest.mark.parametrize('table_statement, use_rules, exit_status', [
+    ("CREATE TABLE app.events (id uuid PRIMARY KEY, payload text) WITH comment = 'events';", False, 0),
+    ("CREATE TABLE app.events (id uuid PRIMARY KEY, payload text) WITH comment = 'events';", True, 0),
+    ('CREATE TABLE app.events (id uuid PRIMARY KEY, payload text);', True, 1),
+    ("CREATE TABLE app.flags (id boolean PRIMARY KEY) WITH comment = 'flags';", False, 1),
+])
+def test_cli_exit_status(tmp_path, rules_file, table_statement, use_rules, exit_status):
+    schema_file = tmp_path / 'schema.cql'
+    schema_file.write_text(
+        "CREATE KEYSPACE app WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1};\n" +
+        table_statement + '\n'
+    )
+
+    cli_args = [sys.executable, SCHEMA_PROCESSOR, str(schema_file)]
+    cli_args += ['--rules', rules_file] if use_rules else ['--check']
+    cli_process = subprocess.run(cli_args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    assert cli_process.returncode == exit_status
+    assert cli_process.stdout.startswith('Checked 1 tables against')
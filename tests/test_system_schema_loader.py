@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import cql_schema_analyser.schema_parser as schema_parser
+import cql_schema_analyser.system_schema_loader as system_schema_loader
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# The same schema as CQL and as an export of the system_schema tables. It holds a table in a reserved keyspace.
+SCHEMA_FILE = os.path.join(FIXTURES_DIR, 'system_schema.cql')
+EXPORT_DIR = os.path.join(FIXTURES_DIR, 'system_schema')
+
+
+def get_tables(table_definitions):
+    return sorted(
+        (table.name, table.columns, table.partition_key, table.clustering_key, table.properties)
+        for table in table_definitions
+    )
+
+
+@pytest.mark.parametrize('keyspace_options', [
+    {},
+    {'parse_reserved_keyspaces': True},
+    {'ignore_keyspace': ['app'], 'parse_reserved_keyspaces': True},
+    {'ignore_keyspace': ['other']},
+    {'select_keyspace': ['app']},
+    {'select_keyspace': ['app'], 'parse_reserved_keyspaces': True},
+])
+def test_export_loads_the_same_tables_as_the_cql(keyspace_options):
+    parsed_tables = get_tables(schema_parser.SchemaParser().parse_schema(SCHEMA_FILE, **keyspace_options))
+    loaded_tables = get_tables(system_schema_loader.SystemSchemaLoader().load_schema(EXPORT_DIR, **keyspace_options))
+
+    assert parsed_tables
+    assert loaded_tables == parsed_tables
+
+
+def test_reserved_keyspaces_are_kept_by_default():
+    table_names = [table.name for table in system_schema_loader.SystemSchemaLoader().load_schema(EXPORT_DIR)]
+
+    assert 'system_auth.roles' in table_names